@@ -68,9 +68,8 @@ class AccurateFruitAnalyzer {
         .raw()
         .toBuffer({ resolveWithObject: true });
 
-      // Convert to tensor and normalize (0-1)
+      // Raw 0-255 RGB pixels: the exported model rescales them itself
       const imageTensor = tf.tensor3d(Array.from(data), [this.imageSize, this.imageSize, 3])
-        .div(255.0)
         .expandDims(0) as tf.Tensor4D;
 
       // Make prediction
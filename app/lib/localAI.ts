@@ -90,7 +90,7 @@ class LocalFruitAnalyzer {
         .raw()
         .toBuffer({ resolveWithObject: true });
 
-      // Convert to tensor and normalize
+      // Convert to tensor and normalize (fruitai-model is trained by train-simple.js on 0-1 pixels)
       const imageTensor = tf.tensor3d(Array.from(data), [this.imageSize, this.imageSize, 3])
         .div(255.0)
         .expandDims(0) as tf.Tensor4D;
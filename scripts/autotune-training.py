@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Autotune training throughput for this host
+Times short training runs over intra/inter-op thread pools, batch size and
+data-pipeline parallelism and saves the fastest configuration under this
+host's fingerprint; the trainers pick it up automatically on their next run
+"""
+
+import os
+import time
+import argparse
+import resource
+import numpy as np
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from backbones import BACKBONES
+from trainer_registry import TRAINERS, trainer_class
+
+# Distinct synthetic images per trial; batches cycle through them
+SYNTHETIC_IMAGES = 256
+
+
+def run_trial(config, settings):
+    """Time training steps of one configuration on synthetic images
+
+    Runs in its own process: thread pools can only be sized before the first
+    TensorFlow op, so every thread setting needs a fresh runtime.
+    """
+    from host_tuning import configure_threads
+    configure_threads(config['intra_op_threads'], config['inter_op_threads'])
+
+    from tensorflow import keras
+
+    class StepTimer(keras.callbacks.Callback):
+        def on_train_begin(self, logs=None):
+            self.step_times = []
+
+        def on_train_batch_begin(self, batch, logs=None):
+            self.step_start = time.perf_counter()
+
+        def on_train_batch_end(self, batch, logs=None):
+            self.step_times.append(time.perf_counter() - self.step_start)
+
+    trainer = trainer_class(settings['trainer'])(
+        backbone=settings['backbone'],
+        pipeline_augmentation=settings['pipeline_augmentation'],
+        autotuned=False
+    )
+    if config['batch_size']:
+        trainer.batch_size = config['batch_size']
+    if config['pipeline_parallelism'] is not None:
+        trainer.pipeline_parallelism = config['pipeline_parallelism']
+
+    # Pixels and labels only have to look like the real dataset to the training step
+    rng = np.random.default_rng(0)
+    trainer.images = rng.integers(0, 256, size=(SYNTHETIC_IMAGES, *trainer.img_size, 3), dtype=np.uint8)
+    qualities = rng.choice(['fresh', 'rotten'], SYNTHETIC_IMAGES)
+    fruits = rng.choice(['apple', 'banana', 'orange'], SYNTHETIC_IMAGES)
+    trainer.set_labels(list(qualities), list(fruits), [f'synthetic/{i}' for i in range(SYNTHETIC_IMAGES)])
+    trainer.create_model()
+
+    steps = settings['warmup_steps'] + settings['steps']
+    trainer.splits = {'train': np.arange(steps * trainer.batch_size) % SYNTHETIC_IMAGES}
+
+    timer = StepTimer()
+    trainer.model.fit(trainer.split_data('train'), epochs=1, callbacks=[timer], verbose=0)
+
+    # The first steps pay for graph tracing and pipeline warm-up
+    steady = timer.step_times[settings['warmup_steps']:] or timer.step_times
+    step_seconds = float(np.median(steady))
+    scale = 1024 if os.uname().sysname == 'Linux' else 1024 * 1024
+    return {
+        **config,
+        'batch_size': trainer.batch_size,
+        'step_p50_ms': step_seconds * 1000,
+        'images_per_sec': trainer.batch_size / step_seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    }
+
+
+def run_isolated(function, *args):
+    """Run one trial in a fresh process so its thread pools and memory are its own"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(function, *args).result()
+
+
+def describe(config):
+    pipeline = config['pipeline_parallelism']
+    return (f"batch {config['batch_size'] or 'default'}, intra {config['intra_op_threads'] or 'default'}, "
+            f"inter {config['inter_op_threads'] or 'default'}, "
+            f"pipeline {'default' if pipeline is None else 'autotune' if pipeline < 0 else pipeline}")
+
+
+class Autotuner:
+    """Coordinate search: thread pools first, then batch size, then pipeline parallelism"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.trials = []
+
+    def measure(self, config):
+        print(f"⏱️  {describe(config)}")
+        try:
+            result = run_isolated(run_trial, config, self.settings)
+            print(f"   {result['images_per_sec']:.1f} images/sec ({result['step_p50_ms']:.0f} ms/step, "
+                  f"{result['peak_rss_mb']:.0f} MB peak)")
+        except Exception as e:
+            print(f"   ❌ Failed: {e}")
+            result = {**config, 'images_per_sec': 0.0, 'error': str(e)}
+        self.trials.append(result)
+        return result
+
+    def best_of(self, candidates):
+        results = [self.measure(config) for config in candidates]
+        return max(results, key=lambda result: result['images_per_sec'])
+
+    def search(self, batch_sizes, intra_op_threads, inter_op_threads, pipeline_parallelism):
+        best = {'batch_size': None, 'intra_op_threads': 0, 'inter_op_threads': 0, 'pipeline_parallelism': None}
+
+        print("\n🧵 Thread pools")
+        best = self.best_of([
+            {**best, 'intra_op_threads': intra, 'inter_op_threads': inter}
+            for intra in intra_op_threads for inter in inter_op_threads
+        ])
+
+        print("\n📦 Batch size")
+        best = self.best_of([{**best, 'batch_size': batch_size} for batch_size in batch_sizes])
+
+        if pipeline_parallelism:
+            print("\n🚰 Pipeline parallelism")
+            best = self.best_of([{**best, 'pipeline_parallelism': calls} for calls in pipeline_parallelism])
+
+        return best
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Find the fastest training configuration for this host')
+    parser.add_argument('--trainer', choices=sorted(TRAINERS), default='real',
+                        help='Trainer whose training step is tuned')
+    parser.add_argument('--backbone', choices=sorted(BACKBONES),
+                        help="Backbone to tune (defaults to the trainer's own)")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[16, 32, 64])
+    parser.add_argument('--intra-op-threads', type=int, nargs='+',
+                        default=sorted({0, max(1, cores // 2), cores}),
+                        help='Intra-op thread pool sizes to try (0 = TF default)')
+    parser.add_argument('--inter-op-threads', type=int, nargs='+', default=[0, 1, 2],
+                        help='Inter-op thread pool sizes to try (0 = TF default)')
+    parser.add_argument('--pipeline-augmentation', action='store_true',
+                        help='Tune the tf.data augmentation pipeline the trainers use with --pipeline-augmentation')
+    parser.add_argument('--pipeline-parallelism', type=int, nargs='+',
+                        default=sorted({-1, 2, max(2, cores // 2), cores}),
+                        help='Parallel map calls to try with --pipeline-augmentation (-1 = tf.data AUTOTUNE)')
+    parser.add_argument('--warmup-steps', type=int, default=3,
+                        help='Untimed steps per trial while graphs are traced')
+    parser.add_argument('--steps', type=int, default=10,
+                        help='Timed steps per trial')
+    args = parser.parse_args()
+
+    print("🍎 FruitAI Training Autotuner")
+    print("=============================")
+
+    from host_tuning import tuning_key, host_fingerprint, save_tuned_config
+
+    backbone = args.backbone or TRAINERS[args.trainer]['backbone']
+    settings = {
+        'trainer': args.trainer,
+        'backbone': backbone,
+        'pipeline_augmentation': args.pipeline_augmentation,
+        'warmup_steps': args.warmup_steps,
+        'steps': args.steps
+    }
+    key = tuning_key(TRAINERS[args.trainer]['class'], backbone)
+    print(f"🖥️  Host fingerprint: {host_fingerprint()}")
+    print(f"🎯 Tuning {key}")
+
+    tuner = Autotuner(settings)
+    best = tuner.search(
+        args.batch_sizes, args.intra_op_threads, args.inter_op_threads,
+        args.pipeline_parallelism if args.pipeline_augmentation else None
+    )
+    if not best['images_per_sec']:
+        print("❌ Every trial failed, nothing saved")
+        return
+
+    config = {
+        'batch_size': best['batch_size'],
+        'intra_op_threads': best['intra_op_threads'],
+        'inter_op_threads': best['inter_op_threads'],
+        'images_per_sec': best['images_per_sec'],
+        'tuned': datetime.now().isoformat(timespec='seconds')
+    }
+    if args.pipeline_augmentation:
+        config['pipeline_parallelism'] = best['pipeline_parallelism']
+
+    path = save_tuned_config(key, config, tuner.trials)
+    print(f"\n🏆 Fastest: {describe(best)} at {best['images_per_sec']:.1f} images/sec")
+    print(f"✅ Saved to: {path}")
+    print("   The trainers use it automatically; pass --no-autotune to ignore it")
+    if best['batch_size']:
+        print("   A tuned batch size scales the learning rates with it, which can still change convergence")
+
+
+if __name__ == "__main__":
+    main()
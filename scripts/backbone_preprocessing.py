@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+In-graph input preprocessing for the FruitAI backbones
+Models take raw 0-255 RGB pixels, so loaders keep uint8 and clients never normalize
+"""
+
+import numpy as np
+from tensorflow.keras import layers
+
+# ImageNet channel means in BGR order, as used by resnet50.preprocess_input
+CAFFE_BGR_MEAN = [103.939, 116.779, 123.68]
+
+
+def caffe_preprocessing(x, name='caffe_preprocessing'):
+    """Apply resnet50.preprocess_input inside the graph
+
+    The RGB->BGR swap and mean subtraction are expressed as a frozen 1x1
+    convolution, so the model stays serializable without Lambda layers and
+    converts cleanly to TF.js.
+    """
+    conv = layers.Conv2D(3, 1, name=name, trainable=False)
+    outputs = conv(x)
+
+    kernel = np.zeros((1, 1, 3, 3), dtype=np.float32)
+    for channel in range(3):
+        kernel[0, 0, channel, 2 - channel] = 1.0
+    conv.set_weights([kernel, -np.array(CAFFE_BGR_MEAN, dtype=np.float32)])
+
+    return outputs
+
+
+def backbone_preprocessing(x, backbone):
+    """Map raw 0-255 pixels to what the given keras.applications backbone expects"""
+    backbone = backbone.lower()
+
+    if backbone.startswith('efficientnet') or backbone.startswith('mobilenetv3'):
+        # EfficientNet and MobileNetV3 rescale and normalize internally
+        return x
+    if backbone.startswith('mobilenet'):
+        # MobileNet V1/V2 expect pixels scaled to [-1, 1]
+        return layers.Rescaling(1. / 127.5, offset=-1, name='mobilenet_preprocessing')(x)
+    if backbone.startswith('resnet'):
+        return caffe_preprocessing(x)
+
+    raise ValueError(f"No preprocessing defined for backbone: {backbone}")
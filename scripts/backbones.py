@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Backbone registry for the FruitAI training engine
+Each entry names a keras.applications constructor and where staged
+fine-tuning starts; preprocessing lives in backbone_preprocessing.py
+"""
+
+from tensorflow import keras
+
+# fine_tune_at: first backbone layer that fine-tuning may unfreeze (negative counts from the top)
+# blocks_per_stage: architectural blocks unfrozen per fine-tuning stage
+BACKBONES = {
+    'mobilenetv3small': {
+        'application': 'MobileNetV3Small',
+        'fine_tune_at': -60,
+        'blocks_per_stage': 2
+    },
+    'mobilenetv3large': {
+        'application': 'MobileNetV3Large',
+        'fine_tune_at': -80,
+        'blocks_per_stage': 2
+    },
+    'efficientnetb0': {
+        'application': 'EfficientNetB0',
+        'fine_tune_at': 100,
+        'blocks_per_stage': 3
+    },
+    'efficientnetb2': {
+        'application': 'EfficientNetB2',
+        'fine_tune_at': -140,
+        'blocks_per_stage': 3
+    },
+    'resnet50': {
+        'application': 'ResNet50',
+        'fine_tune_at': -20,
+        'blocks_per_stage': 1
+    },
+}
+
+
+def create_backbone(name, input_shape, weights='imagenet'):
+    """Build a headless ImageNet backbone from the registry"""
+    if name not in BACKBONES:
+        raise ValueError(f"Unknown backbone: {name} (available: {', '.join(sorted(BACKBONES))})")
+
+    application = getattr(keras.applications, BACKBONES[name]['application'])
+    return application(weights=weights, include_top=False, input_shape=input_shape)
+
+
+def backbone_display_name(name):
+    """'efficientnetb0' -> 'EfficientNetB0'"""
+    return BACKBONES[name]['application']
+
+
+def fine_tune_layer(backbone, name):
+    """Index of the first layer of a built backbone that staged fine-tuning may unfreeze"""
+    fine_tune_at = BACKBONES[name]['fine_tune_at']
+    if fine_tune_at < 0:
+        return max(0, len(backbone.layers) + fine_tune_at)
+    return fine_tune_at
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Benchmark the FruitAI training pipeline on a reproducible synthetic dataset
+Measures organizer and loader throughput, peak memory, train step/epoch
+time and inference latency per backbone, writes a JSON baseline and flags
+regressions against it
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from trainer_registry import TRAINERS, trainer_class, load_script
+from data_layout import reserved_dir
+
+FRUITS = ['apple', 'banana', 'orange', 'tomato', 'strawberry']
+QUALITIES = ['fresh', 'rotten']
+
+# Every trainer is benchmarked with its default backbone
+BACKBONES = {trainer['backbone']: name for name, trainer in TRAINERS.items()}
+
+# Loader modes shared by both trainers, as trainer constructor arguments
+LOADERS = {
+    'files': {},
+    'files_parallel': {'decode_workers': 0},
+    'cache_cold': {'use_cache': True},
+    'cache_warm': {'use_cache': True},
+    'shards': {'shard_dir': 'shards'},
+}
+
+# Metrics where a larger value is an improvement; everything else is a cost
+HIGHER_IS_BETTER = ('images_per_sec',)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its (waited-for) children in MB"""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        'peak_child_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    }
+
+
+def create_synthetic_dataset(bench_dir, images_per_class):
+    """Write a deterministic raw/<dataset>/<quality>/<fruit>/*.jpg download tree (reused when unchanged)"""
+    raw_dir = bench_dir / 'raw'
+    marker = bench_dir / 'dataset.json'
+    spec = {'images_per_class': images_per_class, 'fruits': FRUITS, 'qualities': QUALITIES, 'layout': 'raw'}
+
+    if marker.exists() and json.loads(marker.read_text()) == spec:
+        print(f"♻️  Reusing synthetic dataset: {raw_dir}")
+        return raw_dir
+
+    print(f"🎨 Generating synthetic dataset: {images_per_class} images per class...")
+    shutil.rmtree(bench_dir, ignore_errors=True)
+    generator = load_script('download-fresh-rotten-dataset.py').SimpleDatasetDownloader()
+
+    for quality in QUALITIES:
+        for fruit in FRUITS:
+            fruit_dir = raw_dir / 'synthetic' / quality / fruit
+            fruit_dir.mkdir(parents=True, exist_ok=True)
+            for i in range(images_per_class):
+                img = generator.generate_realistic_fruit_image(fruit, quality, i)
+                img.save(fruit_dir / f"{fruit}_{quality}_{i:04d}.jpg", 'JPEG', quality=85)
+
+    marker.write_text(json.dumps(spec))
+    return raw_dir
+
+
+def run_organizer_phase(bench_dir, output_format):
+    """Time organize-datasets.py's DatasetOrganizer over the synthetic download tree
+
+    files writes the organized/ tree and shards the shard set that the
+    loader phases then read, so both come from the production code path.
+    """
+    organizer = load_script('organize-datasets.py').DatasetOrganizer(output_format=output_format, shard_size_mb=16)
+    organizer.base_dir = bench_dir / 'raw'
+    organizer.organized_dir = bench_dir / 'organized'
+    organizer.shard_dir = bench_dir / 'shards'
+    if output_format == 'files':
+        shutil.rmtree(organizer.organized_dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    if not organizer.organize_all_datasets():
+        raise RuntimeError(f"organize-datasets.py --format {output_format} organized no benchmark images")
+    elapsed = time.perf_counter() - start
+
+    images = sum(sum(fruits.values()) for fruits in organizer.stats.values())
+    return {'images': images, 'seconds': elapsed, 'images_per_sec': images / elapsed, **peak_rss_mb()}
+
+
+def make_trainer(backbone, bench_dir, **options):
+    """Build a trainer pointed at the synthetic dataset"""
+    if 'shard_dir' in options:
+        options['shard_dir'] = bench_dir / options['shard_dir']
+
+    # Measure the pipeline itself, not whatever autotune-training.py picked for this host
+    trainer = trainer_class(BACKBONES[backbone])(autotuned=False, **options)
+    trainer.base_dir = bench_dir / 'organized'
+    trainer.checkpoint_dir = bench_dir / 'checkpoints'
+    return trainer
+
+
+def run_loader_phase(bench_dir, loader):
+    """Time trainer.load_dataset() for one loader mode"""
+    trainer = make_trainer('efficientnetb0', bench_dir, **LOADERS[loader])
+
+    start = time.perf_counter()
+    trainer.load_dataset()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'images': trainer.dataset_size,
+        'seconds': elapsed,
+        'images_per_sec': trainer.dataset_size / elapsed,
+        **peak_rss_mb()
+    }
+
+
+def run_streaming_phase(bench_dir):
+    """Time one full pass of the streaming tf.data pipeline over the training split"""
+    trainer = make_trainer('efficientnetb0', bench_dir, streaming=True)
+    trainer.load_dataset()
+    trainer.load_splits()
+
+    start = time.perf_counter()
+    images = 0
+    for batch, _ in trainer.split_data('train', shuffle=True):
+        images += int(batch.shape[0])
+    elapsed = time.perf_counter() - start
+
+    return {'images': images, 'seconds': elapsed, 'images_per_sec': images / elapsed, **peak_rss_mb()}
+
+
+def run_backbone_phase(bench_dir, backbone, epochs):
+    """Time train steps and epochs of the frozen-backbone model, then inference latency"""
+    from tensorflow import keras
+    from inference_latency import measure_latency
+
+    class StepTimer(keras.callbacks.Callback):
+        def on_train_begin(self, logs=None):
+            self.step_times = []
+            self.epoch_times = []
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self.epoch_start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.epoch_times.append(time.perf_counter() - self.epoch_start)
+
+        def on_train_batch_begin(self, batch, logs=None):
+            self.step_start = time.perf_counter()
+
+        def on_train_batch_end(self, batch, logs=None):
+            self.step_times.append(time.perf_counter() - self.step_start)
+
+    trainer = make_trainer(backbone, bench_dir, use_cache=True)
+    trainer.load_dataset()
+
+    start = time.perf_counter()
+    trainer.create_model()
+    build_seconds = time.perf_counter() - start
+
+    trainer.load_splits()
+    timer = StepTimer()
+    trainer.model.fit(
+        trainer.split_data('train', shuffle=True),
+        epochs=epochs,
+        callbacks=[timer],
+        verbose=0
+    )
+
+    # The first epoch pays for graph tracing; report steady-state numbers after it
+    steady_steps = timer.step_times[len(timer.step_times) // epochs:] if epochs > 1 else timer.step_times
+    batch1 = measure_latency(trainer.model, batch_size=1)
+    batch32 = measure_latency(trainer.model, batch_size=32)
+
+    return {
+        'parameters': int(trainer.model.count_params()),
+        'build_sec': build_seconds,
+        'first_epoch_sec': timer.epoch_times[0],
+        'epoch_sec': float(np.median(timer.epoch_times[1:] or timer.epoch_times)),
+        'step_p50_ms': float(np.percentile(steady_steps, 50) * 1000),
+        'step_p95_ms': float(np.percentile(steady_steps, 95) * 1000),
+        'inference_batch1_p50_ms': batch1['p50_ms'],
+        'inference_batch32_p50_ms': batch32['p50_ms'],
+        'inference_images_per_sec': batch32['images_per_sec'],
+        **peak_rss_mb()
+    }
+
+
+def run_isolated(function, *args):
+    """Run one benchmark phase in a fresh process so peak RSS and TF state are its own"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(function, *args).result()
+
+
+def host_info():
+    import tensorflow as tf
+
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'tensorflow': tf.__version__
+    }
+
+
+def run_benchmarks(args):
+    bench_dir = Path(args.bench_dir)
+    create_synthetic_dataset(bench_dir, args.images_per_class)
+
+    # Organized tree, pixel cache and shards are rebuilt each run so "cold" timings stay cold
+    shutil.rmtree(bench_dir / 'cache', ignore_errors=True)
+
+    results = {}
+    for output_format in ('files', 'shards'):
+        print(f"🗂️  Organizer: {output_format}")
+        results[f'organizer_{output_format}'] = run_isolated(run_organizer_phase, bench_dir, output_format)
+
+    for loader in LOADERS:
+        print(f"📂 Loader: {loader}")
+        results[f'loader_{loader}'] = run_isolated(run_loader_phase, bench_dir, loader)
+
+    print("📂 Loader: streaming")
+    results['loader_streaming'] = run_isolated(run_streaming_phase, bench_dir)
+
+    for backbone in args.backbones:
+        print(f"🤖 Backbone: {backbone}")
+        results[f'train_{backbone}'] = run_isolated(run_backbone_phase, bench_dir, backbone, args.epochs)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'host': run_isolated(host_info),
+        'config': {
+            'images_per_class': args.images_per_class,
+            'images': args.images_per_class * len(FRUITS) * len(QUALITIES),
+            'epochs': args.epochs,
+            'backbones': args.backbones
+        },
+        'results': results
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_results(results)
+    print(f"\n✅ Benchmark results saved to: {output}")
+    return report
+
+
+def print_results(results):
+    print("\n📊 Benchmark results:")
+    for phase, metrics in results.items():
+        print(f"   {phase}:")
+        for metric, value in metrics.items():
+            print(f"     {metric}: {value:.2f}" if isinstance(value, float) else f"     {metric}: {value}")
+
+
+def compare_reports(baseline, current, threshold):
+    """Return (regressions, improvements) as (phase, metric, old, new, relative change) tuples
+
+    Relative change is signed so that positive always means worse.
+    """
+    regressions = []
+    improvements = []
+
+    for phase, metrics in current['results'].items():
+        for metric, new in metrics.items():
+            old = baseline['results'].get(phase, {}).get(metric)
+            if not isinstance(new, (int, float)) or not isinstance(old, (int, float)) or old == 0:
+                continue
+            if metric in ('images', 'parameters'):
+                continue
+
+            change = (new - old) / abs(old)
+            if metric.endswith(HIGHER_IS_BETTER):
+                change = -change
+
+            if change > threshold:
+                regressions.append((phase, metric, old, new, change))
+            elif change < -threshold:
+                improvements.append((phase, metric, old, new, change))
+
+    return regressions, improvements
+
+
+def compare_files(baseline_path, current_path, threshold):
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    with open(current_path, 'r') as f:
+        current = json.load(f)
+
+    if baseline['config'] != current['config']:
+        print(f"⚠️  Benchmark configs differ: {baseline['config']} vs {current['config']}")
+    if baseline['host'] != current['host']:
+        print("⚠️  Results come from different hosts; timings may not be comparable")
+
+    regressions, improvements = compare_reports(baseline, current, threshold)
+
+    print(f"\n🔍 Comparing {current_path} against {baseline_path} (threshold {threshold:.0%})")
+    for title, rows in (("🐢 Regressions", regressions), ("🚀 Improvements", improvements)):
+        if rows:
+            print(f"{title}:")
+            for phase, metric, old, new, change in rows:
+                print(f"   {phase}.{metric}: {old:.2f} -> {new:.2f} ({abs(change):.0%} "
+                      f"{'worse' if change > 0 else 'better'})")
+
+    if regressions:
+        print(f"❌ {len(regressions)} metrics regressed beyond {threshold:.0%}")
+        return False
+
+    print("✅ No regressions beyond threshold")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the FruitAI training pipeline')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Run the benchmarks and write a JSON results file')
+    run.add_argument('--output',
+                     help='Where to write the results (default: benchmarks/training-baseline.json, '
+                          'or benchmarks/training-current.json with --compare)')
+    run.add_argument('--bench-dir', default=str(reserved_dir('benchmark')),
+                     help='Working directory for the synthetic dataset, cache and shards')
+    run.add_argument('--images-per-class', type=int, default=50,
+                     help='Synthetic images per fruit/quality combination')
+    run.add_argument('--epochs', type=int, default=2,
+                     help='Training epochs per backbone (epochs after the first are reported)')
+    run.add_argument('--backbones', nargs='+', choices=sorted(BACKBONES), default=sorted(BACKBONES))
+    run.add_argument('--compare', metavar='BASELINE',
+                     help='Compare the new results against this baseline afterwards')
+    run.add_argument('--threshold', type=float, default=0.10,
+                     help='Relative change counted as a regression (default 0.10 = 10%%)')
+
+    compare = commands.add_parser('compare', help='Compare a results file against a baseline')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.10,
+                         help='Relative change counted as a regression (default 0.10 = 10%%)')
+
+    args = parser.parse_args()
+
+    print("⏱️  FruitAI Training Benchmark")
+    print("============================")
+
+    if args.command == 'run':
+        if args.output is None:
+            args.output = 'benchmarks/training-current.json' if args.compare else 'benchmarks/training-baseline.json'
+        if args.compare and Path(args.output).resolve() == Path(args.compare).resolve():
+            parser.error('--output must not overwrite the baseline passed to --compare')
+        run_benchmarks(args)
+        if args.compare:
+            return 0 if compare_files(args.compare, args.output, args.threshold) else 1
+        return 0
+
+    return 0 if compare_files(args.baseline, args.current, args.threshold) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
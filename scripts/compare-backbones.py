@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Compare registry backbones by measured deployment cost
+Trains every backbone under the same split, epochs and compute budget, then
+records test accuracy, parameter count, exported size and CPU inference
+latency at batch 1 and 32, and marks the accuracy/latency/size Pareto front
+"""
+
+import os
+import json
+import time
+import argparse
+import platform
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from backbones import BACKBONES
+from trainer_registry import TRAINERS, trainer_class
+from data_layout import reserved_dir
+
+# Pareto objectives: True where a larger value is better
+OBJECTIVES = {
+    'test_accuracy': True,
+    'batch1_p50_ms': False,
+    'batch32_p50_ms': False,
+    'keras_bytes': False,
+}
+
+
+def directory_size(path):
+    return sum(file.stat().st_size for file in Path(path).rglob('*') if file.is_file())
+
+
+def save_tfjs(model, path):
+    """Export to TF.js and return its size in bytes, or None when tensorflowjs is not installed"""
+    try:
+        import tensorflowjs as tfjs
+    except ImportError:
+        return None
+
+    tfjs.converters.save_keras_model(model, str(path))
+    return directory_size(path)
+
+
+def train_backbone(backbone, config):
+    """Train one backbone under the shared budget, export it and measure it"""
+    import tensorflow as tf
+    from fine_tuning import ComputeBudget
+    from inference_latency import measure_latency
+
+    if config['threads']:
+        tf.config.threading.set_intra_op_parallelism_threads(config['threads'])
+
+    trainer = trainer_class(config['trainer'])(
+        backbone=backbone,
+        use_cache=config['cache'],
+        shard_dir=config['shards'],
+        decode_workers=config['decode_workers'],
+        autotuned=False
+    )
+    output_dir = Path(config['output_dir'])
+    trainer.model_dir = output_dir / backbone
+    trainer.checkpoint_dir = output_dir / 'checkpoints' / backbone
+    trainer.epochs = config['epochs']
+
+    trainer.load_dataset()
+    trainer.create_model()
+    trainer.load_splits()
+
+    budget = ComputeBudget(config['max_minutes'], config['max_steps'])
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    history = trainer.model.fit(
+        trainer.split_data('train', shuffle=True),
+        validation_data=trainer.split_data('val'),
+        epochs=trainer.epochs,
+        callbacks=trainer.training_callbacks() + [budget],
+        verbose=2
+    )
+    train_seconds = time.perf_counter() - wall_start
+    cpu_minutes = (time.process_time() - cpu_start) / 60
+
+    metric = trainer.monitor[len('val_'):]
+    test = trainer.model.evaluate(trainer.split_data('test'), verbose=0, return_dict=True)
+
+    # Measure what would be deployed: the fixed-size inference model
+    export = trainer.export_model()
+    trainer.model_dir.mkdir(parents=True, exist_ok=True)
+    keras_path = trainer.model_dir / 'model.keras'
+    export.save(keras_path)
+    tfjs_bytes = save_tfjs(export, trainer.model_dir / 'tfjs')
+
+    batch1 = measure_latency(export, batch_size=1)
+    batch32 = measure_latency(export, batch_size=32)
+
+    return {
+        'backbone': backbone,
+        'val_accuracy': float(max(history.history[trainer.monitor])),
+        'test_accuracy': float(test[metric]),
+        'parameters': int(export.count_params()),
+        'backbone_parameters': int(trainer.base_model.count_params()),
+        'keras_bytes': keras_path.stat().st_size,
+        'tfjs_bytes': tfjs_bytes,
+        'epochs_run': len(history.epoch),
+        'steps': budget.steps,
+        'stopped_by_budget': budget.exhausted(),
+        'train_seconds': train_seconds,
+        'cpu_minutes': cpu_minutes,
+        'batch1_p50_ms': batch1['p50_ms'],
+        'batch1_p95_ms': batch1['p95_ms'],
+        'batch32_p50_ms': batch32['p50_ms'],
+        'batch32_p95_ms': batch32['p95_ms'],
+        'batch32_images_per_sec': batch32['images_per_sec']
+    }
+
+
+def run_isolated(function, *args):
+    """Train in a fresh process so every backbone starts from the same clean TF runtime"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(function, *args).result()
+
+
+def dominates(a, b):
+    """True when a is at least as good as b on every objective and better on one"""
+    at_least_as_good = all(
+        a[name] >= b[name] if higher else a[name] <= b[name] for name, higher in OBJECTIVES.items()
+    )
+    return at_least_as_good and any(a[name] != b[name] for name in OBJECTIVES)
+
+
+def mark_pareto_front(rows):
+    for row in rows:
+        row['pareto'] = not any(dominates(other, row) for other in rows if other is not row)
+    return rows
+
+
+def format_bytes(size):
+    return f"{size / 1024 / 1024:.1f} MB" if size is not None else '-'
+
+
+def print_report(rows):
+    print("\n📊 Backbone comparison (sorted by batch-1 latency, * = Pareto front):")
+    print(f"   {'backbone':<18} {'test acc':>8} {'params':>10} {'keras':>9} {'tfjs':>9} "
+          f"{'b1 p50':>9} {'b32 p50':>9} {'train':>7}")
+    for row in sorted(rows, key=lambda row: row['batch1_p50_ms']):
+        print(f" {'*' if row['pareto'] else ' '} {row['backbone']:<18} {row['test_accuracy']:>8.2%} "
+              f"{row['parameters']:>10,} {format_bytes(row['keras_bytes']):>9} {format_bytes(row['tfjs_bytes']):>9} "
+              f"{row['batch1_p50_ms']:>6.1f} ms {row['batch32_p50_ms']:>6.0f} ms {row['train_seconds']:>6.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train registry backbones under one budget and compare their cost')
+    parser.add_argument('--trainer', choices=sorted(TRAINERS), default='real',
+                        help='Trainer whose head and labels every backbone is trained with')
+    parser.add_argument('--backbones', nargs='+', choices=sorted(BACKBONES), default=list(BACKBONES))
+    parser.add_argument('--epochs', type=int, default=5,
+                        help='Frozen-backbone training epochs per backbone')
+    parser.add_argument('--max-minutes', type=float,
+                        help='Wall-clock training budget per backbone')
+    parser.add_argument('--max-steps', type=int,
+                        help='Training step budget per backbone')
+    parser.add_argument('--threads', type=int, default=0,
+                        help='Intra-op threads for training and latency measurement (0 = TF default)')
+    loading = parser.add_mutually_exclusive_group()
+    loading.add_argument('--cache', action='store_true',
+                         help='Load resized uint8 pixels from the memory-mapped preprocessing cache')
+    loading.add_argument('--shards', metavar='DIR',
+                         help='Read images from shard files written by organize-datasets.py --format shards')
+    parser.add_argument('--decode-workers', type=int, default=0,
+                        help='Processes used to decode JPEGs (0 = all cores)')
+    parser.add_argument('--output-dir', default=str(reserved_dir('backbones')),
+                        help='Where exported models and report.json are written')
+    args = parser.parse_args()
+
+    print("🍎 FruitAI Backbone Comparison")
+    print("=============================")
+
+    data_dir = Path(args.shards or reserved_dir('organized'))
+    if not data_dir.exists():
+        print("❌ Dataset not found!")
+        print("   Please run: python3 scripts/download-fresh-rotten-dataset.py")
+        return
+
+    output_dir = Path(args.output_dir)
+    config = {
+        'trainer': args.trainer,
+        'epochs': args.epochs,
+        'max_minutes': args.max_minutes,
+        'max_steps': args.max_steps,
+        'threads': args.threads,
+        'cache': args.cache,
+        'shards': args.shards,
+        'decode_workers': args.decode_workers,
+        'output_dir': str(output_dir)
+    }
+
+    rows = []
+    for backbone in args.backbones:
+        print(f"\n🤖 Backbone: {backbone}")
+        try:
+            rows.append(run_isolated(train_backbone, backbone, config))
+        except Exception as e:
+            print(f"❌ {backbone} failed: {e}")
+
+    if not rows:
+        print("❌ No backbone finished")
+        return
+
+    mark_pareto_front(rows)
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'host': {
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {name: value for name, value in config.items() if name != 'output_dir'},
+        'objectives': {name: 'max' if higher else 'min' for name, higher in OBJECTIVES.items()},
+        'results': rows,
+        'pareto_front': [row['backbone'] for row in rows if row['pareto']]
+    }
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / 'report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_report(rows)
+    print(f"\n✅ Report saved to: {output_dir / 'report.json'}")
+
+
+if __name__ == "__main__":
+    main()
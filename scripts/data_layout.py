@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Layout of real-training-data/ for the FruitAI scripts
+Downloaded datasets and tool outputs share this folder; every output
+directory is registered here so organize-datasets.py never scans one as a
+dataset. Tools get their directory through reserved_dir() instead of a literal
+"""
+
+from pathlib import Path
+
+DATA_DIR = Path('real-training-data')
+
+# Tool output directories under DATA_DIR and what writes them
+RESERVED_DIRS = {
+    'organized': 'organize-datasets.py (image files)',
+    'shards': 'organize-datasets.py --format shards',
+    'cache': 'image_cache.py preprocessed pixels',
+    'features': 'backbone embeddings and teacher logits',
+    'checkpoints': 'resumable training state',
+    'benchmark': 'benchmark-training.py',
+    'sweeps': 'sweep-hyperparameters.py',
+    'backbones': 'compare-backbones.py',
+    'autotune': 'autotune-training.py',
+    'tfjs-variants': 'export-tfjs.py',
+}
+
+
+def reserved_dir(name):
+    """DATA_DIR/name for a registered output directory"""
+    if name not in RESERVED_DIRS:
+        raise ValueError(f"{name} is not a registered output directory; add it to RESERVED_DIRS in data_layout.py")
+    return DATA_DIR / name
+
+
+def dataset_folders(data_dir=DATA_DIR):
+    """Folders under data_dir holding downloaded datasets (everything except tool outputs)"""
+    return sorted(d for d in Path(data_dir).iterdir() if d.is_dir() and d.name not in RESERVED_DIRS)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Sharded binary container for organized training images
+Packs encoded JPEGs into large shard files with a random-access index
+"""
+
+import json
+import hashlib
+from pathlib import Path
+
+INDEX_NAME = 'index.json'
+SHARD_PATTERN = 'shard-{:05d}.bin'
+
+
+class ShardWriter:
+    """Append encoded images to fixed-size shard files and record their offsets
+
+    Index layout (index.json):
+        shards   list of shard file names
+        records  one entry per image: shard, offset, length, sha256, quality, fruit, source, name
+    """
+
+    def __init__(self, output_dir, shard_size=256 * 1024 * 1024):
+        self.output_dir = Path(output_dir)
+        self.shard_size = shard_size
+        self.shards = []
+        self.records = []
+        self.current = None
+        self.current_size = 0
+
+        # Start from an empty directory so stale shards never mix with new ones
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for old_shard in self.output_dir.glob('shard-*.bin'):
+            old_shard.unlink()
+        (self.output_dir / INDEX_NAME).unlink(missing_ok=True)
+
+    def open_next_shard(self):
+        if self.current is not None:
+            self.current.close()
+
+        name = SHARD_PATTERN.format(len(self.shards))
+        self.current = open(self.output_dir / name, 'wb')
+        self.current_size = 0
+        self.shards.append(name)
+
+    def add(self, data, quality, fruit, source, name):
+        """Append one encoded image and return its record index"""
+        if self.current is None or self.current_size + len(data) > self.shard_size:
+            self.open_next_shard()
+
+        self.records.append({
+            'shard': len(self.shards) - 1,
+            'offset': self.current_size,
+            'length': len(data),
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'quality': quality,
+            'fruit': fruit,
+            'source': source,
+            'name': name
+        })
+        self.current.write(data)
+        self.current_size += len(data)
+
+        return len(self.records) - 1
+
+    def close(self):
+        """Flush the last shard and write the index"""
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+        with open(self.output_dir / INDEX_NAME, 'w') as f:
+            json.dump({'shards': self.shards, 'records': self.records}, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ShardReader:
+    """Read images back from a shard directory, sequentially or by record index"""
+
+    def __init__(self, shard_dir, buffer_size=64 * 1024 * 1024):
+        self.shard_dir = Path(shard_dir)
+        self.buffer_size = buffer_size
+
+        index_path = self.shard_dir / INDEX_NAME
+        if not index_path.exists():
+            raise FileNotFoundError(f"Shard index not found in {self.shard_dir}. "
+                                    "Run organize-datasets.py --format shards first.")
+
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+
+        self.shards = index['shards']
+        self.records = index['records']
+        self.handles = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def record_key(record):
+        """Sample identity matching the organized/<quality>/<fruit>/<name> file layout"""
+        return f"{record['quality']}/{record['fruit']}/{record['name']}"
+
+    def read(self, index):
+        """Seek to and return the encoded bytes of a single record"""
+        record = self.records[index]
+        handle = self.handles.get(record['shard'])
+        if handle is None:
+            handle = open(self.shard_dir / self.shards[record['shard']], 'rb')
+            self.handles[record['shard']] = handle
+
+        handle.seek(record['offset'])
+        return handle.read(record['length'])
+
+    def content_hash(self, index):
+        """sha256 of a record's encoded bytes (read back for indexes written without it)"""
+        record = self.records[index]
+        if 'sha256' in record:
+            return record['sha256']
+        return hashlib.sha256(self.read(index)).hexdigest()
+
+    def iter_bytes(self):
+        """Yield the encoded bytes of every record in index order
+
+        The writer appends records contiguously, so index order is storage
+        order and a large read buffer turns this into a few big sequential
+        reads per shard.
+        """
+        shard_id = None
+        f = None
+        try:
+            for record in self.records:
+                if record['shard'] != shard_id:
+                    if f is not None:
+                        f.close()
+                    shard_id = record['shard']
+                    f = open(self.shard_dir / self.shards[shard_id], 'rb', buffering=self.buffer_size)
+
+                # Seeking inside the read buffer does not touch the file
+                f.seek(record['offset'])
+                yield f.read(record['length'])
+        finally:
+            if f is not None:
+                f.close()
+
+    def close(self):
+        for handle in self.handles.values():
+            handle.close()
+        self.handles = {}
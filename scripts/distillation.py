@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Knowledge distillation for the FruitAI lightweight models
+The teacher's logits are computed once per image and teacher version and
+cached by content hash; the student learns from a mix of the hard labels
+and the teacher's temperature-softened predictions
+"""
+
+import numpy as np
+import tensorflow as tf
+from embedding_store import EmbeddingStore, remove_stale_versions
+from model_fingerprint import weights_fingerprint
+
+
+def logits_from_probabilities(probabilities, epsilon=1e-7):
+    """Invert the teacher's sigmoid so predictions can be softened with a temperature"""
+    probabilities = np.clip(np.asarray(probabilities, dtype=np.float32), epsilon, 1 - epsilon)
+    return np.log(probabilities) - np.log1p(-probabilities)
+
+
+def cache_teacher_logits(cache_dir, teacher_name, teacher, hashes, predict):
+    """Teacher logits aligned with hashes, predicting only images not cached for this teacher
+
+    predict(indices) returns the teacher's sigmoid outputs for hashes[indices].
+    Rows live in an EmbeddingStore of width 1 under teacher-<name>-<weights hash>;
+    stores left by earlier weights of the same teacher are deleted.
+    """
+    backbone, version = f'teacher-{teacher_name}', weights_fingerprint(teacher)
+    remove_stale_versions(cache_dir, backbone, version)
+    store = EmbeddingStore(cache_dir, backbone, version)
+    logits = store.sync(hashes, lambda indices: logits_from_probabilities(predict(indices)).reshape(-1, 1))
+    return logits[:, 0]
+
+
+def distillation_targets(labels, teacher_logits):
+    """Pack hard labels and teacher logits into one (N, 2) target array for fit()"""
+    return np.stack([np.asarray(labels, dtype=np.float32), np.asarray(teacher_logits, dtype=np.float32)], axis=1)
+
+
+def distillation_loss(temperature=4.0, alpha=0.3):
+    """Binary distillation loss on student logits
+
+    alpha * BCE(label, sigmoid(z)) + (1 - alpha) * T^2 * BCE(sigmoid(t / T), sigmoid(z / T))
+    where z are the student's logits and t the teacher's. The T^2 factor keeps
+    the soft term's gradients on the same scale as the hard term's.
+    """
+    def loss(y_true, y_pred):
+        labels = y_true[:, :1]
+        soft_labels = tf.sigmoid(y_true[:, 1:] / temperature)
+
+        hard = tf.nn.sigmoid_cross_entropy_with_logits(labels=labels, logits=y_pred)
+        soft = tf.nn.sigmoid_cross_entropy_with_logits(labels=soft_labels, logits=y_pred / temperature)
+        return tf.reduce_mean(alpha * hard + (1 - alpha) * temperature ** 2 * soft, axis=-1)
+
+    loss.__name__ = 'distillation_loss'
+    return loss
+
+
+def hard_label_accuracy(y_true, y_pred):
+    """Accuracy of student logits against the hard-label column of distillation targets"""
+    predictions = tf.cast(y_pred > 0, tf.float32)
+    return tf.reduce_mean(tf.cast(tf.equal(predictions, y_true[:, :1]), tf.float32), axis=-1)
+
+
+def teacher_agreement(teacher_logits, student_probabilities):
+    """Fraction of samples where student and teacher predict the same class"""
+    return float(np.mean((np.asarray(teacher_logits) > 0) == (np.asarray(student_probabilities).reshape(-1) > 0.5)))
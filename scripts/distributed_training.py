@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Multi-worker CPU data-parallel training for the FruitAI training scripts
+Builds a MultiWorkerMirroredStrategy from a list of worker addresses and
+shards tf.data inputs across workers; only the chief writes artifacts
+"""
+
+import os
+import json
+import tensorflow as tf
+
+
+def parse_workers(text):
+    """'node1:2222,node2:2222' -> ['node1:2222', 'node2:2222']"""
+    return [address.strip() for address in text.split(',') if address.strip()]
+
+
+def set_tf_config(workers, task_index):
+    """Describe the cluster and this process's place in it, as the strategy reads it from TF_CONFIG"""
+    if not 0 <= task_index < len(workers):
+        raise ValueError(f"Task index {task_index} is outside the {len(workers)} configured workers")
+
+    os.environ['TF_CONFIG'] = json.dumps({
+        'cluster': {'worker': workers},
+        'task': {'type': 'worker', 'index': task_index}
+    })
+
+
+def make_multi_worker_strategy(workers, task_index):
+    """Join the cluster; blocks until every worker has started
+
+    Must run before any other TensorFlow op in the process. Gradients are
+    all-reduced over gRPC with ring collectives, which is what CPU-only
+    workers support.
+    """
+    set_tf_config(workers, task_index)
+    options = tf.distribute.experimental.CommunicationOptions(
+        implementation=tf.distribute.experimental.CommunicationImplementation.RING
+    )
+    return tf.distribute.MultiWorkerMirroredStrategy(communication_options=options)
+
+
+def is_chief(strategy):
+    """True for the worker that writes checkpoints, reports and exported models (worker 0)"""
+    if strategy is None:
+        return True
+
+    resolver = strategy.cluster_resolver
+    if resolver.task_type == 'chief':
+        return True
+    has_chief = 'chief' in resolver.cluster_spec().as_dict()
+    return resolver.task_type == 'worker' and resolver.task_id == 0 and not has_chief
+
+
+def shard_across_workers(dataset):
+    """Let every worker read a disjoint 1/N of each epoch's batches
+
+    The index-based pipelines have no input files to split, so sharding is
+    by data: every worker builds the same (identically seeded) pipeline and
+    keeps its own share of the batches.
+    """
+    options = tf.data.Options()
+    options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.DATA
+    return dataset.with_options(options)
+
@@ -5,6 +5,7 @@ Uses a publicly available dataset without requiring Kaggle API
 """
 
 import os
+import zlib
 import urllib.request
 import zipfile
 import shutil
@@ -44,7 +45,8 @@ class SimpleDatasetDownloader:
         
     def generate_realistic_fruit_image(self, fruit, quality, seed):
         """Generate more realistic fruit images with proper characteristics"""
-        np.random.seed(hash(f"{fruit}_{quality}_{seed}") % 2**32)
+        # crc32 rather than hash(): str hashes are salted per process, which made images non-reproducible
+        np.random.seed(zlib.crc32(f"{fruit}_{quality}_{seed}".encode()))
         
         size = (224, 224)
         img = np.zeros((*size, 3), dtype=np.uint8)
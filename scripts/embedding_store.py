@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Incremental frozen-backbone embedding store for the FruitAI training scripts
+Embeddings are keyed by image content hash and backbone name/version, so after
+a data drop only new or changed images go through the backbone
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from pathlib import Path
+from dataset_shards import ShardReader
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentHasher:
+    """Content hashes of image files, memoized by path, size and mtime
+
+    Unchanged files are never re-read, so hashing a large tree after a
+    small data drop only touches the new files.
+    """
+
+    def __init__(self, memo_path):
+        self.memo_path = Path(memo_path)
+
+    def load_memo(self):
+        if not self.memo_path.exists():
+            return {}
+        with open(self.memo_path, 'r') as f:
+            return json.load(f)
+
+    def save_memo(self, memo):
+        self.memo_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.memo_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(memo, f)
+        os.replace(tmp_path, self.memo_path)
+
+    def hash_files(self, paths):
+        """Return the content hash of every path, in order"""
+        memo = self.load_memo()
+        hashes = []
+        hashed = 0
+
+        for path in paths:
+            key = os.path.abspath(path)
+            stat = os.stat(path)
+            entry = memo.get(key)
+            if entry is None or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+                entry = [stat.st_size, stat.st_mtime_ns, hash_file(path)]
+                memo[key] = entry
+                hashed += 1
+            hashes.append(entry[2])
+
+        if hashed:
+            print(f"🔑 Hashed {hashed} new or changed files")
+            self.save_memo(memo)
+        return hashes
+
+
+def shard_content_hashes(shard_dir, sample_keys):
+    """Content hashes of sharded samples, from the shard index when it records them"""
+    reader = ShardReader(shard_dir)
+    records = {reader.record_key(record): i for i, record in enumerate(reader.records)}
+    try:
+        return [reader.content_hash(records[key]) for key in sample_keys]
+    finally:
+        reader.close()
+
+
+class EmbeddingStore:
+    """Memory-mapped embeddings of one backbone version (and augmentation view)
+
+    Layout of <cache_dir>/<backbone>-<version>/<clean|view-N>/:
+        embeddings.f32  raw (capacity, dim) float32 rows
+        index.json      content hash -> row, free rows, dim and capacity
+
+    Rows of images that disappear are freed and reused by later additions,
+    so the file only grows when the dataset does. The index is replaced
+    atomically and freed rows are committed before they are overwritten, so
+    an interrupted update never maps a hash to the wrong embedding.
+    """
+
+    def __init__(self, cache_dir, backbone, version, view=None):
+        self.backbone = backbone
+        self.version = version
+        self.view = view
+        self.store_dir = Path(cache_dir) / f'{backbone}-{version}' / ('clean' if view is None else f'view-{view}')
+        self.embeddings_path = self.store_dir / 'embeddings.f32'
+        self.index_path = self.store_dir / 'index.json'
+        self.hasher = ContentHasher(Path(cache_dir) / 'content-hashes.json')
+        self.index = self.read_index()
+
+    def read_index(self):
+        if self.index_path.exists() and self.embeddings_path.exists():
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if (index.get('backbone'), index.get('version')) == (self.backbone, self.version):
+                return index
+
+        return {
+            'backbone': self.backbone,
+            'version': self.version,
+            'view': self.view,
+            'dim': None,
+            'capacity': 0,
+            'rows': {},
+            'free': []
+        }
+
+    def write_index(self):
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def open_embeddings(self, mode='r'):
+        return np.memmap(self.embeddings_path, dtype=np.float32, mode=mode,
+                         shape=(self.index['capacity'], self.index['dim']))
+
+    def __len__(self):
+        return len(self.index['rows'])
+
+    def __contains__(self, content_hash):
+        return content_hash in self.index['rows']
+
+    def lookup(self, hashes):
+        """Return a (len(hashes), dim) float32 matrix aligned with hashes"""
+        missing = sum(1 for content_hash in hashes if content_hash not in self.index['rows'])
+        if missing:
+            raise KeyError(f"{missing} images have no {self.backbone}-{self.version} embedding yet")
+
+        rows = np.array([self.index['rows'][content_hash] for content_hash in hashes], dtype=np.int64)
+        if not len(rows):
+            return np.zeros((0, self.index['dim'] or 0), dtype=np.float32)
+
+        # Gather in row order so the memory map is read front to back
+        order = np.argsort(rows, kind='stable')
+        matrix = np.empty((len(rows), self.index['dim']), dtype=np.float32)
+        matrix[order] = self.open_embeddings()[rows[order]]
+        return matrix
+
+    def lookup_files(self, paths):
+        """Return the embedding matrix aligned with a list of image files"""
+        return self.lookup(self.hasher.hash_files(paths))
+
+    def remove(self, hashes):
+        """Free the rows of these hashes (committed by the next write_index)"""
+        for content_hash in hashes:
+            row = self.index['rows'].pop(content_hash, None)
+            if row is not None:
+                self.index['free'].append(row)
+
+    def add(self, hashes, embeddings):
+        """Write embeddings for new hashes into free rows, growing the file if needed"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not len(hashes):
+            return
+
+        if self.index['dim'] is None:
+            self.index['dim'] = int(embeddings.shape[1])
+        elif embeddings.shape[1] != self.index['dim']:
+            raise ValueError(f"Embedding size {embeddings.shape[1]} does not match store size {self.index['dim']}")
+
+        free = sorted(self.index['free'])
+        capacity = self.index['capacity']
+        grow = max(len(hashes) - len(free), 0)
+        rows = free[:len(hashes)] + list(range(capacity, capacity + grow))
+
+        if grow or not self.embeddings_path.exists():
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            self.index['capacity'] = capacity + grow
+            with open(self.embeddings_path, 'ab') as f:
+                f.truncate(self.index['capacity'] * self.index['dim'] * 4)
+
+        stored = self.open_embeddings('r+')
+        stored[rows] = embeddings
+        stored.flush()
+        del stored
+
+        self.index['free'] = free[len(hashes):]
+        for content_hash, row in zip(hashes, rows):
+            self.index['rows'][content_hash] = row
+        self.write_index()
+
+    def compact(self):
+        """Rewrite the store without free rows"""
+        live = sorted(self.index['rows'].items(), key=lambda item: item[1])
+        hashes = [content_hash for content_hash, _ in live]
+        embeddings = self.lookup(hashes)
+
+        # Drop the index first: its rows stop matching once the file is replaced
+        self.index_path.unlink(missing_ok=True)
+        tmp_path = self.embeddings_path.with_suffix('.tmp')
+        embeddings.tofile(tmp_path)
+        os.replace(tmp_path, self.embeddings_path)
+
+        self.index['capacity'] = len(hashes)
+        self.index['free'] = []
+        self.index['rows'] = {content_hash: row for row, content_hash in enumerate(hashes)}
+        self.write_index()
+
+    def sync(self, hashes, extract):
+        """Make the store hold exactly these images and return their aligned embeddings
+
+        extract(indices) must return the embeddings of hashes[indices]; it is
+        only called for images the store has not seen before.
+        """
+        wanted = set(hashes)
+        stale = [content_hash for content_hash in self.index['rows'] if content_hash not in wanted]
+        if stale:
+            self.remove(stale)
+            self.write_index()
+
+        first_seen = {}
+        for i, content_hash in enumerate(hashes):
+            if content_hash not in self.index['rows']:
+                first_seen.setdefault(content_hash, i)
+
+        name = f"{self.backbone}-{self.version}" + (f" view {self.view}" if self.view is not None else '')
+        print(f"🧠 {name} embeddings: {len(wanted) - len(first_seen)} reused, "
+              f"{len(first_seen)} to extract, {len(stale)} dropped")
+
+        if first_seen:
+            indices = np.array(sorted(first_seen.values()), dtype=np.int64)
+            self.add([hashes[i] for i in indices], extract(indices))
+
+        if len(self.index['free']) > len(self.index['rows']):
+            self.compact()
+
+        return self.lookup(hashes)
+
+
+def remove_stale_versions(cache_dir, backbone, version):
+    """Delete the stores of other versions of this backbone and return their directory names
+
+    Each retrain or warm start under a new weights hash would otherwise leave
+    the previous store behind. A directory is only removed when its index
+    records this backbone, so names that merely share the prefix are kept.
+    """
+    current = f'{backbone}-{version}'
+    removed = []
+    for version_dir in sorted(Path(cache_dir).glob(f'{backbone}-*')):
+        if version_dir.name == current or not version_dir.is_dir():
+            continue
+        backbones = set()
+        for index_path in version_dir.glob('*/index.json'):
+            try:
+                with open(index_path, 'r') as f:
+                    backbones.add(json.load(f).get('backbone'))
+            except (OSError, ValueError):
+                backbones.add(None)
+        if backbones == {backbone}:
+            shutil.rmtree(version_dir)
+            removed.append(version_dir.name)
+    if removed:
+        print(f"🧹 Removed {len(removed)} outdated {backbone} stores: {', '.join(removed)}")
+    return removed
+
+
+def load_embedding_views(cache_dir, backbone, version, hashes, extract, views=0):
+    """Return (embeddings, augmented) aligned with hashes, extracting only what is missing
+
+    extract(indices, None) returns clean embeddings and extract(indices, v)
+    those of augmented view v. augmented is (views, N, dim), or None.
+    Stores of earlier versions of this backbone are deleted first.
+    """
+    remove_stale_versions(cache_dir, backbone, version)
+    embeddings = EmbeddingStore(cache_dir, backbone, version).sync(
+        hashes, lambda indices: extract(indices, None)
+    )
+
+    augmented = None
+    if views:
+        augmented = np.stack([
+            EmbeddingStore(cache_dir, backbone, version, view=view).sync(
+                hashes, lambda indices, view=view: extract(indices, view)
+            )
+            for view in range(views)
+        ])
+
+    return embeddings, augmented
+
+
+def stack_training_views(embeddings, augmented, indices):
+    """Rows for training: the clean embeddings of indices followed by each augmented view"""
+    views = [embeddings[indices]]
+    if augmented is not None:
+        views.extend(view[indices] for view in augmented)
+    return np.concatenate(views), len(views)
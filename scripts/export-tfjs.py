@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compare TF.js export variants of a trained FruitAI model
+Exports float32, float16 and uint8 weight variants with content-hashed
+shards, then reports download size, load time and inference latency of
+each (loaded back through the Python TF.js loader) and how far their
+outputs drift from the Keras model
+"""
+
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+from data_layout import reserved_dir
+
+
+def output_drift(reference, candidate, pixels):
+    """Largest absolute difference between the two models' outputs on the same pixels"""
+    import tensorflow as tf
+
+    expected = tf.nest.flatten(reference.predict_on_batch(pixels))
+    actual = tf.nest.flatten(candidate.predict_on_batch(pixels))
+    return float(max(np.max(np.abs(np.asarray(a) - np.asarray(b))) for a, b in zip(expected, actual)))
+
+
+def main():
+    from tfjs_export import QUANTIZATION, DEFAULT_SHARD_BYTES
+
+    parser = argparse.ArgumentParser(description='Export and compare quantized TF.js variants of a model')
+    parser.add_argument('--model', default='public/models/fruitai-real-model.keras',
+                        help='Keras model to export (saved by the trainers)')
+    parser.add_argument('--variants', nargs='+', choices=list(QUANTIZATION), default=list(QUANTIZATION))
+    parser.add_argument('--shard-mb', type=float, default=DEFAULT_SHARD_BYTES / 1024 / 1024,
+                        help='Weight shard size in MB')
+    parser.add_argument('--output-dir', default=str(reserved_dir('tfjs-variants')),
+                        help='Where the variants and report.json are written')
+    args = parser.parse_args()
+
+    print("🍎 FruitAI TF.js Export Comparison")
+    print("==================================")
+
+    from tensorflow import keras
+    from tfjs_export import export_tfjs, measure_tfjs_load
+    from inference_latency import measure_latency
+
+    model_path = Path(args.model)
+    if not model_path.exists():
+        print(f"❌ Model not found: {model_path}")
+        print("   Train one first: python3 scripts/train-real-model.py")
+        return
+
+    model = keras.models.load_model(model_path, compile=False)
+    output_dir = Path(args.output_dir)
+    shard_bytes = int(args.shard_mb * 1024 * 1024)
+
+    # Fixed pixels, so every variant's drift is measured on the same inputs
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (16, *model.input_shape[1:])).astype(np.float32)
+
+    rows = []
+    for variant in args.variants:
+        print(f"\n📦 {variant}")
+        export = export_tfjs(model, output_dir / variant, variant, shard_bytes)
+        loaded, load_ms = measure_tfjs_load(output_dir / variant)
+        latency = measure_latency(loaded, batch_size=1)
+        rows.append({
+            **export,
+            'load_ms': load_ms,
+            'batch1_p50_ms': latency['p50_ms'],
+            'batch1_p95_ms': latency['p95_ms'],
+            'max_output_drift': output_drift(model, loaded, pixels)
+        })
+        print(f"   {export['bytes'] / 1024 / 1024:.2f} MB in {export['shards']} shards, "
+              f"load {load_ms:.0f} ms, batch-1 p50 {latency['p50_ms']:.1f} ms")
+
+    baseline = next((row for row in rows if row['quantization'] == 'float32'), rows[0])
+    for row in rows:
+        row['size_ratio'] = row['bytes'] / baseline['bytes']
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'model': str(model_path),
+        'shard_bytes': shard_bytes,
+        'note': 'Load time is the Python TF.js loader (parse model.json, read shards, dequantize, build the model)',
+        'variants': rows
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / 'report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n📊 TF.js variants:")
+    print(f"   {'variant':<9} {'size':>10} {'vs f32':>7} {'shards':>6} {'load':>9} {'b1 p50':>9} {'drift':>9}")
+    for row in rows:
+        print(f"   {row['quantization']:<9} {row['bytes'] / 1024 / 1024:>7.2f} MB {row['size_ratio']:>6.0%} "
+              f"{row['shards']:>6} {row['load_ms']:>6.0f} ms {row['batch1_p50_ms']:>6.1f} ms {row['max_output_drift']:>9.5f}")
+    print(f"\n✅ Report saved to: {output_dir / 'report.json'}")
+    print("   Export the chosen variant with train-real-model.py --tfjs-quantization <variant>")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Staged backbone fine-tuning for the FruitAI training scripts
+Unfreezes the backbone top-down in blocks with a decaying learning rate,
+stops on a wall-clock or step budget and reports accuracy gained per CPU-minute
+"""
+
+import re
+import time
+from tensorflow import keras
+from tensorflow.keras import layers
+
+
+def layer_block(name):
+    """Architectural block a backbone layer belongs to, from its keras.applications name
+
+    block6a_expand_conv -> block6a (EfficientNet), conv5_block3_2_conv ->
+    conv5_block3 (ResNet), expanded_conv_3/expand -> expanded_conv_3
+    (MobileNetV3), top_conv -> top.
+    """
+    match = re.match(r'expanded_conv(_\d+)?', name)
+    if match:
+        return match.group(0)
+
+    parts = name.split('_')
+    for i, part in enumerate(parts):
+        if part.startswith('block'):
+            return '_'.join(parts[:i + 1])
+    return parts[0]
+
+
+def unfreeze_stages(backbone, fine_tune_at, blocks_per_stage):
+    """Group backbone.layers[fine_tune_at:] into blocks and return stages, top block first"""
+    blocks = []
+    for layer in backbone.layers[fine_tune_at:]:
+        # Weightless layers (auto-named activations, adds, multiplies) stay with the block they follow
+        if layer.weights or not blocks:
+            block = layer_block(layer.name)
+        else:
+            block = blocks[-1][0]
+        if not blocks or blocks[-1][0] != block:
+            blocks.append((block, []))
+        blocks[-1][1].append(layer)
+
+    blocks.reverse()
+    return [blocks[i:i + blocks_per_stage] for i in range(0, len(blocks), blocks_per_stage)]
+
+
+class ComputeBudget(keras.callbacks.Callback):
+    """Stop training once a wall-clock or step budget shared across fit() calls is spent"""
+
+    def __init__(self, max_minutes=None, max_steps=None):
+        super().__init__()
+        self.deadline = time.time() + max_minutes * 60 if max_minutes else None
+        self.max_steps = max_steps
+        self.steps = 0
+
+    def exhausted(self):
+        if self.deadline is not None and time.time() >= self.deadline:
+            return True
+        return self.max_steps is not None and self.steps >= self.max_steps
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.steps += 1
+        if self.exhausted():
+            self.model.stop_training = True
+
+
+class StagedFineTuner:
+    """Unfreeze a frozen backbone from the top down, one stage of blocks at a time
+
+    Each stage makes the next blocks above fine_tune_at trainable (BatchNorm
+    stays frozen), recompiles with the learning rate decayed once more and
+    trains for a few epochs. Validation accuracy is measured after every
+    stage, and the weights of the best stage are kept. Wall-clock and CPU
+    time are tracked, and the report gives the accuracy gained per CPU-minute.
+    """
+
+    def __init__(self, model, backbone, compile_model, metric, fine_tune_at,
+                 base_learning_rate, learning_rate_decay=0.5, blocks_per_stage=2,
+                 epochs_per_stage=2, max_minutes=None, max_steps=None, make_checkpoint=None, telemetry=None):
+        self.model = model
+        self.backbone = backbone
+        self.compile_model = compile_model
+        self.metric = metric
+        self.fine_tune_at = fine_tune_at
+        self.base_learning_rate = base_learning_rate
+        self.learning_rate_decay = learning_rate_decay
+        self.blocks_per_stage = blocks_per_stage
+        self.epochs_per_stage = epochs_per_stage
+        self.budget = ComputeBudget(max_minutes, max_steps)
+        self.budget_config = {'max_minutes': max_minutes, 'max_steps': max_steps}
+
+        # make_checkpoint(phase) returns a TrainingCheckpoint so stages survive preemption
+        self.make_checkpoint = make_checkpoint
+        # Optional TrainingTelemetry timing the steps of every stage
+        self.telemetry = telemetry
+
+    def evaluate(self, val_data):
+        return float(self.model.evaluate(val_data, verbose=0, return_dict=True)[self.metric])
+
+    def freeze_backbone(self):
+        self.backbone.trainable = True
+        for layer in self.backbone.layers:
+            layer.trainable = False
+
+    def run(self, train_data, val_data):
+        """Run the stages until all blocks are unfrozen or the budget is spent; return the report"""
+        stages = unfreeze_stages(self.backbone, self.fine_tune_at, self.blocks_per_stage)
+        self.freeze_backbone()
+
+        baseline = self.evaluate(val_data)
+        best_accuracy = baseline
+        best_weights = self.model.get_weights()
+        print(f"🔧 Staged fine-tuning: {len(stages)} stages above layer {self.fine_tune_at}, "
+              f"baseline val {self.metric} {baseline:.4f}")
+
+        report = {
+            'metric': f'val_{self.metric}',
+            'fine_tune_at': self.fine_tune_at,
+            'budget': self.budget_config,
+            'baseline': baseline,
+            'stages': [],
+            'stopped_by': 'completed'
+        }
+        wall_start = time.time()
+        cpu_start = time.process_time()
+
+        for stage, blocks in enumerate(stages, start=1):
+            if self.budget.exhausted():
+                break
+
+            for _, block_layers in blocks:
+                for layer in block_layers:
+                    # Fine-tuning BatchNorm statistics on a small dataset hurts more than it helps
+                    layer.trainable = not isinstance(layer, layers.BatchNormalization)
+
+            learning_rate = self.base_learning_rate * self.learning_rate_decay ** (stage - 1)
+            self.compile_model(self.model, learning_rate=learning_rate)
+
+            stage_wall = time.time()
+            stage_cpu = time.process_time()
+            steps_before = self.budget.steps
+
+            callbacks = [self.budget]
+            initial_epoch = 0
+            if self.make_checkpoint is not None:
+                checkpoint = self.make_checkpoint(f'fine_tune_stage{stage}')
+                initial_epoch = checkpoint.restore(self.model, self.epochs_per_stage)
+                checkpoint.track_data(train_data)
+                callbacks.append(checkpoint)
+
+            stage_data = train_data
+            if self.telemetry is not None:
+                stage_data = self.telemetry.instrument(train_data, phase=f'fine_tune_stage{stage}')
+                callbacks.append(self.telemetry)
+
+            self.model.fit(
+                stage_data,
+                epochs=self.epochs_per_stage,
+                initial_epoch=initial_epoch,
+                callbacks=callbacks,
+                verbose=1
+            )
+
+            accuracy = self.evaluate(val_data)
+            cpu_minutes = (time.process_time() - stage_cpu) / 60
+            gain = accuracy - best_accuracy
+
+            report['stages'].append({
+                'stage': stage,
+                'blocks': [name for name, _ in blocks],
+                'trainable_weights': len(self.model.trainable_weights),
+                'learning_rate': learning_rate,
+                'steps': self.budget.steps - steps_before,
+                'wall_minutes': (time.time() - stage_wall) / 60,
+                'cpu_minutes': cpu_minutes,
+                'accuracy': accuracy,
+                'gain': gain,
+                'gain_per_cpu_minute': gain / cpu_minutes if cpu_minutes > 0 else 0.0
+            })
+            print(f"   Stage {stage} ({', '.join(name for name, _ in blocks)}): "
+                  f"val {self.metric} {accuracy:.4f} ({gain:+.4f}) in {cpu_minutes:.1f} CPU-min")
+
+            if accuracy > best_accuracy:
+                best_accuracy = accuracy
+                best_weights = self.model.get_weights()
+
+        if self.budget.exhausted():
+            report['stopped_by'] = 'budget'
+
+        # Keep the best stage; a later stage that overfits is rolled back
+        self.model.set_weights(best_weights)
+
+        cpu_minutes = (time.process_time() - cpu_start) / 60
+        report.update({
+            'best': best_accuracy,
+            'gain': best_accuracy - baseline,
+            'steps': self.budget.steps,
+            'wall_minutes': (time.time() - wall_start) / 60,
+            'cpu_minutes': cpu_minutes,
+            'gain_per_cpu_minute': (best_accuracy - baseline) / cpu_minutes if cpu_minutes > 0 else 0.0
+        })
+
+        print(f"✅ Fine-tuning: val {self.metric} {baseline:.4f} -> {best_accuracy:.4f} "
+              f"in {cpu_minutes:.1f} CPU-min ({report['gain_per_cpu_minute'] * 100:+.2f} points per CPU-minute, "
+              f"stopped: {report['stopped_by']})")
+        return report
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Inference with saved FruitAI freshness models
+Loads any of the exported models (multi-task real-data model, accurate
+model or the simple model) and turns their outputs into per-image
+freshness probability and fruit class
+"""
+
+import json
+import base64
+import binascii
+import numpy as np
+from pathlib import Path
+from tensorflow import keras
+from model_fingerprint import weights_fingerprint
+
+# Metadata files the trainers write next to their models
+METADATA_NAMES = ('model-info.json', 'model-metadata.json')
+
+# Used when a model was saved with a variable input size
+DEFAULT_IMG_SIZE = (224, 224)
+
+
+def decode_data_url(text):
+    """Encoded image bytes from a base64 data URL (or bare base64), as the analyze routes accept"""
+    if text.startswith('data:'):
+        header, _, text = text.partition(',')
+        if ';base64' not in header:
+            raise ValueError('Image data URL is not base64-encoded')
+    try:
+        return base64.b64decode(text, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f'Invalid base64 image data: {e}')
+
+
+def read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class FreshnessPredictor:
+    """A saved freshness model plus what is needed to read its outputs
+
+    Multi-task models output (freshness softmax, fruit_type softmax) and
+    are decoded with the encoders.json saved beside them; single-output
+    models give the sigmoid probability of 'fresh' directly.
+    """
+
+    def __init__(self, model_path, encoders_path=None):
+        self.model_path = Path(model_path)
+        self.model = keras.models.load_model(self.model_path, compile=False)
+
+        input_size = tuple(self.model.input_shape[1:3])
+        self.img_size = input_size if None not in input_size else DEFAULT_IMG_SIZE
+
+        self.multi_task = len(self.model.outputs) > 1
+        self.quality_classes = ['fresh', 'rotten']
+        self.fruit_classes = None
+        encoders_path = Path(encoders_path) if encoders_path else self.model_path.parent / 'encoders.json'
+        if self.multi_task and encoders_path.exists():
+            encoders = read_json(encoders_path)
+            self.quality_classes = encoders['quality_classes']
+            self.fruit_classes = encoders['fruit_classes']
+
+        self.version = self.model_version()
+
+    def model_version(self):
+        """'<metadata version>-<weights hash>', so results can be traced to the exact weights"""
+        version = 'unversioned'
+        for name in METADATA_NAMES:
+            path = self.model_path.parent / name
+            if path.exists():
+                version = read_json(path).get('version', version)
+                break
+        return f'{version}-{weights_fingerprint(self.model)}'
+
+    def predict(self, pixels):
+        """Results for a uint8 (N, H, W, 3) batch at img_size"""
+        return self.results(self.model.predict_on_batch(np.asarray(pixels, dtype=np.float32)))
+
+    def results(self, outputs):
+        """Per-image results from this model's outputs (a list, or a dict keyed by output name)"""
+        if not self.multi_task:
+            if isinstance(outputs, dict):
+                outputs, = outputs.values()
+            freshness = np.asarray(outputs).reshape(-1)
+            return [{'freshness': float(p), 'fruit': None, 'fruit_confidence': None} for p in freshness]
+
+        quality, fruit = (outputs[name] for name in ('freshness', 'fruit_type')) if isinstance(outputs, dict) else outputs
+        quality, fruit = np.asarray(quality), np.asarray(fruit)
+        freshness = quality[:, self.quality_classes.index('fresh')]
+        fruit_index = fruit.argmax(axis=1)
+
+        return [
+            {
+                'freshness': float(freshness[i]),
+                'fruit': self.fruit_classes[fruit_index[i]] if self.fruit_classes else int(fruit_index[i]),
+                'fruit_confidence': float(fruit[i, fruit_index[i]])
+            }
+            for i in range(len(quality))
+        ]
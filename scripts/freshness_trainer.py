@@ -0,0 +1,650 @@
+#!/usr/bin/env python3
+"""
+Shared training engine for the FruitAI freshness trainers
+Loads the dataset, builds a frozen registry backbone under a task-specific
+head and runs training, head-only training and staged fine-tuning.
+Subclasses define the labels, the head, the losses and how models are saved.
+"""
+
+import json
+import tempfile
+import contextlib
+import numpy as np
+from pathlib import Path
+from collections import Counter
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+from training_data import (
+    list_organized_images, sample_key, load_split_manifest, IndexedBatchSequence,
+    make_indexed_dataset, make_image_dataset
+)
+from image_cache import PreprocessedImageCache
+from image_decoding import load_image_array
+from dataset_shards import ShardReader
+from backbones import create_backbone, fine_tune_layer, BACKBONES
+from backbone_preprocessing import backbone_preprocessing
+from fine_tuning import StagedFineTuner, unfreeze_stages
+from progressive_resizing import progressive_phases, fit_progressive, progressive_time_report, fixed_input_model
+from training_checkpoints import (
+    TrainingCheckpoint, snapshot_split_manifest, restore_split_manifest, saved_split_manifest
+)
+from distributed_training import make_multi_worker_strategy, is_chief, shard_across_workers
+from data_layout import reserved_dir
+from host_tuning import load_tuned_config, tuning_key, configure_threads
+from training_telemetry import TrainingTelemetry
+from warm_start import load_previous_model, transfer_weights
+from pruning import prune_structured, prunable_kernels, GradualMagnitudePruning, kernel_sparsity, saved_sizes
+from inference_latency import measure_latency
+from model_fingerprint import weights_fingerprint
+from embedding_store import ContentHasher, shard_content_hashes, load_embedding_views, stack_training_views
+
+
+def map_targets(function, targets):
+    """Apply function to a label array or to every array of a multi-output label dict"""
+    if isinstance(targets, dict):
+        return {name: function(values) for name, values in targets.items()}
+    return function(targets)
+
+
+class FreshnessTrainer:
+    """Backbone-agnostic trainer; subclasses fill in the task
+
+    Subclasses set batch_size, epochs, head_config, augmenter, checkpoint_dir,
+    monitor (validation metric), lr_factor/lr_patience, best_model_name,
+    report_prefix, model_name and the fine-tuning learning rate and epochs,
+    and implement encode_labels, targets, compile_model, build_head and
+    report_results.
+    """
+
+    def __init__(self, backbone, streaming=False, use_cache=False, decode_workers=1, decode_chunksize=64,
+                 shard_dir=None, pipeline_augmentation=False, feature_views=0, resume=False,
+                 progressive_sizes=None, workers=None, task_index=0, autotuned=True, telemetry_dir=None):
+        if backbone not in BACKBONES:
+            raise ValueError(f"Unknown backbone: {backbone} (available: {', '.join(sorted(BACKBONES))})")
+
+        # Batch size, thread pools and pipeline parallelism measured fastest on this host by
+        # autotune-training.py; thread pools have to be sized before TensorFlow starts them
+        self.tuned_config = load_tuned_config(tuning_key(type(self).__name__, backbone)) if autotuned else None
+        if self.tuned_config:
+            print(f"⚙️  Using autotuned settings for this host: {self.tuned_config}")
+            configure_threads(self.tuned_config.get('intra_op_threads'), self.tuned_config.get('inter_op_threads'))
+        self.pipeline_parallelism = self.tuned('pipeline_parallelism', tf.data.AUTOTUNE)
+
+        # Data-parallel training across these worker addresses (this process is workers[task_index]);
+        # the strategy has to exist before any other TensorFlow op runs
+        self.strategy = make_multi_worker_strategy(workers, task_index) if workers else None
+        self.is_chief = is_chief(self.strategy)
+
+        self.base_dir = reserved_dir('organized')
+        self.model_dir = Path('public/models')
+        self.img_size = (224, 224)  # Standard size for transfer learning
+        self.learning_rate = 0.001
+        self.lr_scale = 1.0
+
+        # keras.applications backbone from the registry in backbones.py
+        self.backbone = backbone
+
+        # Train early epochs at these smaller sizes (e.g. [128, 160]); export stays at img_size
+        self.progressive_sizes = progressive_sizes
+
+        # Stream images from disk with tf.data instead of loading them all into RAM
+        self.streaming = streaming
+
+        # Map preprocessed uint8 pixels from the persistent cache instead of decoding JPEGs
+        self.use_cache = use_cache
+
+        # Read packed shard files written by organize-datasets.py --format shards
+        self.shard_dir = Path(shard_dir) if shard_dir else None
+
+        # Process pool used to decode JPEGs (0 = all cores) and images per task
+        self.decode_workers = decode_workers
+        self.decode_chunksize = decode_chunksize
+
+        # Augment in a parallel tf.data stage so the saved model is a pure inference graph
+        self.pipeline_augmentation = pipeline_augmentation
+
+        # Frozen-backbone embeddings (plus this many augmented views) for head-only training,
+        # stored per image content hash so only new or changed images are embedded
+        self.feature_dir = reserved_dir('features')
+        self.feature_views = feature_views
+
+        # Periodic checkpoints of the full training state; resume continues from the latest
+        self.resume = resume
+
+        # Epoch cap when continuing from the previous production model instead of ImageNet weights
+        self.warm_start_epochs = 10
+
+        # Per-step input wait/compute timings, timeline and bottleneck summary written here
+        self.telemetry = TrainingTelemetry(telemetry_dir) if telemetry_dir else None
+
+    def tuned(self, name, default):
+        """A setting autotuned for this host, or the trainer's default"""
+        return (self.tuned_config or {}).get(name, default)
+
+    def tuned_batch_size(self, default):
+        """The autotuned batch size, with learning rates scaled linearly when it differs from default
+
+        Autotuning picks the fastest batch size, which changes training
+        dynamics; self.lr_scale is also applied by subclasses to their
+        fine-tuning rate. The override is printed on every run.
+        """
+        batch_size = self.tuned('batch_size', default)
+        if batch_size != default:
+            self.lr_scale = batch_size / default
+            self.learning_rate *= self.lr_scale
+            print(f"⚙️  Autotuned batch size {batch_size} replaces the default {default}; "
+                  f"learning rates scaled x{self.lr_scale:g}")
+        return batch_size
+
+    def load_dataset(self):
+        """Load and preprocess the organized dataset"""
+        if self.streaming:
+            return self.load_dataset_index()
+        if self.use_cache:
+            return self.load_cached_dataset()
+        if self.shard_dir:
+            return self.load_sharded_dataset()
+
+        print("📂 Loading dataset...")
+
+        # List images from organized structure
+        image_paths, quality_labels, fruit_labels = list_organized_images(self.base_dir)
+
+        for (quality, fruit), count in sorted(Counter(zip(quality_labels, fruit_labels)).items()):
+            print(f"     {quality}/{fruit}: {count} images")
+
+        # Decode (in parallel when decode_workers != 1); pixels stay uint8, the model normalizes
+        self.images, kept = load_image_array(
+            image_paths, self.img_size, self.decode_workers, self.decode_chunksize
+        )
+
+        self.set_labels(
+            [quality_labels[i] for i in kept],
+            [fruit_labels[i] for i in kept],
+            [sample_key(image_paths[i], self.base_dir) for i in kept]
+        )
+
+        print(f"✅ Dataset loaded: {self.dataset_size} images {self.images.shape[1:]} ({self.images.dtype})")
+        self.describe_labels()
+
+    def load_cached_dataset(self):
+        """Map the preprocessed uint8 pixel cache, decoding only new or changed files"""
+        print("📂 Loading dataset from pixel cache...")
+
+        cache = PreprocessedImageCache(
+            self.base_dir, self.img_size,
+            workers=self.decode_workers, chunksize=self.decode_chunksize
+        )
+        # Only the chief builds the shared cache; other workers wait for it
+        self.images, quality_labels, fruit_labels = cache.load(build=self.is_chief)
+        self.set_labels(quality_labels, fruit_labels, cache.keys)
+
+        print(f"✅ Dataset loaded: {self.dataset_size} images {self.images.shape[1:]} ({self.images.dtype})")
+        self.describe_labels()
+
+    def load_sharded_dataset(self):
+        """Decode images read sequentially from packed shard files"""
+        print(f"📂 Loading dataset from shards: {self.shard_dir}")
+
+        reader = ShardReader(self.shard_dir)
+        self.images, kept = load_image_array(
+            reader.iter_bytes(), self.img_size, self.decode_workers, self.decode_chunksize,
+            count=len(reader)
+        )
+
+        records = [reader.records[i] for i in kept]
+        self.set_labels(
+            [record['quality'] for record in records],
+            [record['fruit'] for record in records],
+            [reader.record_key(record) for record in records]
+        )
+
+        print(f"✅ Dataset loaded: {self.dataset_size} images from {len(reader.shards)} shards")
+        self.describe_labels()
+
+    def load_dataset_index(self):
+        """List image files and labels only; pixels are decoded lazily during training"""
+        print("📂 Indexing dataset for streaming...")
+
+        image_paths, quality_labels, fruit_labels = list_organized_images(self.base_dir)
+
+        self.image_paths = np.array(image_paths)
+        self.set_labels(
+            quality_labels, fruit_labels,
+            [sample_key(path, self.base_dir) for path in image_paths]
+        )
+
+        print(f"✅ Dataset indexed: {self.dataset_size} images")
+        self.describe_labels()
+
+    def set_labels(self, quality_labels, fruit_labels, sample_keys):
+        """Encode per-sample labels and remember sample identities for the split manifest"""
+        self.encode_labels(quality_labels, fruit_labels)
+
+        self.dataset_size = len(sample_keys)
+        self.sample_keys = list(sample_keys)
+        self.sample_qualities = list(quality_labels)
+
+    def encode_labels(self, quality_labels, fruit_labels):
+        raise NotImplementedError
+
+    def describe_labels(self):
+        """Print a summary of the encoded labels"""
+
+    def targets(self):
+        """Training labels of every sample: one array, or a dict per model output"""
+        raise NotImplementedError
+
+    def load_splits(self):
+        """Load the persisted stratified split shared by both trainers"""
+        manifest_path = (self.shard_dir or self.base_dir) / 'splits.json'
+        if self.resume and self.is_chief:
+            restore_split_manifest(self.checkpoint_dir, manifest_path)
+        elif self.resume:
+            # Other workers read the run's own copy instead of racing the chief's restore
+            manifest_path = saved_split_manifest(self.checkpoint_dir) or manifest_path
+        self.splits = load_split_manifest(manifest_path, self.sample_keys, self.sample_qualities, write=self.is_chief)
+        if self.is_chief:
+            snapshot_split_manifest(manifest_path, self.checkpoint_dir)
+        return self.splits
+
+    def make_checkpoint(self, phase, callbacks=()):
+        """Checkpoint callback for one training phase (restores counters of the given callbacks)"""
+        return TrainingCheckpoint(self.checkpoint_dir / phase, callbacks, resume=self.resume, chief=self.is_chief)
+
+    def strategy_scope(self):
+        """Scope that variables must be created in when training on several workers"""
+        return self.strategy.scope() if self.strategy else contextlib.nullcontext()
+
+    def split_data(self, split, shuffle=False, batch_size=None, img_size=None):
+        """Feed one split by index so no pixel data is ever duplicated"""
+        indices = self.splits[split]
+        labels = self.targets()
+        batch_size = batch_size or self.batch_size
+        augment = self.augmenter if self.pipeline_augmentation and split == 'train' else None
+        img_size = tuple(img_size or self.img_size)
+
+        if self.strategy:
+            # batch_size is per worker; the strategy splits each global batch between the workers
+            batch_size *= self.strategy.num_replicas_in_sync
+
+        if self.streaming:
+            # Decode, batch and prefetch lazily so memory stays bounded
+            dataset = make_image_dataset(
+                self.image_paths[indices], map_targets(lambda values: values[indices], labels),
+                img_size, batch_size, shuffle=shuffle, augment=augment,
+                parallel_calls=self.pipeline_parallelism
+            )
+        elif augment is not None or img_size != self.img_size or self.strategy:
+            dataset = make_indexed_dataset(
+                self.images, labels, indices, batch_size, shuffle=shuffle, augment=augment,
+                img_size=img_size, parallel_calls=self.pipeline_parallelism
+            )
+        else:
+            return IndexedBatchSequence(self.images, labels, indices, batch_size, shuffle=shuffle)
+
+        return shard_across_workers(dataset) if self.strategy else dataset
+
+    def sample_data(self, indices, augment=None):
+        """Feed the given samples in order (used for embedding extraction)"""
+        labels = self.targets()
+        if self.streaming:
+            return make_image_dataset(
+                self.image_paths[indices], map_targets(lambda values: values[indices], labels),
+                self.img_size, self.batch_size, augment=augment, parallel_calls=self.pipeline_parallelism
+            )
+        if augment is not None:
+            return make_indexed_dataset(
+                self.images, labels, indices, self.batch_size, augment=augment,
+                parallel_calls=self.pipeline_parallelism
+            )
+        return IndexedBatchSequence(self.images, labels, indices, self.batch_size)
+
+    def compile_model(self, model, learning_rate):
+        raise NotImplementedError
+
+    def build_head(self):
+        """Create the head layers once and return a function that applies them to pooled features
+
+        Applying the same layers to the backbone output and to a plain embedding
+        input lets the head be trained on cached embeddings and reused as-is in
+        the full model.
+        """
+        raise NotImplementedError
+
+    def create_model(self):
+        """Build the frozen backbone with the task head, plus the embedding extractor and head model"""
+        print(f"🤖 Creating {self.backbone} model...")
+
+        with self.strategy_scope():
+            self.build_models()
+
+        print("✅ Model created")
+        self.model.summary()
+
+    def build_models(self):
+        """Create the full model, the embedding extractor and the head model sharing its layers"""
+        # Progressive resizing trains on several sizes, so the training graph takes any size
+        input_size = (None, None) if self.progressive_sizes else self.img_size
+
+        # Freeze the backbone initially; fine_tune_model unfreezes it in stages
+        self.base_model = create_backbone(self.backbone, (*input_size, 3))
+        self.base_model.trainable = False
+
+        # Build the model (takes raw 0-255 RGB pixels)
+        inputs = keras.Input(shape=(*input_size, 3))
+
+        # Data augmentation (moved into the input pipeline with --pipeline-augmentation)
+        augmented = inputs if self.pipeline_augmentation else self.augmenter(inputs)
+
+        # Backbone-specific normalization happens in-graph
+        preprocessed = backbone_preprocessing(augmented, self.backbone)
+
+        features = self.base_model(preprocessed, training=False)
+        pooling = layers.GlobalAveragePooling2D()
+        head = self.build_head()
+
+        self.model = keras.Model(inputs, head(pooling(features)), name=self.model_name)
+        self.compile_model(self.model, learning_rate=self.learning_rate)
+
+        # Frozen backbone -> pooled embedding, used to fill the feature cache
+        extractor_inputs = keras.Input(shape=(*self.img_size, 3))
+        self.feature_extractor = keras.Model(
+            extractor_inputs,
+            pooling(self.base_model(backbone_preprocessing(extractor_inputs, self.backbone), training=False)),
+            name=f'{self.model_name}Features'
+        )
+
+        # The same head layers on embedding input, trained by train_head_on_features
+        embedding_inputs = keras.Input(shape=(self.base_model.output_shape[-1],))
+        self.head_model = keras.Model(embedding_inputs, head(embedding_inputs), name=f'{self.model_name}Head')
+        self.compile_model(self.head_model, learning_rate=self.learning_rate)
+
+    def output_classes(self):
+        """Class names per classification output layer, so warm starts can remap them"""
+        return {}
+
+    def previous_output_classes(self):
+        """Class names per output layer of the previous production model"""
+        return {}
+
+    def warm_start(self):
+        """Continue from the previous production model instead of ImageNet weights and fresh heads
+
+        Backbone (including fine-tuned blocks) and head weights are copied into
+        the new model; output layers gain rows for new classes without touching
+        the known ones. Training is capped at warm_start_epochs.
+        """
+        path = self.model_dir / self.production_model_name
+        previous = load_previous_model(path)
+        if previous is None:
+            print(f"⚠️  No previous model at {path}, starting from ImageNet weights")
+            return None
+
+        print(f"♻️  Warm-starting from {path}")
+        report = transfer_weights(previous, self.model, self.previous_output_classes(), self.output_classes())
+        self.epochs = min(self.epochs, self.warm_start_epochs)
+
+        print(f"   Layers carried over: {len(report['transferred'])}")
+        for name, classes in report['expanded'].items():
+            print(f"   {name}: kept {len(classes['kept'])} classes, added {classes['added'] or 'none'}"
+                  + (f", dropped {classes['dropped']}" if classes['dropped'] else ''))
+        if report['skipped']:
+            print(f"   ⚠️  Reinitialized (shape changed): {', '.join(report['skipped'])}")
+
+        self.write_report('warm-start', {'source': str(path), 'epochs': self.epochs, **report})
+        return report
+
+    def training_phases(self):
+        """(img_size, end_epoch) per training phase; a single full-size phase by default"""
+        return progressive_phases(self.progressive_sizes or [], self.epochs, self.img_size[0])
+
+    def export_model(self):
+        """The model to save: fixed to img_size when it was trained with variable input size"""
+        if self.progressive_sizes:
+            return fixed_input_model(self.model, self.img_size)
+        return self.model
+
+    def training_callbacks(self, best_model_path=None):
+        """Early stopping and LR reduction on the validation metric, optionally saving the best model
+
+        Every worker has to run the save, but only the chief's lands at
+        best_model_path; the others write to a throwaway directory.
+        """
+        callbacks = [
+            keras.callbacks.EarlyStopping(
+                monitor=self.monitor,
+                patience=8,
+                restore_best_weights=True,
+                verbose=1
+            ),
+            keras.callbacks.ReduceLROnPlateau(
+                monitor=self.monitor,
+                factor=self.lr_factor,
+                patience=self.lr_patience,
+                min_lr=1e-7,
+                verbose=1
+            )
+        ]
+        if best_model_path:
+            if not self.is_chief:
+                best_model_path = Path(tempfile.mkdtemp(prefix='best-model-worker-')) / Path(best_model_path).name
+            callbacks.append(keras.callbacks.ModelCheckpoint(
+                str(best_model_path),
+                monitor=self.monitor,
+                save_best_only=True,
+                verbose=1
+            ))
+        return callbacks
+
+    def write_report(self, suffix, report):
+        """Write a JSON report next to the exported model (chief only)"""
+        if not self.is_chief:
+            return
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.model_dir / f'{self.report_prefix}-{suffix}.json', 'w') as f:
+            json.dump(report, f, indent=2)
+
+    def train_model(self):
+        """Train the head on the frozen backbone and return (history, test accuracy)"""
+        print("🚀 Starting model training...")
+
+        # Split data by index (persisted in splits.json next to metadata.json)
+        splits = self.load_splits()
+
+        print(f"📊 Data split:")
+        print(f"   Training: {len(splits['train'])} images")
+        print(f"   Validation: {len(splits['val'])} images")
+        print(f"   Test: {len(splits['test'])} images")
+
+        # Train (in resolution phases with --progressive; resumable with --resume)
+        history, timings = fit_progressive(
+            self.model, self.training_phases(),
+            lambda img_size: self.split_data('train', shuffle=True, img_size=img_size),
+            lambda img_size: self.split_data('val', img_size=img_size),
+            self.training_callbacks(self.model_dir / self.best_model_name), self.make_checkpoint,
+            telemetry=self.telemetry
+        )
+
+        if self.progressive_sizes:
+            self.write_report('progressive', progressive_time_report(timings))
+
+        return history, self.evaluate_test()
+
+    def evaluate_test(self):
+        """Evaluate the full model on the test split and return its accuracy"""
+        print("\n🧪 Evaluating on test set...")
+        results = self.model.evaluate(self.split_data('test'), verbose=1, return_dict=True)
+        return self.report_results(results)
+
+    def report_results(self, results):
+        """Print test metrics and return the accuracy the trainer optimizes"""
+        raise NotImplementedError
+
+    def content_hashes(self):
+        """Content hash of every sample's encoded image, aligned with sample_keys"""
+        if self.shard_dir:
+            return shard_content_hashes(self.shard_dir, self.sample_keys)
+
+        hasher = ContentHasher(self.feature_dir / 'content-hashes.json')
+        return hasher.hash_files([self.base_dir / key for key in self.sample_keys])
+
+    def extract_embeddings(self, indices, view=None):
+        """Run the frozen backbone over some samples (one augmented pass when view is set)"""
+        augment = self.augmenter if view is not None else None
+        return self.feature_extractor.predict(self.sample_data(indices, augment), verbose=0)
+
+    def backbone_version(self):
+        """Feature store version: input size, TF version and a hash of the current backbone weights
+
+        Computed when the store is opened, so embeddings cached from ImageNet
+        weights are never reused after warm_start() loads fine-tuned ones.
+        """
+        return f"{self.img_size[0]}x{self.img_size[1]}-tf{tf.__version__}-{weights_fingerprint(self.feature_extractor)}"
+
+    def load_features(self):
+        """Splits plus clean and augmented embeddings of every sample, embedding only what is new"""
+        splits = self.load_splits()
+        embeddings, augmented = load_embedding_views(
+            self.feature_dir, self.backbone, self.backbone_version(),
+            self.content_hashes(), self.extract_embeddings, self.feature_views
+        )
+        return splits, embeddings, augmented
+
+    def head_targets(self, indices, repeats=1):
+        """Head training targets for the given samples, tiled once per embedding view"""
+        return map_targets(lambda values: np.tile(values[indices], repeats), self.targets())
+
+    def train_head_on_features(self):
+        """Train only the head on cached frozen-backbone embeddings"""
+        print("🚀 Training head on cached backbone embeddings...")
+
+        splits, embeddings, augmented = self.load_features()
+
+        x_train, repeats = stack_training_views(embeddings, augmented, splits['train'])
+
+        print(f"📊 Data split:")
+        print(f"   Training: {len(splits['train'])} images ({len(x_train)} embedding rows)")
+        print(f"   Validation: {len(splits['val'])} images")
+        print(f"   Test: {len(splits['test'])} images")
+
+        history = self.head_model.fit(
+            x_train, self.head_targets(splits['train'], repeats),
+            validation_data=(embeddings[splits['val']], self.head_targets(splits['val'])),
+            epochs=self.epochs,
+            batch_size=self.batch_size,
+            shuffle=True,
+            callbacks=self.training_callbacks(),
+            verbose=2
+        )
+
+        # The head layers are shared, so the full model now carries the trained head
+        if self.is_chief:
+            self.model_dir.mkdir(parents=True, exist_ok=True)
+            self.model.save(str(self.model_dir / self.best_model_name))
+
+        print("\n🧪 Evaluating on test set...")
+        results = self.head_model.evaluate(
+            embeddings[splits['test']], self.head_targets(splits['test']), verbose=0, return_dict=True
+        )
+        return history, self.report_results(results)
+
+    def fine_tune_model(self, max_minutes=None, max_steps=None):
+        """Fine-tune the top backbone blocks in stages within a compute budget"""
+        print("🔧 Fine-tuning model...")
+
+        tuner = StagedFineTuner(
+            self.model, self.base_model, self.compile_model,
+            metric=self.monitor[len('val_'):],
+            fine_tune_at=fine_tune_layer(self.base_model, self.backbone),
+            base_learning_rate=self.fine_tune_learning_rate,
+            blocks_per_stage=BACKBONES[self.backbone]['blocks_per_stage'],
+            epochs_per_stage=self.fine_tune_epochs_per_stage,
+            max_minutes=max_minutes,
+            max_steps=max_steps,
+            make_checkpoint=self.make_checkpoint,
+            telemetry=self.telemetry
+        )
+        report = tuner.run(self.split_data('train', shuffle=True), self.split_data('val'))
+        self.write_report('fine-tune', report)
+
+        return self.evaluate_test()
+
+    def model_footprint(self, path):
+        """Parameter count, saved size and CPU latency of the model as it would be exported"""
+        model = self.export_model()
+        return {
+            'params': int(model.count_params()),
+            **saved_sizes(model, path),
+            'batch1': measure_latency(model, batch_size=1),
+            'batch32': measure_latency(model, batch_size=32)
+        }
+
+    def prune_model(self, structured_ratio=0.5, target_sparsity=0.5, epochs=3, prune_backbone=True):
+        """Shrink the trained model and fine-tune it briefly; returns the before/after report
+
+        The weakest hidden head units (and, with prune_backbone, output
+        channels of the backbone's last convolution) are removed outright, so
+        the rebuilt model has fewer parameters and less compute. The smaller
+        model is then fine-tuned with the top backbone blocks unfrozen while
+        magnitude pruning ramps its trainable kernels to target_sparsity over
+        the first three quarters of the steps. It is saved as
+        <production model>-pruned.keras next to the original.
+        """
+        print("✂️  Pruning model...")
+        splits = self.load_splits()
+        pruned_path = self.model_dir / f'{Path(self.production_model_name).stem}-pruned.keras'
+
+        with tempfile.TemporaryDirectory() as tmp:
+            before = {'test_accuracy': self.evaluate_test(), **self.model_footprint(Path(tmp) / 'original.keras')}
+
+        self.model, widths = prune_structured(self.model, structured_ratio, prune_backbone)
+        self.base_model = self.model.get_layer(self.base_model.name)
+        for name, (original, kept) in widths.items():
+            print(f"   {name}: {original} -> {kept}")
+
+        # Let the top blocks adapt to the narrower layers, as the first fine-tuning stage would
+        self.base_model.trainable = True
+        for layer in self.base_model.layers:
+            layer.trainable = False
+        top_stage = unfreeze_stages(
+            self.base_model, fine_tune_layer(self.base_model, self.backbone), BACKBONES[self.backbone]['blocks_per_stage']
+        )[0]
+        for _, block_layers in top_stage:
+            for layer in block_layers:
+                layer.trainable = not isinstance(layer, layers.BatchNormalization)
+        self.compile_model(self.model, learning_rate=self.fine_tune_learning_rate)
+
+        train_data = self.split_data('train', shuffle=True)
+        kernels = prunable_kernels(self.model)
+        pruning = GradualMagnitudePruning(
+            kernels, target_sparsity,
+            end_step=int(len(splits['train']) / self.batch_size * epochs * 0.75)
+        )
+        print(f"🔧 Fine-tuning for {epochs} epochs, pruning {len(kernels)} kernels to {target_sparsity:.0%} sparsity")
+        self.model.fit(train_data, validation_data=self.split_data('val'), epochs=epochs,
+                       callbacks=[pruning], verbose=1)
+
+        # Masks were re-applied after every step, so the plain model already holds the sparse weights
+        sparsity = kernel_sparsity(kernels)
+        after = {'test_accuracy': self.evaluate_test(), **self.model_footprint(pruned_path)}
+
+        report = {
+            'backbone': self.backbone,
+            'structured_ratio': structured_ratio,
+            'pruned_widths': {name: {'original': original, 'kept': kept} for name, (original, kept) in widths.items()},
+            'target_sparsity': target_sparsity,
+            'kernel_sparsity': sparsity,
+            'fine_tune_epochs': epochs,
+            'output': str(pruned_path),
+            'before': before,
+            'after': after,
+            'params_ratio': after['params'] / before['params'],
+            'bytes_ratio': after['bytes'] / before['bytes'],
+            'gzip_bytes_ratio': after['gzip_bytes'] / before['gzip_bytes'],
+            'batch1_speedup': before['batch1']['p50_ms'] / after['batch1']['p50_ms'],
+            'batch32_speedup': before['batch32']['p50_ms'] / after['batch32']['p50_ms']
+        }
+        self.write_report('pruning', report)
+        return report
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Per-host training configurations found by autotune-training.py
+Identifies the machine by a CPU/memory/TensorFlow fingerprint and stores the
+fastest batch size, thread pool sizes and pipeline parallelism per trainer
+"""
+
+import os
+import json
+import hashlib
+import platform
+from pathlib import Path
+from data_layout import reserved_dir
+
+TUNING_DIR = reserved_dir('autotune')
+
+
+def cpu_model():
+    """CPU model name from /proc/cpuinfo on Linux, else what platform reports"""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def total_memory_gb():
+    try:
+        return round(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024 ** 3)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def host_description():
+    """What makes tuned settings transfer between machines: CPU, cores, memory and TF version"""
+    import tensorflow as tf
+
+    return {
+        'cpu': cpu_model(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'memory_gb': total_memory_gb(),
+        'tensorflow': tf.__version__
+    }
+
+
+def host_fingerprint(description=None):
+    description = description or host_description()
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def tuning_key(trainer_class, backbone):
+    """'FruitFreshnessTrainer', 'efficientnetb0' -> 'FruitFreshnessTrainer/efficientnetb0'"""
+    return f'{trainer_class}/{backbone}'
+
+
+def tuning_path(fingerprint, tuning_dir=TUNING_DIR):
+    return Path(tuning_dir) / f'{fingerprint}.json'
+
+
+def load_tuning(fingerprint=None, tuning_dir=TUNING_DIR):
+    """All tuned configurations of this host, or an empty record"""
+    fingerprint = fingerprint or host_fingerprint()
+    path = tuning_path(fingerprint, tuning_dir)
+    if path.exists():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {'fingerprint': fingerprint, 'host': None, 'configs': {}}
+
+
+def save_tuned_config(key, config, trials, tuning_dir=TUNING_DIR):
+    """Store the winning configuration for one trainer/backbone on this host"""
+    description = host_description()
+    fingerprint = host_fingerprint(description)
+    tuning = load_tuning(fingerprint, tuning_dir)
+    tuning['host'] = description
+    tuning['configs'][key] = {**config, 'trials': trials}
+
+    path = tuning_path(fingerprint, tuning_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(tuning, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_tuned_config(key, tuning_dir=TUNING_DIR):
+    """The tuned configuration for a trainer/backbone on this host, or None"""
+    config = load_tuning(tuning_dir=tuning_dir)['configs'].get(key)
+    if config is None:
+        return None
+    return {name: value for name, value in config.items() if name != 'trials'}
+
+
+def configure_threads(intra_op_threads=None, inter_op_threads=None):
+    """Size TensorFlow's thread pools; must run before the first TensorFlow op"""
+    import tensorflow as tf
+
+    try:
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError as e:
+        print(f"⚠️  Thread pools already started, keeping their sizes: {e}")
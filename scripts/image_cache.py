@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of preprocessed training images
+Stores resized uint8 pixels in a memory-mapped file keyed by a fingerprint of the organized tree
+"""
+
+import os
+import json
+import time
+import hashlib
+import numpy as np
+from pathlib import Path
+from training_data import list_organized_images
+from image_decoding import iter_decoded_images
+
+
+class PreprocessedImageCache:
+    """Memory-mapped uint8 pixel cache shared by the training scripts
+
+    Layout of the cache directory:
+        pixels.u8   raw (N, height, width, 3) uint8 array
+        labels.npz  encoded quality and fruit labels
+        index.json  per-file fingerprint (path, size, mtime) and label classes
+
+    index.json is removed when a rebuild starts and written last, so an
+    interrupted build is never mistaken for a valid cache. Only one process
+    may build; others sharing the directory load with build=False and wait.
+    """
+
+    def __init__(self, base_dir, img_size=(224, 224), cache_dir=None, workers=1, chunksize=64):
+        self.base_dir = Path(base_dir)
+        self.img_size = tuple(img_size)
+        self.workers = workers
+        self.chunksize = chunksize
+        if cache_dir is None:
+            cache_dir = self.base_dir.parent / 'cache' / f'{self.img_size[0]}x{self.img_size[1]}'
+        self.cache_dir = Path(cache_dir)
+
+        self.pixels_path = self.cache_dir / 'pixels.u8'
+        self.labels_path = self.cache_dir / 'labels.npz'
+        self.index_path = self.cache_dir / 'index.json'
+
+    def scan_tree(self):
+        """Fingerprint every organized image by relative path, size and mtime"""
+        paths, qualities, fruits = list_organized_images(self.base_dir)
+
+        entries = []
+        for path, quality, fruit in zip(paths, qualities, fruits):
+            stat = os.stat(path)
+            entries.append({
+                'path': os.path.relpath(path, self.base_dir),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'quality': quality,
+                'fruit': fruit
+            })
+
+        return entries
+
+    @staticmethod
+    def entry_key(entry):
+        return (entry['path'], entry['size'], entry['mtime_ns'])
+
+    def fingerprint(self, entries):
+        """Hash the file keys of the whole tree"""
+        digest = hashlib.sha256()
+        digest.update(f"{self.img_size[0]}x{self.img_size[1]}".encode())
+        for entry in entries:
+            digest.update(json.dumps(self.entry_key(entry)).encode())
+        return digest.hexdigest()
+
+    def read_index(self):
+        if not self.index_path.exists() or not self.pixels_path.exists():
+            return None
+
+        with open(self.index_path, 'r') as f:
+            index = json.load(f)
+
+        if tuple(index.get('img_size', ())) != self.img_size:
+            return None
+        return index
+
+    def open_pixels(self, count, mode='r'):
+        return np.memmap(self.pixels_path, dtype=np.uint8, mode=mode,
+                         shape=(count, *self.img_size, 3))
+
+    def wait_for_build(self, fingerprint, timeout=3600, poll_seconds=1.0):
+        """Wait until another process has written a cache of this tree and return its index"""
+        print(f"⏳ Waiting for the chief to build the pixel cache in {self.cache_dir}...")
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            index = self.read_index()
+            if index is not None and index['fingerprint'] == fingerprint:
+                return index
+            time.sleep(poll_seconds)
+        raise TimeoutError(f"No pixel cache was built in {self.cache_dir} within {timeout:.0f}s")
+
+    def load(self, build=True):
+        """Return (pixels, qualities, fruits), building or refreshing the cache if needed
+
+        pixels is a read-only memory map, so no pixel data is copied into RAM
+        until a batch actually touches it. With build=False (every worker but
+        the chief of a multi-worker run) the cache is never written; a missing
+        or stale one is waited for instead.
+        """
+        entries = self.scan_tree()
+        fingerprint = self.fingerprint(entries)
+        index = self.read_index()
+
+        if index is not None and index['fingerprint'] == fingerprint:
+            print(f"⚡ Using cached pixels: {self.cache_dir} ({index['count']} images)")
+        elif build:
+            index = self.build(entries, fingerprint, index)
+        else:
+            index = self.wait_for_build(fingerprint)
+
+        if index['count']:
+            pixels = self.open_pixels(index['count'])
+        else:
+            pixels = np.zeros((0, *self.img_size, 3), dtype=np.uint8)
+        labels = np.load(self.labels_path)
+
+        self.quality_classes = np.array(index['quality_classes'])
+        self.fruit_classes = np.array(index['fruit_classes'])
+        self.quality_ids = labels['quality']
+        self.fruit_ids = labels['fruit']
+        self.paths = [str(self.base_dir / entry['path']) for entry in index['entries']]
+        self.keys = [Path(entry['path']).as_posix() for entry in index['entries']]
+
+        qualities = self.quality_classes[self.quality_ids]
+        fruits = self.fruit_classes[self.fruit_ids]
+        return pixels, qualities, fruits
+
+    def build(self, entries, fingerprint, previous_index=None):
+        """Write a new cache, reusing rows of unchanged files from the previous one"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Invalidate the old index first: its rows stop matching pixels.u8 once it is replaced
+        self.index_path.unlink(missing_ok=True)
+
+        previous_rows = {}
+        previous_pixels = None
+        if previous_index is not None and previous_index['count']:
+            previous_rows = {
+                self.entry_key(entry): row for row, entry in enumerate(previous_index['entries'])
+            }
+            previous_pixels = self.open_pixels(previous_index['count'])
+
+        to_decode = [
+            str(self.base_dir / entry['path']) for entry in entries
+            if self.entry_key(entry) not in previous_rows
+        ]
+        print(f"🗄️  Building pixel cache: {len(to_decode)} to decode, "
+              f"{len(entries) - len(to_decode)} reused")
+        decoded = iter_decoded_images(to_decode, self.img_size, self.workers, self.chunksize)
+
+        tmp_path = self.pixels_path.with_suffix('.tmp')
+        pixels = np.memmap(tmp_path, dtype=np.uint8, mode='w+',
+                           shape=(max(len(entries), 1), *self.img_size, 3))
+
+        kept = []
+        for entry in entries:
+            row = previous_rows.get(self.entry_key(entry))
+            if row is not None:
+                pixels[len(kept)] = previous_pixels[row]
+            else:
+                image = next(decoded)
+                if image is None:
+                    continue
+                pixels[len(kept)] = image
+            kept.append(entry)
+
+        # Drain the decoder so it reports throughput and releases its pool
+        for _ in decoded:
+            pass
+
+        pixels.flush()
+        del pixels, previous_pixels
+
+        # Drop rows reserved for files that failed to decode
+        os.truncate(tmp_path, len(kept) * self.img_size[0] * self.img_size[1] * 3)
+        os.replace(tmp_path, self.pixels_path)
+
+        quality_classes = sorted({entry['quality'] for entry in kept})
+        fruit_classes = sorted({entry['fruit'] for entry in kept})
+        np.savez(
+            self.labels_path,
+            quality=np.array([quality_classes.index(e['quality']) for e in kept], dtype=np.int32),
+            fruit=np.array([fruit_classes.index(e['fruit']) for e in kept], dtype=np.int32)
+        )
+
+        index = {
+            'img_size': list(self.img_size),
+            'fingerprint': fingerprint,
+            'count': len(kept),
+            'quality_classes': quality_classes,
+            'fruit_classes': fruit_classes,
+            'entries': kept
+        }
+        # Replaced atomically: waiting workers poll this file
+        tmp_index_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_index_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_index_path, self.index_path)
+
+        print(f"✅ Pixel cache ready: {self.cache_dir} ({len(kept)} images)")
+        return index
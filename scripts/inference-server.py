@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Local HTTP inference server for the FruitAI freshness models
+Serves /api/analyze and /api/analyze-batch with the same base64 data URL
+payloads and response shape as the Next.js routes, coalescing concurrent
+requests into micro-batches; /stats reports latency percentiles
+"""
+
+import json
+import time
+import uuid
+import argparse
+import numpy as np
+from pathlib import Path
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from image_decoding import decode_image_file
+from freshness_inference import FreshnessPredictor, decode_data_url
+from micro_batching import MicroBatcher, LatencyTracker
+
+# Freshness score (0-100) bands, matching the scoring guide the remote analyzer uses
+FRESHNESS_BANDS = [
+    (80, 'buy', {
+        'color': 'Vibrant, even color',
+        'texture': 'Firm appearance',
+        'blemishes': 'None visible',
+        'ripeness': 'Peak freshness'
+    }),
+    (70, 'buy', {
+        'color': 'Good color',
+        'texture': 'Mostly firm appearance',
+        'blemishes': 'Minimal imperfections',
+        'ripeness': 'Ready to eat'
+    }),
+    (60, 'check', {
+        'color': 'Fading color',
+        'texture': 'Possible softness',
+        'blemishes': 'Some visible blemishes',
+        'ripeness': 'Past peak, use soon'
+    }),
+    (0, 'avoid', {
+        'color': 'Dull or discolored',
+        'texture': 'Likely soft',
+        'blemishes': 'Spots or signs of rot',
+        'ripeness': 'Overripe or spoiling'
+    }),
+]
+
+# Largest request body accepted (base64 photos from phones are a few MB)
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+
+def analysis_id():
+    return f'analysis_{int(time.time() * 1000)}_{uuid.uuid4().hex[:9]}'
+
+
+def timestamp():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def analysis_result(result, version):
+    """An AnalysisResult (as returned by app/api/analyze) from one model prediction"""
+    freshness = round(result['freshness'] * 100)
+    recommendation, characteristics = next(
+        (recommendation, characteristics) for floor, recommendation, characteristics in FRESHNESS_BANDS
+        if freshness >= floor
+    )
+    item = str(result['fruit']).replace('_', ' ').title() if result['fruit'] is not None else 'Produce'
+    confidence = max(result['freshness'], 1 - result['freshness'])
+    if result['fruit_confidence'] is not None:
+        details = (f"{item} identified with {result['fruit_confidence']:.0%} confidence; "
+                   f"estimated {freshness}% fresh by the local model ({version}).")
+    else:
+        details = f"Estimated {freshness}% fresh by the local model ({version})."
+
+    return {
+        'item': item,
+        'freshness': freshness,
+        'recommendation': recommendation,
+        'details': details,
+        'confidence': round(confidence * 100),
+        'characteristics': dict(characteristics),
+        'timestamp': timestamp(),
+        'analysisId': analysis_id()
+    }
+
+
+def batch_analysis_result(fruits):
+    """The analyze-batch response for the analyzed items (the model scores the whole image as one)"""
+    average = round(sum(fruit['freshness'] for fruit in fruits) / len(fruits))
+    best = max(fruits, key=lambda fruit: fruit['freshness'])
+    worst = min(fruits, key=lambda fruit: fruit['freshness'])
+    advice = {'buy': 'Recommended for purchase.', 'check': 'Inspect carefully before buying.',
+              'avoid': 'Consider avoiding this item.'}
+    if len(fruits) == 1:
+        shopping = f"Item freshness: {average}%. {advice[fruits[0]['recommendation']]}"
+    else:
+        shopping = (f"Found {len(fruits)} items with {average}% average freshness. "
+                    f"Best: {best['item']} ({best['freshness']}%), Worst: {worst['item']} ({worst['freshness']}%).")
+
+    ranking = sorted(fruits, key=lambda fruit: fruit['freshness'], reverse=True)
+    return {
+        'totalFruits': len(fruits),
+        'analyzedFruits': ranking,
+        'bestFruit': best,
+        'worstFruit': worst,
+        'averageFreshness': average,
+        'shoppingRecommendation': shopping,
+        'analysisId': analysis_id(),
+        'timestamp': timestamp(),
+        'ranking': ranking,
+        'categories': {
+            'buyNow': [fruit for fruit in fruits if fruit['recommendation'] == 'buy'],
+            'checkFirst': [fruit for fruit in fruits if fruit['recommendation'] == 'check'],
+            'avoidThese': [fruit for fruit in fruits if fruit['recommendation'] == 'avoid']
+        },
+        'storageAdvice': [{'item': fruit['item'], 'advice': 'Store in cool, dry place'} for fruit in fruits]
+    }
+
+
+class BadRequest(Exception):
+    """A client error answered with 400 and {error, details}"""
+
+    def __init__(self, error, details=None):
+        super().__init__(error)
+        self.error = error
+        self.details = details
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    """Routes requests to the shared predictor, batcher and tracker set on the server"""
+
+    server_version = 'FruitAI-Inference/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/api/health':
+            self.send_json(200, {
+                'status': 'healthy',
+                'timestamp': timestamp(),
+                'service': 'FruitAI Freshness Analyzer (local model)',
+                'model': str(self.server.predictor.model_path),
+                'version': self.server.predictor.version
+            })
+        elif self.path == '/stats':
+            self.send_json(200, {
+                'max_batch_size': self.server.batcher.max_batch_size,
+                'max_wait_ms': self.server.batcher.max_wait * 1000,
+                **self.server.tracker.summary()
+            })
+        else:
+            self.send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self.path not in ('/api/analyze', '/api/analyze-batch'):
+            self.send_json(404, {'error': 'Not found'})
+            return
+
+        tracker = self.server.tracker
+        start = time.perf_counter()
+        try:
+            pixels = self.read_image()
+            decoded = time.perf_counter()
+            result = self.server.batcher.submit(pixels).result()
+        except BadRequest as e:
+            tracker.count('rejected')
+            self.send_json(400, {'error': e.error, **({'details': e.details} if e.details else {})})
+            return
+        except Exception as e:
+            tracker.count('failed')
+            print(f"❌ Analysis error: {e}")
+            self.send_json(500, {'error': 'Analysis failed'})
+            return
+
+        analysis = analysis_result(result, self.server.predictor.version)
+        payload = analysis if self.path == '/api/analyze' else batch_analysis_result([analysis])
+        tracker.count('analyzed')
+        tracker.record(decode_ms=(decoded - start) * 1000, total_ms=(time.perf_counter() - start) * 1000)
+        self.send_json(200, payload)
+
+    def read_image(self):
+        """Decoded uint8 pixels of the {image} body, validated like the Next.js routes"""
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise BadRequest('Image too large', f'Request bodies are limited to {MAX_BODY_BYTES // 1024 // 1024} MB')
+        try:
+            image = json.loads(self.rfile.read(length) or b'{}').get('image')
+        except (ValueError, AttributeError):
+            raise BadRequest('Invalid JSON body')
+
+        if not image:
+            raise BadRequest('No image provided')
+        if not isinstance(image, str) or not (image.startswith('data:image/') or len(image) > 100):
+            raise BadRequest('Invalid image data format', 'Image must be a valid base64 data URL')
+
+        try:
+            return decode_image_file(decode_data_url(image), self.server.predictor.img_size)
+        except Exception as e:
+            raise BadRequest('Invalid image data format', str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a trained freshness model over HTTP with micro-batching')
+    parser.add_argument('--model', default='public/models/fruitai-real-model.keras',
+                        help='Saved model: fruitai-real-model.keras (names the fruit), freshness_model.keras, ...')
+    parser.add_argument('--encoders', help='encoders.json of a multi-task model (default: next to the model)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8500)
+    parser.add_argument('--max-batch-size', type=int, default=16,
+                        help='Most images coalesced into one model call')
+    parser.add_argument('--max-wait-ms', type=float, default=10.0,
+                        help='Longest a request waits for its batch to fill')
+    parser.add_argument('--stats-window', type=int, default=1000,
+                        help='Recent requests the latency percentiles cover')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    print("🍎 FruitAI Inference Server")
+    print("===========================")
+
+    model_path = Path(args.model)
+    if not model_path.exists():
+        print(f"❌ Model not found: {model_path}")
+        print("   Train one first: python3 scripts/train-real-model.py")
+        return
+
+    predictor = FreshnessPredictor(model_path, args.encoders)
+    print(f"🤖 Loaded {model_path} (version {predictor.version})")
+
+    # Build the prediction graph before serving, so the first request does not pay for it
+    predictor.predict(np.zeros((1, *predictor.img_size, 3), dtype=np.uint8))
+
+    tracker = LatencyTracker(args.stats_window)
+    batcher = MicroBatcher(predictor.predict, args.max_batch_size, args.max_wait_ms, tracker).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), AnalysisHandler)
+    server.daemon_threads = True
+    server.predictor, server.batcher, server.tracker = predictor, batcher, tracker
+    server.verbose = args.verbose
+
+    print(f"🚀 Serving on http://{args.host}:{args.port}")
+    print(f"   POST /api/analyze, /api/analyze-batch  {{\"image\": \"data:image/jpeg;base64,...\"}}")
+    print(f"   GET  /api/health, /stats")
+    print(f"   Batches of up to {args.max_batch_size}, waiting at most {args.max_wait_ms:g} ms")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+CPU inference latency measurement for trained FruitAI models
+"""
+
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+
+def measure_latency(model, batch_size=1, runs=50, warmup=5, seed=0):
+    """Time a compiled forward pass on random 0-255 pixels and return percentiles in ms"""
+    shape = model.input_shape[1:]
+    rng = np.random.default_rng(seed)
+    batch = tf.constant(rng.integers(0, 256, (batch_size, *shape)).astype(np.float32))
+
+    forward = tf.function(lambda x: model(x, training=False))
+    for _ in range(warmup):
+        tf.nest.map_structure(lambda t: t.numpy(), forward(batch))
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        tf.nest.map_structure(lambda t: t.numpy(), forward(batch))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings = np.array(timings)
+    return {
+        'batch_size': batch_size,
+        'runs': runs,
+        'mean_ms': float(timings.mean()),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'images_per_sec': float(batch_size * 1000 / timings.mean())
+    }
+
+
+def augmentation_latency_report(model, augmenter, batch_sizes=(1, 32)):
+    """Compare an inference-only model against the same model with augmentation baked in"""
+    inputs = keras.Input(shape=model.input_shape[1:])
+    with_augmentation = keras.Model(inputs, model(augmenter(inputs)), name='with_augmentation')
+
+    report = {'inference_only': [], 'with_augmentation': []}
+    for batch_size in batch_sizes:
+        report['inference_only'].append(measure_latency(model, batch_size))
+        report['with_augmentation'].append(measure_latency(with_augmentation, batch_size))
+
+    print("⏱️  Exported model latency (inference-only vs augmentation baked in):")
+    for pure, baked in zip(report['inference_only'], report['with_augmentation']):
+        print(f"   batch {pure['batch_size']:>3}: {pure['p50_ms']:.1f} ms vs {baked['p50_ms']:.1f} ms "
+              f"(p50, {baked['p50_ms'] - pure['p50_ms']:+.1f} ms)")
+
+    return report
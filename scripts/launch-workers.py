@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Launch a multi-worker training run on one host
+Starts one trainer process per worker over localhost with the shared
+--workers list and its own --task-index, splits the cores between them
+and prefixes their output; if one worker fails the others are stopped
+"""
+
+import os
+import sys
+import socket
+import argparse
+import time
+import threading
+import subprocess
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def free_ports(count):
+    """Ask the OS for ports that are free right now"""
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(('localhost', 0))
+            sockets.append(sock)
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def relay_output(process, prefix):
+    for line in process.stdout:
+        sys.stdout.write(f"{prefix} {line}")
+        sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run a trainer on several local worker processes',
+        epilog='Example: python3 scripts/launch-workers.py --num-workers 3 train-real-model.py --cache'
+    )
+    parser.add_argument('--num-workers', type=int, default=2,
+                        help='Worker processes to start')
+    parser.add_argument('--host', default='localhost',
+                        help='Address the workers listen on')
+    parser.add_argument('--base-port', type=int, default=0,
+                        help='Port of worker 0, the others use the following ports (0 = pick free ports)')
+    parser.add_argument('--threads', type=int, default=0,
+                        help='Intra-op threads per worker (0 = split the cores evenly)')
+    parser.add_argument('script', help='Trainer script in scripts/, e.g. train-real-model.py')
+    parser.add_argument('script_args', nargs=argparse.REMAINDER,
+                        help='Arguments passed through to every worker')
+    args = parser.parse_args()
+
+    script = Path(args.script)
+    if not script.exists():
+        script = SCRIPTS_DIR / args.script
+    if not script.exists():
+        parser.error(f"Trainer script not found: {args.script}")
+
+    if args.base_port:
+        ports = [args.base_port + i for i in range(args.num_workers)]
+    else:
+        ports = free_ports(args.num_workers)
+    workers = ','.join(f'{args.host}:{port}' for port in ports)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.num_workers)
+
+    print(f"🚀 Starting {args.num_workers} workers ({threads} threads each): {workers}")
+
+    environment = dict(os.environ)
+    environment.update({
+        'TF_NUM_INTRAOP_THREADS': str(threads),
+        'TF_NUM_INTEROP_THREADS': '2',
+        'PYTHONUNBUFFERED': '1'
+    })
+    environment.pop('TF_CONFIG', None)
+
+    processes = []
+    relays = []
+    for task_index in range(args.num_workers):
+        command = [
+            sys.executable, str(script), *args.script_args,
+            '--workers', workers, '--task-index', str(task_index)
+        ]
+        process = subprocess.Popen(
+            command, env=environment, text=True,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        relay = threading.Thread(target=relay_output, args=(process, f"[worker {task_index}]"), daemon=True)
+        relay.start()
+        processes.append(process)
+        relays.append(relay)
+
+    # A worker that dies leaves the others blocked in a collective, so stop them all
+    failed = None
+    try:
+        while failed is None and any(process.poll() is None for process in processes):
+            for task_index, process in enumerate(processes):
+                if process.poll() not in (None, 0):
+                    failed = task_index
+                    break
+            else:
+                time.sleep(0.5)
+    except KeyboardInterrupt:
+        failed = -1
+
+    if failed is not None:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+    for process in processes:
+        process.wait()
+    for relay in relays:
+        relay.join()
+
+    if failed is None:
+        failed = next((i for i, process in enumerate(processes) if process.returncode != 0), None)
+
+    if failed is not None:
+        reason = 'interrupted' if failed < 0 else f"worker {failed} exited with {processes[failed].returncode}"
+        print(f"❌ Multi-worker run failed: {reason}")
+        sys.exit(1)
+
+    print(f"✅ All {args.num_workers} workers finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Dynamic micro-batching for FruitAI model serving
+Coalesces images from concurrent requests into one model call, waiting at
+most a fixed deadline after the first image for the batch to fill, and
+keeps latency percentiles over a sliding window of recent requests
+"""
+
+import time
+import queue
+import threading
+import numpy as np
+from collections import Counter, deque
+from concurrent.futures import Future
+
+# Percentiles reported for every timed stage
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencyTracker:
+    """Sliding-window latency percentiles per stage plus batch-size counts (thread-safe)"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.batch_sizes = Counter()
+        self.counts = Counter()
+
+    def record(self, **stage_ms):
+        with self.lock:
+            for stage, ms in stage_ms.items():
+                self.stages.setdefault(stage, deque(maxlen=self.window)).append(ms)
+
+    def record_batch(self, size):
+        with self.lock:
+            self.batch_sizes[size] += 1
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def summary(self):
+        with self.lock:
+            latency = {}
+            for stage, timings in self.stages.items():
+                timings = np.array(timings)
+                latency[stage] = {
+                    'count': len(timings),
+                    'mean_ms': float(timings.mean()),
+                    **{f'p{p}_ms': float(np.percentile(timings, p)) for p in PERCENTILES}
+                }
+            batches = sum(self.batch_sizes.values())
+            images = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                'window': self.window,
+                'counts': dict(self.counts),
+                'batches': batches,
+                'mean_batch_size': images / batches if batches else 0.0,
+                'batch_sizes': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                'latency': latency
+            }
+
+
+class MicroBatcher:
+    """Run predict_batch on images submitted from many threads, a batch at a time
+
+    One worker thread owns the model. It blocks for the first image, then
+    keeps collecting until max_batch_size images are queued or max_wait_ms
+    has passed since that first image arrived, and answers every caller's
+    Future from the single batched call. Under light load a request waits at
+    most max_wait_ms; under heavy load batches fill before the deadline.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=32, max_wait_ms=10.0, tracker=None):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.tracker = tracker or LatencyTracker()
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self.run, name='micro-batcher', daemon=True)
+        self.stopped = False
+
+    def start(self):
+        self.worker.start()
+        return self
+
+    def stop(self):
+        self.stopped = True
+        self.requests.put(None)
+        self.worker.join()
+
+    def submit(self, pixels):
+        """Queue one uint8 (H, W, 3) image; the Future resolves to its result"""
+        future = Future()
+        self.requests.put((pixels, future, time.perf_counter()))
+        return future
+
+    def collect(self):
+        """Block for the first request, then gather more until the batch is full or the deadline passes
+
+        Requests that queued up while the previous batch was running are
+        taken even when the first one's deadline has already passed; the
+        deadline only limits how long the worker waits for new ones.
+        """
+        first = self.requests.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    request = self.requests.get(timeout=remaining)
+                else:
+                    request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self.stopped = True
+                break
+            batch.append(request)
+        return batch
+
+    def run(self):
+        while not self.stopped:
+            batch = self.collect()
+            if not batch:
+                break
+
+            start = time.perf_counter()
+            try:
+                results = self.predict_batch(np.stack([pixels for pixels, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            inference_ms = (time.perf_counter() - start) * 1000
+
+            self.tracker.record_batch(len(batch))
+            for (_, future, queued), result in zip(batch, results):
+                self.tracker.record(queue_ms=(start - queued) * 1000, inference_ms=inference_ms)
+                future.set_result(result)
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Weight fingerprints for the FruitAI models
+A short hash of a model's weights identifies the exact weights that cached
+predictions or embeddings came from and that inference results were made with
+"""
+
+import hashlib
+import numpy as np
+
+
+def weights_fingerprint(model):
+    """Short sha256 of a model's weights, in layer order"""
+    digest = hashlib.sha256()
+    for weights in model.get_weights():
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return digest.hexdigest()[:16]
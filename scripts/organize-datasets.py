@@ -4,20 +4,30 @@ Organize downloaded fruit and vegetable datasets into a unified structure
 This script processes multiple datasets and creates a standardized training set
 """
 
+import io
 import os
 import shutil
 import json
+import argparse
 from pathlib import Path
 from PIL import Image
 import numpy as np
 from collections import defaultdict
+from dataset_shards import ShardWriter
+from data_layout import DATA_DIR, reserved_dir, dataset_folders
 
 class DatasetOrganizer:
-    def __init__(self):
-        self.base_dir = Path('real-training-data')
-        self.organized_dir = self.base_dir / 'organized'
+    def __init__(self, output_format='files', shard_size_mb=256):
+        self.base_dir = DATA_DIR
+        self.organized_dir = reserved_dir('organized')
+        self.shard_dir = reserved_dir('shards')
         self.stats = defaultdict(lambda: defaultdict(int))
         
+        # 'files' writes organized/<quality>/<fruit>/*.jpg, 'shards' packs them into large shard files
+        self.output_format = output_format
+        self.shard_size = shard_size_mb * 1024 * 1024
+        self.shard_writer = None
+        
         # Define fruit and vegetable mappings
         self.fruit_mappings = {
             # Common variations and spellings
@@ -75,7 +85,7 @@ class DatasetOrganizer:
             return False
 
     def process_image(self, src_path, dst_path):
-        """Process and copy image with standardization"""
+        """Process and copy image with standardization (dst_path may be a file object)"""
         try:
             with Image.open(src_path) as img:
                 # Convert to RGB if necessary
@@ -123,18 +133,28 @@ class DatasetOrganizer:
                         quality = self.identify_quality(part)
             
             if fruit_type != 'unknown' and quality != 'unknown':
-                # Create destination path
-                dst_dir = self.organized_dir / quality / fruit_type
-                dst_dir.mkdir(parents=True, exist_ok=True)
-                
                 # Create unique filename
                 base_name = f"{dataset_folder.name}_{processed_count:04d}.jpg"
-                dst_path = dst_dir / base_name
                 
-                # Process and copy image
-                if self.process_image(file_path, dst_path):
-                    self.stats[quality][fruit_type] += 1
-                    processed_count += 1
+                if self.shard_writer is not None:
+                    # Encode in memory and append to the current shard
+                    buffer = io.BytesIO()
+                    if not self.process_image(file_path, buffer):
+                        continue
+                    self.shard_writer.add(
+                        buffer.getvalue(), quality, fruit_type, dataset_folder.name, base_name
+                    )
+                else:
+                    # Create destination path
+                    dst_dir = self.organized_dir / quality / fruit_type
+                    dst_dir.mkdir(parents=True, exist_ok=True)
+                    
+                    # Process and copy image
+                    if not self.process_image(file_path, dst_dir / base_name):
+                        continue
+                
+                self.stats[quality][fruit_type] += 1
+                processed_count += 1
         
         print(f"   ✅ Processed {processed_count} images")
 
@@ -158,7 +178,10 @@ class DatasetOrganizer:
             'fruit_labels': {fruit: idx for idx, fruit in enumerate(sorted(set().union(*[fruits.keys() for fruits in self.stats.values()])))}
         }
         
-        with open(self.organized_dir / 'metadata.json', 'w') as f:
+        output_dir = self.shard_dir if self.output_format == 'shards' else self.organized_dir
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        with open(output_dir / 'metadata.json', 'w') as f:
             json.dump(metadata, f, indent=2)
         
         print(f"\n📋 Created metadata.json")
@@ -183,19 +206,28 @@ class DatasetOrganizer:
         print("🗂️  Organizing Dataset Structure")
         print("===============================")
         
-        # Find all dataset folders
-        dataset_folders = [d for d in self.base_dir.iterdir() if d.is_dir() and d.name != 'organized']
+        # Find all dataset folders (tool output directories are skipped)
+        folders = dataset_folders(self.base_dir)
         
-        if not dataset_folders:
+        if not folders:
             print("❌ No dataset folders found!")
             print("   Please run download-datasets.py first")
             return False
         
-        print(f"Found {len(dataset_folders)} dataset folders")
+        print(f"Found {len(folders)} dataset folders")
+        
+        if self.output_format == 'shards':
+            self.shard_writer = ShardWriter(self.shard_dir, self.shard_size)
         
         # Process each dataset
-        for dataset_folder in dataset_folders:
-            self.organize_dataset_folder(dataset_folder)
+        try:
+            for dataset_folder in folders:
+                self.organize_dataset_folder(dataset_folder)
+        finally:
+            if self.shard_writer is not None:
+                self.shard_writer.close()
+                print(f"\n📦 Wrote {len(self.shard_writer.records)} records "
+                      f"into {len(self.shard_writer.shards)} shards")
         
         # Create metadata
         metadata = self.create_training_metadata()
@@ -209,18 +241,27 @@ class DatasetOrganizer:
             return False
         
         print(f"\n✅ Dataset organization complete!")
-        print(f"   Organized data available in: {self.organized_dir}")
+        output_dir = self.shard_dir if self.output_format == 'shards' else self.organized_dir
+        print(f"   Organized data available in: {output_dir}")
         print(f"   Ready for training with {metadata['dataset_info']['total_images']} images")
         
         return True
 
 def main():
-    organizer = DatasetOrganizer()
+    parser = argparse.ArgumentParser(description='Organize downloaded datasets for FruitAI training')
+    parser.add_argument('--format', choices=['files', 'shards'], default='files',
+                        help='Write individual JPEGs or pack them into indexed shard files')
+    parser.add_argument('--shard-size-mb', type=int, default=256,
+                        help='Maximum size of each shard file')
+    args = parser.parse_args()
+    
+    organizer = DatasetOrganizer(output_format=args.format, shard_size_mb=args.shard_size_mb)
     success = organizer.organize_all_datasets()
     
     if success:
         print(f"\n🚀 Next steps:")
-        print(f"   1. Run: python scripts/train-real-model.py")
+        shard_args = f" --shards {organizer.shard_dir}" if args.format == 'shards' else ""
+        print(f"   1. Run: python scripts/train-real-model.py{shard_args}")
         print(f"   2. Test the improved model accuracy")
     else:
         print(f"\n💡 Troubleshooting:")
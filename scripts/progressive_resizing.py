@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Progressive-resolution training for the FruitAI training scripts
+Early epochs run on smaller images, the last phase at the export resolution
+"""
+
+import time
+from tensorflow import keras
+
+
+def parse_sizes(text):
+    """'128,160,224' -> [128, 160, 224]"""
+    return [int(size) for size in text.split(',') if size.strip()]
+
+
+def progressive_phases(sizes, epochs, final_size):
+    """Split epochs evenly over the sizes and return [(img_size, end_epoch)]
+
+    The last phase always runs at final_size and gets the remainder epochs.
+    """
+    sizes = [size for size in sizes if size != final_size] + [final_size]
+    sizes = sizes[-max(epochs, 1):]
+
+    per_phase = epochs // len(sizes)
+    phases = []
+    for i, size in enumerate(sizes):
+        end_epoch = epochs if i == len(sizes) - 1 else per_phase * (i + 1)
+        phases.append(((size, size), end_epoch))
+    return phases
+
+
+def fit_progressive(model, phases, train_data, val_data, callbacks, make_checkpoint, telemetry=None):
+    """Fit through (img_size, end_epoch) phases and return (final history, phase timings)
+
+    train_data(img_size) and val_data(img_size) build the inputs of a phase.
+    Early stopping and the other callbacks only watch the final phase, so a
+    plateau at low resolution never skips the full-resolution epochs. Each
+    phase has its own resumable checkpoint; the final one is named 'train'.
+    An optional TrainingTelemetry times the steps of every phase.
+    """
+    timings = []
+    start_epoch = 0
+
+    for i, (img_size, end_epoch) in enumerate(phases):
+        final = i == len(phases) - 1
+        phase_callbacks = list(callbacks) if final else []
+        checkpoint = make_checkpoint('train' if final else f'train_{img_size[0]}', phase_callbacks)
+        initial_epoch = max(start_epoch, checkpoint.restore(model, end_epoch))
+
+        if len(phases) > 1:
+            print(f"📐 Phase {i + 1}/{len(phases)}: {img_size[0]}x{img_size[1]}, "
+                  f"epochs {initial_epoch + 1}-{end_epoch}")
+
+        data = checkpoint.track_data(train_data(img_size))
+        if telemetry is not None:
+            data = telemetry.instrument(data, phase=checkpoint.checkpoint_dir.name)
+            phase_callbacks = phase_callbacks + [checkpoint, telemetry]
+        else:
+            phase_callbacks = phase_callbacks + [checkpoint]
+
+        phase_start = time.time()
+        history = model.fit(
+            data,
+            validation_data=val_data(img_size),
+            epochs=end_epoch,
+            initial_epoch=initial_epoch,
+            callbacks=phase_callbacks,
+            verbose=1
+        )
+        timings.append({
+            'img_size': list(img_size),
+            'epochs': len(history.epoch),
+            'seconds': time.time() - phase_start
+        })
+        start_epoch = end_epoch
+
+    return history, timings
+
+
+def progressive_time_report(timings):
+    """Compare total training time with the same epochs all run at the final resolution
+
+    The fixed-resolution baseline is estimated from the measured per-epoch
+    time of the final phase rather than by training a second model.
+    """
+    final = timings[-1]
+    total_epochs = sum(phase['epochs'] for phase in timings)
+    total_seconds = sum(phase['seconds'] for phase in timings)
+    baseline_seconds = final['seconds'] / final['epochs'] * total_epochs if final['epochs'] else None
+
+    report = {
+        'phases': timings,
+        'total_epochs': total_epochs,
+        'total_seconds': total_seconds,
+        'fixed_resolution_seconds_estimate': baseline_seconds,
+        'speedup': baseline_seconds / total_seconds if baseline_seconds and total_seconds else None
+    }
+
+    print("⏱️  Progressive-resolution training time:")
+    for phase in timings:
+        print(f"   {phase['img_size'][0]}x{phase['img_size'][1]}: {phase['epochs']} epochs in {phase['seconds']:.0f}s")
+    if baseline_seconds:
+        print(f"   Total {total_seconds:.0f}s vs ~{baseline_seconds:.0f}s fixed at "
+              f"{final['img_size'][0]}x{final['img_size'][1]} ({report['speedup']:.2f}x)")
+
+    return report
+
+
+def fixed_input_model(model, img_size):
+    """Copy of a variable-input model with its input fixed to img_size, for export"""
+    inputs = keras.Input(shape=(*img_size, 3))
+    fixed = keras.models.clone_model(model, input_tensors=inputs)
+    fixed.set_weights(model.get_weights())
+    return fixed
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Prune a trained FruitAI model into a smaller one
+Removes the weakest head units and backbone output channels, fine-tunes
+briefly while magnitude pruning ramps up sparsity, and reports parameters,
+file size and CPU latency before and after
+"""
+
+import sys
+import argparse
+from backbones import BACKBONES
+from trainer_registry import TRAINERS, trainer_class
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prune a trained model and report the savings')
+    parser.add_argument('--trainer', choices=sorted(TRAINERS), default='real',
+                        help='Trainer whose production model in public/models is pruned')
+    parser.add_argument('--backbone', choices=sorted(BACKBONES),
+                        help='Backbone the production model was trained with (default: the trainer default)')
+    loading = parser.add_mutually_exclusive_group()
+    loading.add_argument('--streaming', action='store_true',
+                         help='Stream images from disk with tf.data instead of loading them all into memory')
+    loading.add_argument('--cache', action='store_true',
+                         help='Load resized uint8 pixels from the memory-mapped preprocessing cache')
+    loading.add_argument('--shards', metavar='DIR',
+                         help='Read images from shard files written by organize-datasets.py --format shards')
+    parser.add_argument('--pipeline-augmentation', action='store_true',
+                        help='Set when the production model was trained with --pipeline-augmentation')
+    parser.add_argument('--structured-ratio', type=float, default=0.5,
+                        help='Fraction of hidden head units and last-conv channels removed outright; '
+                             "ResNet50's last convolution feeds a residual add, so only its head is pruned")
+    parser.add_argument('--sparsity', type=float, default=0.5,
+                        help='Fraction of the remaining trainable kernel weights zeroed by magnitude pruning')
+    parser.add_argument('--epochs', type=int, default=3,
+                        help='Fine-tuning epochs while sparsity ramps up')
+    parser.add_argument('--head-only', action='store_true',
+                        help='Leave the backbone channels alone and only prune the head')
+    parser.add_argument('--decode-workers', type=int, default=1,
+                        help='Processes used to decode JPEGs (0 = all cores)')
+    args = parser.parse_args()
+    if not 0 <= args.structured_ratio < 1 or not 0 <= args.sparsity < 1:
+        parser.error('--structured-ratio and --sparsity must be in [0, 1)')
+
+    print("🍎 FruitAI Model Pruning")
+    print("========================")
+
+    from warm_start import load_previous_model, transfer_weights
+
+    trainer = trainer_class(args.trainer)(
+        backbone=args.backbone or TRAINERS[args.trainer]['backbone'],
+        streaming=args.streaming,
+        use_cache=args.cache,
+        decode_workers=args.decode_workers,
+        shard_dir=args.shards,
+        pipeline_augmentation=args.pipeline_augmentation
+    )
+
+    model_path = trainer.model_dir / trainer.production_model_name
+    previous = load_previous_model(model_path)
+    if previous is None:
+        print(f"❌ Model not found: {model_path}")
+        print(f"   Train one first: python3 scripts/{TRAINERS[args.trainer]['script']}")
+        return
+
+    if hasattr(trainer, 'load_metadata'):
+        trainer.load_metadata()
+    trainer.load_dataset()
+    trainer.create_model()
+
+    # Same architecture, so every layer should carry over; a mismatch means the wrong --backbone
+    transfer = transfer_weights(previous, trainer.model, trainer.previous_output_classes(), trainer.output_classes())
+    if transfer['skipped']:
+        print(f"❌ {model_path} does not match a {trainer.backbone} model ({', '.join(transfer['skipped'])} differ)")
+        print("   Pass the --backbone (and --pipeline-augmentation) it was trained with")
+        sys.exit(1)
+    print(f"🤖 Loaded {model_path}")
+
+    report = trainer.prune_model(args.structured_ratio, args.sparsity, args.epochs, prune_backbone=not args.head_only)
+    before, after = report['before'], report['after']
+
+    if not args.head_only and not any(name in report['pruned_widths'] for name in
+                                      (layer.name for layer in trainer.base_model.layers)):
+        print(f"⚠️  The last convolution of {trainer.backbone} feeds a residual/scaling op; only the head was pruned")
+
+    print(f"\n📊 Before vs after pruning:")
+    print(f"   {'':<16} {'before':>12} {'after':>12}")
+    print(f"   {'test accuracy':<16} {before['test_accuracy']:>12.2%} {after['test_accuracy']:>12.2%}")
+    print(f"   {'parameters':<16} {before['params']:>12,} {after['params']:>12,}")
+    print(f"   {'file size':<16} {before['bytes'] / 1024 / 1024:>9.1f} MB {after['bytes'] / 1024 / 1024:>9.1f} MB")
+    print(f"   {'gzipped':<16} {before['gzip_bytes'] / 1024 / 1024:>9.1f} MB {after['gzip_bytes'] / 1024 / 1024:>9.1f} MB")
+    for batch in ('batch1', 'batch32'):
+        print(f"   {batch + ' p50':<16} {before[batch]['p50_ms']:>9.1f} ms {after[batch]['p50_ms']:>9.1f} ms")
+    print(f"   Kernel sparsity: {report['kernel_sparsity']:.1%}")
+
+    print(f"\n✅ Pruned model saved to: {report['output']}")
+    print(f"📋 Report saved to: {trainer.model_dir / f'{trainer.report_prefix}-pruning.json'}")
+
+
+if __name__ == "__main__":
+    main()
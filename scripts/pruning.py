@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Pruning for the FruitAI models
+Structured pruning removes whole head units and output channels of the
+backbone's last convolution, so the rebuilt model is genuinely smaller;
+gradual magnitude pruning then zeroes the smallest remaining kernel
+weights while a short fine-tune recovers accuracy
+"""
+
+import gzip
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+# Layers that keep the channels of their input: the kept channels pass straight through
+CHANNEL_WISE = (layers.BatchNormalization, layers.DepthwiseConv2D)
+
+
+def is_functional(layer):
+    return isinstance(layer, keras.Model) and not isinstance(layer, keras.Sequential)
+
+
+def node_layer(node):
+    """The layer that created a graph node (node.operation in Keras 3, node.layer in Keras 2)"""
+    return getattr(node, 'operation', None) or node.layer
+
+
+def inbound_layers(model):
+    """Layer name -> names of the layers feeding it, read from the functional model's own graph nodes
+
+    Walking the nodes instead of get_config() works with both Keras 2 and
+    Keras 3, whose serialized inbound_nodes formats differ.
+    """
+    inbound = {}
+    for nodes in model._nodes_by_depth.values():
+        for node in nodes:
+            inbound.setdefault(node_layer(node).name, [node_layer(parent).name for parent in node.parent_nodes])
+    return inbound
+
+
+def output_layer_name(model):
+    return model.outputs[0]._keras_history[0].name
+
+
+def output_width(layer):
+    return layer.output.shape[-1]
+
+
+class StructuredPruner:
+    """Pick the units and channels to keep and rebuild the model without the rest
+
+    Kept indices are followed through the graph (dropout, batch norm,
+    pooling, concatenation, nested models), so every consumer of a pruned
+    layer gets the matching rows of its own weights.
+    """
+
+    def __init__(self, model, ratio):
+        self.model = model
+        self.ratio = ratio
+        self.keep = {}
+        self.graphs = {}
+
+    def graph(self, model):
+        if model.name not in self.graphs:
+            self.graphs[model.name] = inbound_layers(model)
+        return self.graphs[model.name]
+
+    def keep_strongest(self, layer):
+        """Indices of the units/filters with the largest L1 norm of incoming weights"""
+        kernel = layer.get_weights()[0]
+        norms = np.abs(kernel).reshape(-1, kernel.shape[-1]).sum(axis=0)
+        count = max(1, int(round(kernel.shape[-1] * (1 - self.ratio))))
+        return np.sort(np.argsort(norms)[-count:])
+
+    def last_convolution(self, backbone):
+        """The backbone's final Conv2D when only per-channel layers follow it, else None
+
+        Channels of convolutions feeding residual additions or squeeze-excite
+        multiplications are tied to other layers and are left alone.
+        """
+        graph = self.graph(backbone)
+        name = output_layer_name(backbone)
+        while True:
+            layer = backbone.get_layer(name)
+            if type(layer) is layers.Conv2D:
+                return layer
+            if not isinstance(layer, (layers.BatchNormalization, layers.Activation, layers.ReLU)):
+                return None
+            name, = graph[name]
+
+    def select(self, include_backbone=True):
+        """Choose what to keep: hidden Dense units of the head and the backbone's last conv channels"""
+        outputs = set(self.model.output_names)
+        for layer in self.model.layers:
+            if isinstance(layer, layers.Dense) and layer.name not in outputs:
+                self.keep[layer.name] = self.keep_strongest(layer)
+            elif include_backbone and is_functional(layer):
+                convolution = self.last_convolution(layer)
+                if convolution is not None:
+                    self.keep[convolution.name] = self.keep_strongest(convolution)
+        return self.keep
+
+    def output_channels(self, model, name):
+        """Original output channels of a layer that survive pruning (None = all of them)"""
+        if name in self.keep:
+            return self.keep[name]
+
+        layer = model.get_layer(name)
+        if is_functional(layer):
+            return self.output_channels(layer, output_layer_name(layer))
+        if isinstance(layer, layers.Concatenate):
+            kept, offset = [], 0
+            for source in self.graph(model)[name]:
+                channels = self.output_channels(model, source)
+                width = output_width(model.get_layer(source))
+                kept.append(np.arange(width) + offset if channels is None else channels + offset)
+                offset += width
+            return np.concatenate(kept)
+        if isinstance(layer, (layers.Dense, layers.Conv2D, layers.InputLayer)) and not isinstance(layer, CHANNEL_WISE):
+            return None
+
+        sources = self.graph(model)[name]
+        return self.output_channels(model, sources[0]) if sources else None
+
+    def input_channels(self, model, name):
+        sources = self.graph(model)[name]
+        return self.output_channels(model, sources[0]) if sources else None
+
+    def sliced_weights(self, model, layer):
+        """The original layer's weights restricted to the kept input and output channels"""
+        weights = layer.get_weights()
+        inputs = self.input_channels(model, layer.name)
+        outputs = self.keep.get(layer.name)
+
+        if isinstance(layer, CHANNEL_WISE):
+            if inputs is None:
+                return weights
+            if isinstance(layer, layers.DepthwiseConv2D):
+                return [weights[0][:, :, inputs, :], *(bias[inputs] for bias in weights[1:])]
+            return [values[inputs] for values in weights]
+
+        if isinstance(layer, (layers.Dense, layers.Conv2D)):
+            kernel, *bias = weights
+            if inputs is not None:
+                kernel = np.take(kernel, inputs, axis=-2)
+            if outputs is not None:
+                kernel = kernel[..., outputs]
+                bias = [values[outputs] for values in bias]
+            return [kernel, *bias]
+
+        return weights
+
+    def rebuild(self):
+        """Clone the model with the pruned widths and fill it with the kept weights"""
+        widths = {name: len(indices) for name, indices in self.keep.items()}
+
+        def clone_layer(layer):
+            if isinstance(layer, keras.Model):
+                return keras.models.clone_model(layer, clone_function=clone_layer)
+            config = layer.get_config()
+            if layer.name in widths:
+                config['units' if isinstance(layer, layers.Dense) else 'filters'] = widths[layer.name]
+            return layer.__class__.from_config(config)
+
+        pruned = keras.models.clone_model(self.model, clone_function=clone_layer)
+        self.copy_weights(self.model, pruned)
+        return pruned
+
+    def copy_weights(self, original, pruned):
+        for layer in original.layers:
+            # Keras 3 renames cloned input layers; they carry no weights anyway
+            if not layer.weights:
+                continue
+            target = pruned.get_layer(layer.name)
+            # Set before recursing: setting a nested model's flag overrides its layers' flags
+            target.trainable = layer.trainable
+            if is_functional(layer):
+                self.copy_weights(layer, target)
+            elif layer.weights:
+                target.set_weights(self.sliced_weights(original, layer))
+
+
+def prune_structured(model, ratio, include_backbone=True):
+    """Return (smaller model, {layer: (original width, kept width)})"""
+    pruner = StructuredPruner(model, ratio)
+    keep = pruner.select(include_backbone)
+    pruned = pruner.rebuild()
+    widths = {}
+    for name, indices in keep.items():
+        layer = find_layer(model, name)
+        widths[name] = (int(layer.get_weights()[0].shape[-1]), len(indices))
+    return pruned, widths
+
+
+def find_layer(model, name):
+    for layer in model.layers:
+        if layer.name == name:
+            return layer
+        if is_functional(layer):
+            found = find_layer(layer, name)
+            if found is not None:
+                return found
+    return None
+
+
+def prunable_kernels(model):
+    """Trainable Dense and convolution layers magnitude pruning may zero (never the outputs)
+
+    Frozen layers are left dense: their weights could not recover from pruning.
+    """
+    outputs = set(model.output_names)
+    kernels = []
+    for layer in model.layers:
+        if is_functional(layer):
+            if layer.trainable:
+                kernels.extend(sub for sub in layer.layers if type(sub) in (layers.Conv2D, layers.Dense) and sub.trainable)
+        elif type(layer) in (layers.Conv2D, layers.Dense) and layer.name not in outputs and layer.trainable:
+            kernels.append(layer)
+    return kernels
+
+
+class GradualMagnitudePruning(keras.callbacks.Callback):
+    """Zero the smallest-magnitude kernel weights on a polynomial sparsity ramp
+
+    Sparsity rises from initial_sparsity to target_sparsity between
+    begin_step and end_step as s_t = s_f + (s_i - s_f)(1 - progress)^3
+    (Zhu & Gupta, 2017). Masks are recomputed every `frequency` steps on
+    the ramp and re-applied after every step, so pruned weights stay zero
+    while the optimizer keeps updating the rest. Nothing wraps the layers:
+    once training ends the masked model is already the stripped model.
+    """
+
+    def __init__(self, kernel_layers, target_sparsity, end_step, begin_step=0, frequency=50, initial_sparsity=0.0):
+        super().__init__()
+        self.kernel_layers = kernel_layers
+        self.target_sparsity = target_sparsity
+        self.initial_sparsity = initial_sparsity
+        self.begin_step = begin_step
+        self.end_step = max(end_step, begin_step + 1)
+        self.frequency = frequency
+        self.step = 0
+        self.masks = None
+
+    def sparsity_at(self, step):
+        progress = min(max((step - self.begin_step) / (self.end_step - self.begin_step), 0.0), 1.0)
+        return self.target_sparsity + (self.initial_sparsity - self.target_sparsity) * (1 - progress) ** 3
+
+    def update_masks(self):
+        sparsity = self.sparsity_at(self.step)
+        self.masks = []
+        for layer in self.kernel_layers:
+            magnitudes = np.abs(layer.kernel.numpy())
+            threshold = np.quantile(magnitudes, sparsity) if sparsity > 0 else -1.0
+            self.masks.append(tf.constant(magnitudes > threshold, dtype=layer.kernel.dtype))
+
+    def apply_masks(self):
+        for layer, mask in zip(self.kernel_layers, self.masks):
+            layer.kernel.assign(layer.kernel * mask)
+
+    def on_train_begin(self, logs=None):
+        if self.masks is None:
+            self.update_masks()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.step += 1
+        on_ramp = self.begin_step <= self.step <= self.end_step
+        if on_ramp and ((self.step - self.begin_step) % self.frequency == 0 or self.step == self.end_step):
+            self.update_masks()
+        self.apply_masks()
+
+
+def kernel_sparsity(kernel_layers):
+    """Fraction of exactly-zero weights over the given kernels"""
+    zeros = sum(int(np.sum(layer.kernel.numpy() == 0)) for layer in kernel_layers)
+    total = sum(int(np.prod(layer.kernel.shape)) for layer in kernel_layers)
+    return zeros / total if total else 0.0
+
+
+def saved_sizes(model, path):
+    """Save a model and return its file size and gzip-compressed size (what sparsity saves in transfer)"""
+    model.save(path)
+    data = path.read_bytes()
+    return {'bytes': len(data), 'gzip_bytes': len(gzip.compress(data, compresslevel=6))}
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Post-training int8 quantization for the FruitAI models
+Converts a Keras model to a full-integer TFLite model calibrated on a
+representative sample, and runs TFLite models the same way as Keras ones
+"""
+
+import time
+import numpy as np
+import tensorflow as tf
+from collections import defaultdict
+
+
+def stratified_sample(indices, strata, count, seed=42):
+    """Up to count indices spread evenly over the strata (e.g. quality/fruit pairs)
+
+    Strata are visited round-robin after shuffling each one, so small classes
+    are represented even when the sample is much smaller than the dataset.
+    """
+    rng = np.random.default_rng(seed)
+    groups = defaultdict(list)
+    for index in indices:
+        groups[strata[index]].append(index)
+    pools = [list(rng.permutation(members)) for _, members in sorted(groups.items())]
+
+    sample = []
+    while len(sample) < count and any(pools):
+        for pool in pools:
+            if pool and len(sample) < count:
+                sample.append(pool.pop())
+    return np.array(sorted(sample), dtype=np.int64)
+
+
+def convert_int8(model, calibration_pixels):
+    """Full-integer TFLite conversion calibrated on uint8 pixels; returns (tflite bytes, float fallback used)
+
+    The models take raw 0-255 pixels, so the input stays uint8 and
+    clients feed decoded images unchanged; outputs stay float so
+    probabilities need no dequantizing. Ops without an int8 kernel fall
+    back to float only when a strict integer conversion fails.
+    """
+    def representative_dataset():
+        for image in calibration_pixels:
+            yield [image[np.newaxis].astype(np.float32)]
+
+    def convert(supported_ops):
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = supported_ops
+        converter.inference_input_type = tf.uint8
+        return converter.convert()
+
+    try:
+        return convert([tf.lite.OpsSet.TFLITE_BUILTINS_INT8]), False
+    except Exception as e:
+        print(f"⚠️  Strict int8 conversion failed ({e}), allowing float fallback ops")
+        return convert([tf.lite.OpsSet.TFLITE_BUILTINS_INT8, tf.lite.OpsSet.TFLITE_BUILTINS]), True
+
+
+class TFLiteModel:
+    """Run a TFLite model on uint8 pixel batches, returning outputs keyed by output name"""
+
+    def __init__(self, model_content, num_threads=None):
+        self.interpreter = tf.lite.Interpreter(model_content=model_content, num_threads=num_threads)
+        self.runner = self.interpreter.get_signature_runner()
+        (self.input_name, details), = self.runner.get_input_details().items()
+        self.input_dtype = details['dtype']
+        self.input_scale, self.input_zero_point = details['quantization']
+
+    def quantize_input(self, pixels):
+        if self.input_dtype == np.float32:
+            return np.asarray(pixels, dtype=np.float32)
+        if self.input_scale and (self.input_scale, self.input_zero_point) != (1.0, 0):
+            info = np.iinfo(self.input_dtype)
+            quantized = np.round(np.asarray(pixels, dtype=np.float32) / self.input_scale + self.input_zero_point)
+            return np.clip(quantized, info.min, info.max).astype(self.input_dtype)
+        return np.asarray(pixels, dtype=self.input_dtype)
+
+    def predict_on_batch(self, pixels):
+        return self.runner(**{self.input_name: self.quantize_input(pixels)})
+
+
+def measure_tflite_latency(model, img_size, batch_size=1, runs=50, warmup=5, seed=0):
+    """Time TFLite inference on random 0-255 pixels and return percentiles in ms, like measure_latency"""
+    rng = np.random.default_rng(seed)
+    batch = rng.integers(0, 256, (batch_size, *img_size, 3)).astype(np.uint8)
+
+    for _ in range(warmup):
+        model.predict_on_batch(batch)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.predict_on_batch(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings = np.array(timings)
+    return {
+        'batch_size': batch_size,
+        'runs': runs,
+        'mean_ms': float(timings.mean()),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'images_per_sec': float(batch_size * 1000 / timings.mean())
+    }
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Quantize a trained FruitAI model to int8 TFLite
+Calibrates on a stratified sample of the training split, compares accuracy,
+size and CPU latency with the float model on the test split, and only
+publishes the int8 model when accuracy drops by less than a threshold
+"""
+
+import sys
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+from data_layout import reserved_dir
+
+
+def model_size(path):
+    path = Path(path)
+    if path.is_dir():
+        return sum(file.stat().st_size for file in path.rglob('*') if file.is_file())
+    return path.stat().st_size
+
+
+def evaluate(predictor, predict_on_batch, pixels, qualities, fruits, batch_size=32):
+    """Freshness (and fruit) accuracy plus the per-image fresh/rotten calls of one model"""
+    calls = []
+    fruit_hits = []
+    for start in range(0, len(pixels), batch_size):
+        for result in predictor.results(predict_on_batch(pixels[start:start + batch_size])):
+            calls.append('fresh' if result['freshness'] >= 0.5 else 'rotten')
+            fruit_hits.append(result['fruit'])
+
+    calls = np.array(calls)
+    metrics = {'freshness_accuracy': float(np.mean(calls == np.asarray(qualities)))}
+    if predictor.multi_task and predictor.fruit_classes:
+        metrics['fruit_type_accuracy'] = float(np.mean(np.array(fruit_hits) == np.asarray(fruits)))
+    return metrics, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Post-training int8 quantization with a publish gate')
+    parser.add_argument('--model', default='public/models/freshness_model.keras',
+                        help='Float model: freshness_model.keras, fruitai-real-model.keras or fruitai-simple-model')
+    parser.add_argument('--encoders', help='encoders.json of a multi-task model (default: next to the model)')
+    parser.add_argument('--data-dir', default=str(reserved_dir('organized')),
+                        help='Organized dataset providing the calibration (train split) and test images')
+    parser.add_argument('--calibration-images', type=int, default=200,
+                        help='Representative images, spread evenly over quality/fruit classes')
+    parser.add_argument('--test-images', type=int, default=0,
+                        help='Stratified cap on test images (0 = the whole test split)')
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01,
+                        help='Refuse to publish when int8 freshness accuracy is lower by more than this')
+    parser.add_argument('--threads', type=int,
+                        help='TFLite interpreter threads (default: TFLite decides)')
+    parser.add_argument('--decode-workers', type=int, default=0,
+                        help='Processes used to decode images (0 = all cores)')
+    parser.add_argument('--output', help='int8 model path (default: <model>-int8.tflite next to the model)')
+    args = parser.parse_args()
+
+    print("🍎 FruitAI int8 Quantization")
+    print("============================")
+
+    data_dir = Path(args.data_dir)
+    if not data_dir.exists():
+        print("❌ Dataset not found!")
+        print("   Please run: python3 scripts/organize-datasets.py")
+        return
+
+    from training_data import list_organized_images, sample_key, load_split_manifest
+    from image_decoding import load_image_array
+    from freshness_inference import FreshnessPredictor
+    from inference_latency import measure_latency
+    from quantization import stratified_sample, convert_int8, TFLiteModel, measure_tflite_latency
+
+    model_path = Path(args.model)
+    output_path = Path(args.output) if args.output else model_path.parent / f'{model_path.stem}-int8.tflite'
+    report_path = output_path.with_name(f'{model_path.stem}-int8-report.json')
+
+    predictor = FreshnessPredictor(model_path, args.encoders)
+    print(f"🤖 Float model {model_path} (version {predictor.version})")
+
+    # Calibrate on training images only; accuracy is measured on the held-out test split
+    paths, qualities, fruits = list_organized_images(data_dir)
+    splits = load_split_manifest(data_dir / 'splits.json', [sample_key(path, data_dir) for path in paths], qualities)
+    strata = [f'{quality}/{fruit}' for quality, fruit in zip(qualities, fruits)]
+
+    calibration = stratified_sample(splits['train'], strata, args.calibration_images)
+    test = splits['test']
+    if args.test_images:
+        test = stratified_sample(test, strata, args.test_images)
+    print(f"📊 Calibration: {len(calibration)} images over {len({strata[i] for i in calibration})} classes, "
+          f"test: {len(test)} images")
+
+    calibration_pixels, _ = load_image_array([paths[i] for i in calibration], predictor.img_size, args.decode_workers)
+    test_pixels, kept = load_image_array([paths[i] for i in test], predictor.img_size, args.decode_workers)
+    test = test[kept]
+
+    print("🔢 Converting to int8...")
+    tflite_bytes, float_fallback = convert_int8(predictor.model, calibration_pixels)
+    int8_model = TFLiteModel(tflite_bytes, num_threads=args.threads)
+
+    print("🧪 Evaluating float and int8 models on the test split...")
+    test_qualities = [qualities[i] for i in test]
+    test_fruits = [fruits[i] for i in test]
+    float_metrics, float_calls = evaluate(
+        predictor, lambda pixels: predictor.model.predict_on_batch(pixels.astype(np.float32)),
+        test_pixels, test_qualities, test_fruits
+    )
+    int8_metrics, int8_calls = evaluate(predictor, int8_model.predict_on_batch, test_pixels, test_qualities, test_fruits)
+
+    print("⏱️  Measuring CPU latency...")
+    float_model = {
+        **float_metrics,
+        'bytes': model_size(model_path),
+        'batch1': measure_latency(predictor.model, batch_size=1),
+        'batch32': measure_latency(predictor.model, batch_size=32)
+    }
+    int8 = {
+        **int8_metrics,
+        'bytes': len(tflite_bytes),
+        'float_fallback_ops': float_fallback,
+        'batch1': measure_tflite_latency(int8_model, predictor.img_size, batch_size=1),
+        'batch32': measure_tflite_latency(int8_model, predictor.img_size, batch_size=32)
+    }
+
+    accuracy_drop = float_model['freshness_accuracy'] - int8['freshness_accuracy']
+    published = accuracy_drop <= args.max_accuracy_drop
+    report = {
+        'model': str(model_path),
+        'version': predictor.version,
+        'calibration_images': len(calibration),
+        'test_images': len(test),
+        'float': float_model,
+        'int8': int8,
+        'accuracy_delta': -accuracy_drop,
+        'agreement': float(np.mean(float_calls == int8_calls)),
+        'size_ratio': int8['bytes'] / float_model['bytes'],
+        'max_accuracy_drop': args.max_accuracy_drop,
+        'published': published,
+        'output': str(output_path) if published else None
+    }
+
+    print(f"\n📊 Float vs int8:")
+    print(f"   {'':<20} {'float':>12} {'int8':>12}")
+    print(f"   {'freshness accuracy':<20} {float_model['freshness_accuracy']:>12.2%} {int8['freshness_accuracy']:>12.2%}")
+    if 'fruit_type_accuracy' in float_model:
+        print(f"   {'fruit accuracy':<20} {float_model['fruit_type_accuracy']:>12.2%} {int8['fruit_type_accuracy']:>12.2%}")
+    print(f"   {'size':<20} {float_model['bytes'] / 1024 / 1024:>9.1f} MB {int8['bytes'] / 1024 / 1024:>9.1f} MB")
+    for batch in ('batch1', 'batch32'):
+        print(f"   {batch + ' p50':<20} {float_model[batch]['p50_ms']:>9.1f} ms {int8[batch]['p50_ms']:>9.1f} ms")
+    print(f"   Agreement with the float model: {report['agreement']:.2%}")
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if not published:
+        print(f"\n❌ Accuracy dropped {accuracy_drop:.2%} (limit {args.max_accuracy_drop:.2%}); int8 model not published")
+        print(f"📋 Report saved to: {report_path}")
+        sys.exit(1)
+
+    with open(output_path, 'wb') as f:
+        f.write(tflite_bytes)
+    print(f"\n✅ int8 model saved to: {output_path}")
+    print(f"📋 Report saved to: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Batch-score images with a saved FruitAI freshness model
+Streams images from a directory, a shard set or a JSONL file, decodes them
+across a process pool, predicts in fixed-size batches and writes one JSONL
+result per image; memory stays bounded however many images there are
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+from collections import deque
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+
+def directory_items(directory):
+    """(id, path, labels) for every image under a directory, walked lazily in sorted order"""
+    directory = Path(directory)
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if Path(name).suffix.lower() in IMAGE_EXTENSIONS:
+                path = Path(root) / name
+                yield str(path.relative_to(directory)), str(path), None
+
+
+def shard_items(shard_dir):
+    """(id, encoded bytes, labels) for every record of a shard set, read sequentially"""
+    from dataset_shards import ShardReader
+
+    reader = ShardReader(shard_dir)
+    for record, data in zip(reader.records, reader.iter_bytes()):
+        yield ShardReader.record_key(record), data, {'quality': record['quality'], 'fruit': record['fruit']}
+
+
+def jsonl_items(path):
+    """(id, path or encoded bytes, labels) per line: {"path": ...} or {"image": "<data URL>"}
+
+    Optional "id", "quality" and "fruit" fields are carried into the results.
+    A line that cannot be parsed yields None as its source and gets an error row.
+    """
+    from freshness_inference import decode_data_url
+
+    with open(path, 'r') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                entry = e
+            if not isinstance(entry, dict):
+                print(f"⚠️  Invalid JSON object on line {line_number}: {entry}")
+                yield str(line_number), None, None
+                continue
+            try:
+                source = entry['path'] if 'path' in entry else decode_data_url(entry['image'])
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"⚠️  Invalid image on line {line_number}: {e!r}")
+                source = None
+            labels = {name: entry[name] for name in ('quality', 'fruit') if name in entry} or None
+            yield str(entry.get('id', entry.get('path', line_number))), source, labels
+
+
+class BatchScorer:
+    """Collect decoded images into a fixed batch buffer, predict when it is full and write rows in input order"""
+
+    def __init__(self, predictor, batch_size, output):
+        self.predictor = predictor
+        self.output = output
+        self.pixels = np.empty((batch_size, *predictor.img_size, 3), dtype=np.uint8)
+        self.filled = 0
+        self.pending = []
+        self.scored = 0
+        self.failed = 0
+        self.labeled = 0
+        self.correct = 0
+
+    def add(self, key, image, labels, error='decode failed'):
+        if image is not None:
+            self.pixels[self.filled] = image
+            self.filled += 1
+        self.pending.append((key, labels, None if image is not None else error))
+        if self.filled == len(self.pixels):
+            self.flush()
+
+    def flush(self):
+        results = iter(self.predictor.predict(self.pixels[:self.filled]) if self.filled else [])
+        for key, labels, error in self.pending:
+            if error:
+                self.failed += 1
+                self.write({'id': key, 'error': error, 'model_version': self.predictor.version})
+                continue
+
+            result = next(results)
+            row = {'id': key, **result, 'quality': 'fresh' if result['freshness'] >= 0.5 else 'rotten',
+                   'model_version': self.predictor.version}
+            if labels:
+                row['labels'] = labels
+                if 'quality' in labels:
+                    self.labeled += 1
+                    self.correct += row['quality'] == labels['quality']
+            self.write(row)
+        self.scored += self.filled
+        self.filled = 0
+        self.pending = []
+
+    def write(self, row):
+        self.output.write(json.dumps(row) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score images with a saved freshness model and write JSONL results')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--dir', help='Directory of images (searched recursively)')
+    source.add_argument('--shards', metavar='DIR', help='Shard set written by organize-datasets.py --format shards')
+    source.add_argument('--jsonl', metavar='FILE', help='JSONL file with a "path" or base64 "image" per line')
+    parser.add_argument('--model', default='public/models/freshness_model.keras',
+                        help='Saved model: freshness_model.keras, best_model.h5, fruitai-real-model.keras or fruitai-simple-model')
+    parser.add_argument('--encoders', help='encoders.json of a multi-task model (default: next to the model)')
+    parser.add_argument('--output', required=True, metavar='FILE', help='JSONL results file')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--decode-workers', type=int, default=0,
+                        help='Processes used to decode images (0 = all cores)')
+    parser.add_argument('--decode-chunksize', type=int, default=16,
+                        help='Images handed to a decode worker per task')
+    args = parser.parse_args()
+
+    from image_decoding import iter_decoded_images
+    from freshness_inference import FreshnessPredictor
+
+    predictor = FreshnessPredictor(args.model, args.encoders)
+    print(f"🤖 Model {args.model} (version {predictor.version}, input {predictor.img_size[0]}x{predictor.img_size[1]})")
+
+    if args.dir:
+        items = directory_items(args.dir)
+    elif args.shards:
+        items = shard_items(args.shards)
+    else:
+        items = jsonl_items(args.jsonl)
+
+    # Ids and labels wait here while their images are in the decode pool's bounded window;
+    # entries without a source (malformed JSONL lines) skip the pool and wait in line for an error row
+    pending = deque()
+
+    def sources():
+        for key, source, labels in items:
+            pending.append((key, labels, source is not None))
+            if source is not None:
+                yield source
+
+    def add_invalid(scorer):
+        while pending and not pending[0][2]:
+            key, labels, _ = pending.popleft()
+            scorer.add(key, None, labels, error='invalid entry')
+
+    start = time.perf_counter()
+    with open(args.output, 'w') as output:
+        scorer = BatchScorer(predictor, args.batch_size, output)
+        images = iter_decoded_images(sources(), predictor.img_size, args.decode_workers, args.decode_chunksize)
+        for count, image in enumerate(images, start=1):
+            add_invalid(scorer)
+            key, labels, _ = pending.popleft()
+            scorer.add(key, image, labels)
+            if count % (args.batch_size * 50) == 0:
+                elapsed = time.perf_counter() - start
+                print(f"   {count} images ({count / elapsed:.0f} images/sec)")
+        add_invalid(scorer)
+        scorer.flush()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"✅ Scored {scorer.scored} images in {elapsed:.1f}s ({scorer.scored / elapsed:.0f} images/sec)")
+    if scorer.failed:
+        print(f"⚠️  {scorer.failed} images could not be read or decoded")
+    print(f"📋 Results saved to: {args.output}")
+    if scorer.labeled:
+        print(f"🎯 Freshness accuracy on labeled images: {scorer.correct / scorer.labeled:.2%} "
+              f"({scorer.labeled} images)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Parallel hyperparameter sweep for the FruitAI trainers
+Trains the dense heads on cached backbone embeddings across a process pool,
+prunes trials that fall behind and writes a leaderboard
+"""
+
+import os
+import json
+import time
+import math
+import random
+import argparse
+import itertools
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from embedding_store import stack_training_views
+from trainer_registry import TRAINERS, trainer_class
+from data_layout import reserved_dir
+
+# Searched when no --space file is given; head keys must exist in the trainer's head_config
+DEFAULT_SPACE = {
+    'learning_rate': {'log_uniform': [1e-4, 3e-3]},
+    'batch_size': [16, 32, 64],
+    'dense1_units': [256, 512, 1024],
+    'dropout1': {'uniform': [0.1, 0.5]},
+    'dropout2': {'uniform': [0.1, 0.4]},
+}
+
+TRAINING_PARAMS = ('learning_rate', 'batch_size', 'epochs')
+
+
+def sample_value(spec, rng):
+    """Draw one value: a list is a choice, {'uniform'|'log_uniform'|'int': [lo, hi]} a range"""
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    if isinstance(spec, dict):
+        (kind, (low, high)), = spec.items()
+        if kind == 'uniform':
+            return rng.uniform(low, high)
+        if kind == 'log_uniform':
+            return math.exp(rng.uniform(math.log(low), math.log(high)))
+        if kind == 'int':
+            return rng.randint(low, high)
+        raise ValueError(f"Unknown range type: {kind}")
+    return spec
+
+
+def generate_trials(space, trials, grid, seed):
+    """Every combination of the list-valued parameters (grid) or `trials` random draws"""
+    if grid:
+        names = list(space)
+        choices = [space[name] if isinstance(space[name], list) else [space[name]] for name in names]
+        return [dict(zip(names, values)) for values in itertools.product(*choices)]
+
+    rng = random.Random(seed)
+    return [{name: sample_value(spec, rng) for name, spec in space.items()} for _ in range(trials)]
+
+
+def share_arrays(shared_dir, name, value):
+    """Save an array (or dict of arrays) once as .npy and return the paths to memory-map"""
+    if isinstance(value, dict):
+        return {key: share_arrays(shared_dir, f'{name}-{key}', array) for key, array in value.items()}
+
+    path = shared_dir / f'{name}.npy'
+    np.save(path, np.ascontiguousarray(value))
+    return str(path)
+
+
+def attach_arrays(spec):
+    """Read-only memory maps of arrays saved by share_arrays; pages are shared between trials"""
+    if isinstance(spec, dict):
+        return {key: attach_arrays(path) for key, path in spec.items()}
+    return np.load(spec, mmap_mode='r')
+
+
+def write_json(path, data):
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class MedianPruner:
+    """Prune a trial whose best metric so far is below the median of the other trials at that epoch
+
+    Trials report through their JSON files in trials_dir, so the rule works
+    across worker processes without any shared state beyond the filesystem.
+    """
+
+    def __init__(self, trials_dir, warmup_epochs=3, min_trials=3):
+        self.trials_dir = Path(trials_dir)
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+
+    def should_prune(self, trial_id, epoch, best):
+        if epoch + 1 < self.warmup_epochs:
+            return False
+
+        others = []
+        for path in self.trials_dir.glob('trial-*.json'):
+            if path.stem == f'trial-{trial_id:03d}':
+                continue
+            try:
+                history = json.loads(path.read_text())['history']
+            except (OSError, ValueError, KeyError):
+                continue
+            if len(history) > epoch:
+                others.append(max(history[:epoch + 1]))
+
+        return len(others) >= self.min_trials and best < float(np.median(others))
+
+
+def configure_worker(threads):
+    """Split the cores between trials instead of letting every TF runtime claim all of them"""
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_trial(trial_id, params, context):
+    """Train one head configuration on the shared embeddings and return its leaderboard row"""
+    from tensorflow import keras
+    from training_data import IndexedBatchSequence
+
+    metric = TRAINERS[context['trainer']]['metric']
+    trials_dir = Path(context['trials_dir'])
+    trial_path = trials_dir / f'trial-{trial_id:03d}.json'
+    record = {'trial': trial_id, 'params': params, 'history': [], 'status': 'running'}
+    write_json(trial_path, record)
+
+    pruner = MedianPruner(trials_dir, context['warmup_epochs'], context['min_trials'])
+
+    class TrialReporter(keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            record['history'].append(float(logs[metric]))
+            write_json(trial_path, record)
+            if pruner.should_prune(trial_id, epoch, max(record['history'])):
+                record['status'] = 'pruned'
+                self.model.stop_training = True
+
+    try:
+        trainer = trainer_class(context['trainer'])(autotuned=False)
+        trainer.num_fruit_classes = context['num_fruit_classes']
+        trainer.head_config.update({name: value for name, value in params.items() if name in trainer.head_config})
+        batch_size = int(params.get('batch_size', trainer.batch_size))
+        epochs = int(params.get('epochs', trainer.epochs))
+        learning_rate = float(params.get('learning_rate', trainer.learning_rate))
+
+        data = attach_arrays(context['data'])
+        inputs = keras.Input(shape=(data['x_train'].shape[1],))
+        model = keras.Model(inputs, trainer.build_head()(inputs), name=f'trial_{trial_id}')
+        trainer.compile_model(model, learning_rate=learning_rate)
+
+        def batches(split, shuffle=False):
+            x, y = data[f'x_{split}'], data[f'y_{split}']
+            return IndexedBatchSequence(x, y, np.arange(len(x)), batch_size, shuffle=shuffle, seed=trial_id)
+
+        start = time.perf_counter()
+        model.fit(
+            batches('train', shuffle=True),
+            validation_data=batches('val'),
+            epochs=epochs,
+            callbacks=[
+                keras.callbacks.EarlyStopping(monitor=metric, patience=context['patience'], restore_best_weights=True),
+                TrialReporter()
+            ],
+            verbose=0
+        )
+        train_seconds = time.perf_counter() - start
+
+        test = model.evaluate(batches('test'), verbose=0, return_dict=True)
+        weights_path = trials_dir / f'trial-{trial_id:03d}.weights.h5'
+        model.save_weights(str(weights_path))
+
+        if record['status'] == 'running':
+            record['status'] = 'completed'
+        record.update({
+            'val_accuracy': max(record['history']),
+            'test_accuracy': float(test[metric[len('val_'):]]),
+            'epochs_run': len(record['history']),
+            'train_seconds': train_seconds,
+            'head_parameters': int(model.count_params()),
+            'model_parameters': int(model.count_params()) + context['backbone_parameters'],
+            'head_size_kb': weights_path.stat().st_size / 1024
+        })
+    except Exception as e:
+        record.update({'status': 'failed', 'error': str(e)})
+
+    write_json(trial_path, record)
+    return record
+
+
+def prepare_shared_data(args, shared_dir):
+    """Load the dataset once, embed what is missing and save the splits for memory-mapping"""
+    trainer = trainer_class(args.trainer)(
+        use_cache=args.cache, shard_dir=args.shards, feature_views=args.feature_views,
+        decode_workers=args.decode_workers, autotuned=False
+    )
+    trainer.load_dataset()
+    trainer.create_model()
+
+    splits, embeddings, augmented = trainer.load_features()
+    x_train, repeats = stack_training_views(embeddings, augmented, splits['train'])
+
+    shared_dir.mkdir(parents=True, exist_ok=True)
+    data = {
+        'x_train': share_arrays(shared_dir, 'x_train', x_train),
+        'y_train': share_arrays(shared_dir, 'y_train', trainer.head_targets(splits['train'], repeats)),
+    }
+    for split in ('val', 'test'):
+        data[f'x_{split}'] = share_arrays(shared_dir, f'x_{split}', embeddings[splits[split]])
+        data[f'y_{split}'] = share_arrays(shared_dir, f'y_{split}', trainer.head_targets(splits[split]))
+
+    return trainer, data
+
+
+def print_leaderboard(rows, metric, top=10):
+    print(f"\n🏆 Leaderboard ({metric}):")
+    print(f"   {'#':>3} {'trial':>5} {'val':>7} {'test':>7} {'time':>7} {'head KB':>8}  status     params")
+    for rank, row in enumerate(rows[:top], start=1):
+        params = ', '.join(f"{name}={value:.3g}" if isinstance(value, float) else f"{name}={value}"
+                           for name, value in row['params'].items())
+        if row['status'] == 'failed':
+            print(f"   {rank:>3} {row['trial']:>5} {'-':>7} {'-':>7} {'-':>7} {'-':>8}  failed     {params}")
+            continue
+        print(f"   {rank:>3} {row['trial']:>5} {row['val_accuracy']:>7.4f} {row['test_accuracy']:>7.4f} "
+              f"{row['train_seconds']:>6.1f}s {row['head_size_kb']:>8.0f}  {row['status']:<10} {params}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep FruitAI head hyperparameters on cached embeddings')
+    parser.add_argument('--trainer', choices=sorted(TRAINERS), default='real',
+                        help='Trainer whose head, targets and backbone embeddings are used')
+    parser.add_argument('--space', metavar='JSON',
+                        help='Search space file: {"param": [choices] | {"uniform"|"log_uniform"|"int": [lo, hi]}}')
+    parser.add_argument('--trials', type=int, default=16, help='Random trials to sample')
+    parser.add_argument('--grid', action='store_true', help='Run every combination of list-valued parameters instead')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help='Trials trained in parallel')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--patience', type=int, default=5, help='Early-stopping patience per trial')
+    parser.add_argument('--warmup-epochs', type=int, default=3, help='Epochs before a trial can be pruned')
+    parser.add_argument('--min-trials', type=int, default=3, help='Reported trials needed before pruning')
+    parser.add_argument('--output-dir', help='Sweep directory (default: real-training-data/sweeps/<trainer>)')
+    loading = parser.add_mutually_exclusive_group()
+    loading.add_argument('--cache', action='store_true',
+                         help='Load resized uint8 pixels from the memory-mapped preprocessing cache')
+    loading.add_argument('--shards', metavar='DIR',
+                         help='Read images from shard files written by organize-datasets.py --format shards')
+    parser.add_argument('--feature-views', type=int, default=0,
+                        help='Augmented views per image to embed alongside the clean one')
+    parser.add_argument('--decode-workers', type=int, default=1,
+                        help='Processes used to decode JPEGs (0 = all cores)')
+    args = parser.parse_args()
+
+    print("🔬 FruitAI Hyperparameter Sweep")
+    print("===============================")
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space, 'r') as f:
+            space = json.load(f)
+
+    output_dir = Path(args.output_dir or reserved_dir('sweeps') / args.trainer)
+    trials_dir = output_dir / 'trials'
+    trials_dir.mkdir(parents=True, exist_ok=True)
+    for old_trial in trials_dir.glob('trial-*'):
+        old_trial.unlink()
+
+    trainer, data = prepare_shared_data(args, output_dir / 'shared')
+
+    unknown = set(space) - set(TRAINING_PARAMS) - set(trainer.head_config)
+    if unknown:
+        parser.error(f"Unknown parameters for the {args.trainer} trainer: {', '.join(sorted(unknown))} "
+                     f"(head parameters: {', '.join(trainer.head_config)})")
+
+    trials = generate_trials(space, args.trials, args.grid, args.seed)
+    metric = TRAINERS[args.trainer]['metric']
+    context = {
+        'trainer': args.trainer,
+        'data': data,
+        'trials_dir': str(trials_dir),
+        'num_fruit_classes': trainer.num_fruit_classes if hasattr(trainer, 'num_fruit_classes') else 0,
+        'backbone_parameters': int(trainer.feature_extractor.count_params()),
+        'patience': args.patience,
+        'warmup_epochs': args.warmup_epochs,
+        'min_trials': args.min_trials,
+    }
+    # The parent's TF runtime is done; free its memory before the workers start
+    del trainer
+
+    workers = min(args.workers, len(trials))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🚀 Running {len(trials)} trials on {workers} workers ({threads} threads each)...")
+
+    start = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                             initializer=configure_worker, initargs=(threads,)) as pool:
+        futures = [pool.submit(run_trial, trial_id, params, context) for trial_id, params in enumerate(trials)]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            result = f"{row['val_accuracy']:.4f}" if 'val_accuracy' in row else row.get('error', '')
+            print(f"   Trial {row['trial']:>3} {row['status']}: {result} ({len(rows)}/{len(trials)})")
+
+    rows.sort(key=lambda row: row.get('val_accuracy', -1.0), reverse=True)
+    leaderboard = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'trainer': args.trainer,
+        'metric': metric,
+        'search_space': space,
+        'sweep_seconds': time.perf_counter() - start,
+        'trials': rows
+    }
+    write_json(output_dir / 'leaderboard.json', leaderboard)
+
+    print_leaderboard(rows, metric)
+    print(f"\n✅ Leaderboard saved to: {output_dir / 'leaderboard.json'}")
+    if rows and 'val_accuracy' in rows[0]:
+        best_trial = rows[0]['trial']
+        print(f"   Best weights: {trials_dir / f'trial-{best_trial:03d}.weights.h5'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+TF.js export for the FruitAI models
+Writes quantized, sharded TF.js artifacts whose shard files are named and
+recorded by content hash, so browsers can cache them indefinitely and only
+model.json needs revalidating
+"""
+
+import json
+import time
+import shutil
+import hashlib
+import numpy as np
+from pathlib import Path
+
+# Weight quantization per variant: tensorflowjs quantization_dtype_map, None = float32 weights
+QUANTIZATION = {
+    'float32': None,
+    'float16': {'float16': '*'},
+    'uint8': {'uint8': '*'},
+}
+
+DEFAULT_SHARD_BYTES = 4 * 1024 * 1024
+
+
+def hash_shards(artifacts_dir):
+    """Rename every weight shard to include its sha256 and record the hashes in model.json"""
+    artifacts_dir = Path(artifacts_dir)
+    manifest_path = artifacts_dir / 'model.json'
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+
+    for group in manifest['weightsManifest']:
+        paths, hashes = [], []
+        for name in group['paths']:
+            digest = hashlib.sha256((artifacts_dir / name).read_bytes()).hexdigest()
+            hashed_name = f'{Path(name).stem}.{digest[:16]}{Path(name).suffix}'
+            (artifacts_dir / name).rename(artifacts_dir / hashed_name)
+            paths.append(hashed_name)
+            hashes.append(digest)
+        group['paths'] = paths
+        group['sha256'] = hashes
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def export_tfjs(model, artifacts_dir, quantization='float32', shard_bytes=DEFAULT_SHARD_BYTES):
+    """Export a Keras model to TF.js and return a summary of the written artifacts
+
+    The directory is emptied first so shards of an earlier export never linger.
+    """
+    import tensorflowjs as tfjs
+
+    artifacts_dir = Path(artifacts_dir)
+    if artifacts_dir.exists():
+        shutil.rmtree(artifacts_dir)
+
+    tfjs.converters.save_keras_model(
+        model, str(artifacts_dir),
+        quantization_dtype_map=QUANTIZATION[quantization],
+        weight_shard_size_bytes=shard_bytes
+    )
+    manifest = hash_shards(artifacts_dir)
+
+    shards = [name for group in manifest['weightsManifest'] for name in group['paths']]
+    return {
+        'quantization': quantization,
+        'shard_bytes': shard_bytes,
+        'shards': len(shards),
+        'model_json_bytes': (artifacts_dir / 'model.json').stat().st_size,
+        'weights_bytes': sum((artifacts_dir / name).stat().st_size for name in shards),
+        'bytes': sum(file.stat().st_size for file in artifacts_dir.iterdir() if file.is_file())
+    }
+
+
+def measure_tfjs_load(artifacts_dir, loads=3):
+    """Load TF.js artifacts back into Keras (as a browser would: parse, fetch shards, dequantize)
+
+    Returns (model, median load time in ms).
+    """
+    import tensorflowjs as tfjs
+
+    timings = []
+    for _ in range(loads):
+        start = time.perf_counter()
+        model = tfjs.converters.load_keras_model(str(Path(artifacts_dir) / 'model.json'))
+        timings.append((time.perf_counter() - start) * 1000)
+    return model, float(np.median(timings))
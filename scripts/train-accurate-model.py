@@ -6,201 +6,136 @@ Focus on distinguishing fresh vs rotten with high accuracy
 
 import os
 import json
+import argparse
 import numpy as np
 from pathlib import Path
 from PIL import Image
 import tensorflow as tf
 from tensorflow import keras
-from tensorflow.keras import layers, applications
-from sklearn.model_selection import train_test_split
+from tensorflow.keras import layers
 from sklearn.metrics import classification_report, confusion_matrix
 import matplotlib.pyplot as plt
+from training_data import make_augmenter, IndexedBatchSequence
+from inference_latency import augmentation_latency_report
+from progressive_resizing import parse_sizes
+from distributed_training import parse_workers
+from backbones import BACKBONES, backbone_display_name
+from freshness_trainer import FreshnessTrainer
+from data_layout import reserved_dir
+from distillation import (
+    cache_teacher_logits, distillation_targets, distillation_loss, hard_label_accuracy, teacher_agreement
+)
 
-class AccurateFreshnessTrainer:
-    def __init__(self):
-        self.base_dir = Path('real-training-data/organized')
-        self.model_dir = Path('public/models')
-        self.img_size = (224, 224)
-        self.batch_size = 16
+class AccurateFreshnessTrainer(FreshnessTrainer):
+    def __init__(self, backbone='resnet50', **options):
+        super().__init__(backbone, **options)
+        self.batch_size = self.tuned_batch_size(16)
         self.epochs = 30
         
-    def load_dataset(self):
-        """Load the organized dataset"""
-        print("📂 Loading dataset...")
-        
-        images = []
-        labels = []
-        fruit_types = []
-        
-        label_map = {'fresh': 1, 'rotten': 0}
-        
-        for quality_dir in self.base_dir.iterdir():
-            if not quality_dir.is_dir():
-                continue
-                
-            quality = quality_dir.name
-            quality_label = label_map.get(quality, 0)
-            
-            print(f"   Loading {quality} images...")
-            
-            for fruit_dir in quality_dir.iterdir():
-                if not fruit_dir.is_dir():
-                    continue
-                    
-                fruit = fruit_dir.name
-                for img_path in fruit_dir.glob('*.jpg'):
-                    try:
-                        # Load and preprocess image
-                        img = Image.open(img_path)
-                        img = img.convert('RGB')
-                        img = img.resize(self.img_size)
-                        img_array = np.array(img) / 255.0
-                        
-                        images.append(img_array)
-                        labels.append(quality_label)
-                        fruit_types.append(fruit)
-                        
-                    except Exception as e:
-                        print(f"⚠️  Failed to load {img_path}: {e}")
-        
-        self.images = np.array(images)
-        self.labels = np.array(labels)
-        self.fruit_types = np.array(fruit_types)
-        
-        print(f"✅ Dataset loaded: {len(self.images)} images")
-        print(f"   Fresh: {np.sum(self.labels == 1)}")
-        print(f"   Rotten: {np.sum(self.labels == 0)}")
-        
-    def create_model(self):
-        """Create an accurate freshness detection model"""
-        print("🤖 Creating high-accuracy model...")
-        
-        # Use ResNet50 as backbone (proven for image classification)
-        base_model = applications.ResNet50(
-            weights='imagenet',
-            include_top=False,
-            input_shape=(*self.img_size, 3)
-        )
+        # Classification head sizes and dropout rates (searched by sweep-hyperparameters.py)
+        self.head_config = {
+            'dense1_units': 512,
+            'dropout1': 0.5,
+            'dense2_units': 256,
+            'dropout2': 0.3,
+            'dense3_units': 128,
+            'dropout3': 0.2
+        }
         
-        # Freeze base model
-        base_model.trainable = False
+        self.augmenter = make_augmenter(rotation=0.15, zoom=0.15)
+        self.checkpoint_dir = reserved_dir('checkpoints') / 'accurate-model'
         
-        # Build model
-        inputs = keras.Input(shape=(*self.img_size, 3))
+        # Early stopping, LR reduction and best-model checkpointing watch validation accuracy
+        self.monitor = 'val_accuracy'
+        self.lr_factor = 0.3
+        self.lr_patience = 4
+        self.best_model_name = 'best_freshness_model.keras'
+        self.production_model_name = 'freshness_model.keras'
         
-        # Data augmentation for better generalization
-        augmented = keras.Sequential([
-            layers.RandomFlip("horizontal"),
-            layers.RandomRotation(0.15),
-            layers.RandomZoom(0.15),
-            layers.RandomBrightness(0.2),
-            layers.RandomContrast(0.2),
-        ])(inputs)
-        
-        # Feature extraction
-        features = base_model(augmented, training=False)
-        pooled = layers.GlobalAveragePooling2D()(features)
-        
-        # Classification head
-        x = layers.Dense(512, activation='relu')(pooled)
-        x = layers.BatchNormalization()(x)
-        x = layers.Dropout(0.5)(x)
-        
-        x = layers.Dense(256, activation='relu')(x)
-        x = layers.BatchNormalization()(x)
-        x = layers.Dropout(0.3)(x)
+        # Staged fine-tuning of the backbone
+        self.fine_tune_learning_rate = 0.0001 * self.lr_scale
+        self.fine_tune_epochs_per_stage = 3
         
-        x = layers.Dense(128, activation='relu')(x)
-        x = layers.Dropout(0.2)(x)
+        self.report_prefix = 'freshness-model'
+        self.model_name = 'FruitFreshnessClassifier'
         
-        # Output layer (binary classification: fresh=1, rotten=0)
-        outputs = layers.Dense(1, activation='sigmoid', name='freshness')(x)
+        # The simple JavaScript model is distilled from the full model: weight of the hard
+        # labels in the loss (1.0 = plain label training) and softening temperature
+        self.distill_alpha = 0.3
+        self.distill_temperature = 4.0
+        self.simple_epochs = 10
         
-        self.model = keras.Model(inputs, outputs, name='FruitFreshnessClassifier')
+        self.label_map = {'fresh': 1, 'rotten': 0}
         
-        # Compile with appropriate metrics
-        self.model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=0.001),
+    def encode_labels(self, quality_labels, fruit_labels):
+        """Map qualities to binary freshness labels"""
+        self.labels = np.array([self.label_map.get(quality, 0) for quality in quality_labels])
+        self.fruit_types = np.array(fruit_labels)
+    
+    def describe_labels(self):
+        print(f"   Fresh: {np.sum(self.labels == 1)}")
+        print(f"   Rotten: {np.sum(self.labels == 0)}")
+    
+    def targets(self):
+        return self.labels
+    
+    def compile_model(self, model, learning_rate):
+        """Compile a binary freshness classifier"""
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
             loss='binary_crossentropy',
             metrics=['accuracy', 'precision', 'recall']
         )
+    
+    def build_head(self):
+        """Create the classification head layers once and return a function that applies them
+
+        Applying the same layers to the backbone output and to a plain embedding
+        input lets the head be trained on cached embeddings and reused as-is in
+        the full model.
+        """
+        config = self.head_config
+        head_layers = [
+            layers.Dense(config['dense1_units'], activation='relu'),
+            layers.BatchNormalization(),
+            layers.Dropout(config['dropout1']),
+            
+            layers.Dense(config['dense2_units'], activation='relu'),
+            layers.BatchNormalization(),
+            layers.Dropout(config['dropout2']),
+            
+            layers.Dense(config['dense3_units'], activation='relu'),
+            layers.Dropout(config['dropout3']),
+            
+            # Output layer (binary classification: fresh=1, rotten=0)
+            layers.Dense(1, activation='sigmoid', name='freshness'),
+        ]
         
-        print("✅ Model created")
-        self.model.summary()
-        
-    def train_model(self):
-        """Train the model for high accuracy"""
-        print("🚀 Training model for maximum accuracy...")
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            self.images, self.labels, 
-            test_size=0.2, 
-            random_state=42, 
-            stratify=self.labels
-        )
-        
-        X_train, X_val, y_train, y_val = train_test_split(
-            X_train, y_train,
-            test_size=0.2,
-            random_state=42,
-            stratify=y_train
-        )
+        def head(x):
+            for layer in head_layers:
+                x = layer(x)
+            return x
         
-        print(f"📊 Data split:")
-        print(f"   Training: {len(X_train)} images")
-        print(f"   Validation: {len(X_val)} images") 
-        print(f"   Test: {len(X_test)} images")
-        
-        # Callbacks for best performance
-        callbacks = [
-            keras.callbacks.EarlyStopping(
-                monitor='val_accuracy',
-                patience=8,
-                restore_best_weights=True,
-                verbose=1
-            ),
-            keras.callbacks.ReduceLROnPlateau(
-                monitor='val_accuracy',
-                factor=0.3,
-                patience=4,
-                min_lr=1e-7,
-                verbose=1
-            ),
-            keras.callbacks.ModelCheckpoint(
-                str(self.model_dir / 'best_freshness_model.keras'),
-                monitor='val_accuracy',
-                save_best_only=True,
-                verbose=1
-            )
-        ]
+        return head
         
-        # Train
-        history = self.model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
-            epochs=self.epochs,
-            batch_size=self.batch_size,
-            callbacks=callbacks,
-            verbose=1
-        )
+    def report_results(self, results):
+        """Print accuracy, precision and recall and return accuracy"""
+        print("\n📊 Detailed Results:")
+        print(f"   Accuracy: {results['accuracy']:.4f} ({results['accuracy']*100:.2f}%)")
+        print(f"   Precision: {results['precision']:.4f}")
+        print(f"   Recall: {results['recall']:.4f}")
         
-        # Evaluate on test set
-        print("\n🧪 Final evaluation on test set:")
-        test_loss, test_accuracy, test_precision, test_recall = self.model.evaluate(
-            X_test, y_test, verbose=1
-        )
+        return results['accuracy']
+    
+    def evaluate_test(self):
+        """Evaluate on the test set with a classification report and confusion matrix"""
+        test_accuracy = super().evaluate_test()
         
         # Detailed predictions
-        y_pred = self.model.predict(X_test)
+        y_test = self.labels[self.splits['test']]
+        y_pred = self.model.predict(self.split_data('test'))
         y_pred_binary = (y_pred > 0.5).astype(int).flatten()
         
-        # Classification report
-        print("\n📊 Detailed Results:")
-        print(f"   Accuracy: {test_accuracy:.4f} ({test_accuracy*100:.2f}%)")
-        print(f"   Precision: {test_precision:.4f}")
-        print(f"   Recall: {test_recall:.4f}")
-        
         print("\n📋 Classification Report:")
         print(classification_report(y_test, y_pred_binary, 
                                    target_names=['Rotten', 'Fresh']))
@@ -212,36 +147,71 @@ class AccurateFreshnessTrainer:
         print(f"Rotten      {cm[0,0]:3d}    {cm[0,1]:3d}")
         print(f"Fresh       {cm[1,0]:3d}    {cm[1,1]:3d}")
         
-        return history, test_accuracy
+        return test_accuracy
+        
+    def create_simple_model(self):
+        """Small CNN for the browser: (logits model for training, sigmoid model for export)"""
+        inputs = keras.Input(shape=(*self.img_size, 3))
+        x = layers.Rescaling(1./255)(inputs)
+        x = layers.Conv2D(32, 3, activation='relu')(x)
+        x = layers.MaxPooling2D()(x)
+        x = layers.Conv2D(64, 3, activation='relu')(x)
+        x = layers.MaxPooling2D()(x)
+        x = layers.Conv2D(128, 3, activation='relu')(x)
+        x = layers.MaxPooling2D()(x)
+        x = layers.GlobalAveragePooling2D()(x)
+        x = layers.Dense(128, activation='relu')(x)
+        x = layers.Dropout(0.3)(x)
+        logits = layers.Dense(1, name='logits')(x)
+        outputs = layers.Activation('sigmoid', name='freshness')(logits)
+        
+        return keras.Model(inputs, logits, name='SimpleStudent'), keras.Model(inputs, outputs, name='SimpleFreshnessModel')
     
-    def fine_tune_model(self):
-        """Fine-tune the model for even better accuracy"""
-        print("🔧 Fine-tuning for maximum accuracy...")
-        
-        # Unfreeze some layers
-        base_model = None
-        for layer in self.model.layers:
-            if isinstance(layer, keras.Model) and 'resnet' in layer.name.lower():
-                base_model = layer
-                break
-        
-        if base_model:
-            base_model.trainable = True
-            
-            # Fine-tune from this layer onwards  
-            fine_tune_at = len(base_model.layers) - 20
-            
-            for layer in base_model.layers[:fine_tune_at]:
-                layer.trainable = False
-            
-            # Lower learning rate for fine-tuning
-            self.model.compile(
-                optimizer=keras.optimizers.Adam(learning_rate=0.0001),
-                loss='binary_crossentropy',
-                metrics=['accuracy', 'precision', 'recall']
-            )
-            
-            print("✅ Model prepared for fine-tuning")
+    def distill_simple_model(self, teacher):
+        """Train the simple model against cached teacher logits and hard labels; return (model, report)"""
+        print("🔄 Distilling lightweight model for JavaScript...")
+        
+        # Teacher predictions are made once per image and teacher version, then reused
+        teacher_logits = cache_teacher_logits(
+            self.feature_dir, self.backbone, teacher, self.content_hashes(),
+            lambda indices: teacher.predict(self.sample_data(indices), verbose=0)
+        )
+        targets = distillation_targets(self.labels, teacher_logits)
+        
+        student, simple_model = self.create_simple_model()
+        student.compile(
+            optimizer='adam',
+            loss=distillation_loss(self.distill_temperature, self.distill_alpha),
+            metrics=[hard_label_accuracy]
+        )
+        
+        def batches(split, shuffle=False):
+            return IndexedBatchSequence(self.images, targets, self.splits[split], 32, shuffle=shuffle)
+        
+        # Quick training on the shared split, same budget as before
+        student.fit(batches('train', shuffle=True), validation_data=batches('val'), epochs=self.simple_epochs, verbose=0)
+        
+        test = self.splits['test']
+        student_probabilities = simple_model.predict(
+            IndexedBatchSequence(self.images, self.labels, test, 32), verbose=0
+        ).reshape(-1)
+        student_accuracy = float(np.mean((student_probabilities > 0.5) == self.labels[test]))
+        teacher_accuracy = float(np.mean((teacher_logits[test] > 0) == self.labels[test]))
+        
+        report = {
+            'temperature': self.distill_temperature,
+            'alpha': self.distill_alpha,
+            'epochs': self.simple_epochs,
+            'teacher_accuracy': teacher_accuracy,
+            'student_accuracy': student_accuracy,
+            'teacher_agreement': teacher_agreement(teacher_logits[test], student_probabilities),
+            'teacher_parameters': int(teacher.count_params()),
+            'student_parameters': int(simple_model.count_params())
+        }
+        print(f"   Teacher {teacher_accuracy:.2%} -> student {student_accuracy:.2%} "
+              f"({report['teacher_agreement']:.2%} agreement, T={self.distill_temperature}, alpha={self.distill_alpha})")
+        
+        return simple_model, report
         
     def save_model_for_javascript(self):
         """Save model in a format that can be used with JavaScript"""
@@ -249,41 +219,22 @@ class AccurateFreshnessTrainer:
         
         self.model_dir.mkdir(parents=True, exist_ok=True)
         
-        # Save in Keras format first
-        keras_model_path = self.model_dir / 'freshness_model.keras'
-        self.model.save(keras_model_path)
-        
-        # Create a simple JavaScript-compatible model
-        simple_model = keras.Sequential([
-            layers.Input(shape=(*self.img_size, 3)),
-            layers.Rescaling(1./255),
-            layers.Conv2D(32, 3, activation='relu'),
-            layers.MaxPooling2D(),
-            layers.Conv2D(64, 3, activation='relu'),
-            layers.MaxPooling2D(),
-            layers.Conv2D(128, 3, activation='relu'),
-            layers.MaxPooling2D(),
-            layers.GlobalAveragePooling2D(),
-            layers.Dense(128, activation='relu'),
-            layers.Dropout(0.3),
-            layers.Dense(1, activation='sigmoid')
-        ])
-        
-        # Train the simple model on our data
-        print("🔄 Training lightweight model for JavaScript...")
-        simple_model.compile(
-            optimizer='adam',
-            loss='binary_crossentropy',
-            metrics=['accuracy']
-        )
+        # Save in Keras format first (with a fixed input size)
+        keras_model_path = self.model_dir / self.production_model_name
+        export_model = self.export_model()
+        export_model.save(keras_model_path)
         
-        # Quick training
-        X_train, X_test, y_train, y_test = train_test_split(
-            self.images, self.labels, test_size=0.2, random_state=42
-        )
+        if self.pipeline_augmentation:
+            # Show what dropping the augmentation ops saves at inference time
+            latency = augmentation_latency_report(export_model, self.augmenter)
+            with open(self.model_dir / 'freshness-model-latency.json', 'w') as f:
+                json.dump(latency, f, indent=2)
         
-        simple_model.fit(X_train, y_train, epochs=10, verbose=0)
-        simple_accuracy = simple_model.evaluate(X_test, y_test, verbose=0)[1]
+        # Distill the full model into a simple JavaScript-compatible model
+        simple_model, distillation = self.distill_simple_model(export_model)
+        simple_accuracy = distillation['student_accuracy']
+        with open(self.model_dir / 'fruitai-simple-model-distillation.json', 'w') as f:
+            json.dump(distillation, f, indent=2)
         
         # Save simple model
         simple_model.save(str(self.model_dir / 'fruitai-simple-model'))
@@ -297,9 +248,12 @@ class AccurateFreshnessTrainer:
         metadata = {
             'version': '2.1.0',
             'created': '2025-01-29',
-            'architecture': 'ResNet50 + Custom Head',
-            'simple_architecture': 'Lightweight CNN',
+            'architecture': f'{backbone_display_name(self.backbone)} + Custom Head',
+            'backbone': self.backbone,
+            'simple_architecture': 'Lightweight CNN (distilled)' if self.distill_alpha < 1 else 'Lightweight CNN',
             'input_size': list(self.img_size),
+            'input_range': [0, 255],  # Raw RGB pixels; normalization is part of both models
+            'augmentation': 'input-pipeline' if self.pipeline_augmentation else 'in-model',
             'classes': ['rotten', 'fresh'],
             'description': 'High-accuracy fruit freshness detection model'
         }
@@ -310,39 +264,103 @@ class AccurateFreshnessTrainer:
         return simple_accuracy
 
 def main():
+    parser = argparse.ArgumentParser(description='Train the high-accuracy FruitAI freshness model')
+    loading = parser.add_mutually_exclusive_group()
+    loading.add_argument('--cache', action='store_true',
+                         help='Load resized uint8 pixels from the memory-mapped preprocessing cache')
+    loading.add_argument('--shards', metavar='DIR',
+                         help='Read images from shard files written by organize-datasets.py --format shards')
+    parser.add_argument('--distill-temperature', type=float, default=4.0,
+                        help='Temperature that softens the teacher predictions for the simple model')
+    parser.add_argument('--distill-alpha', type=float, default=0.3,
+                        help='Weight of the hard labels in the simple model loss (1.0 = no distillation)')
+    parser.add_argument('--backbone', choices=sorted(BACKBONES), default='resnet50',
+                        help='Pretrained backbone from the registry in backbones.py')
+    parser.add_argument('--pipeline-augmentation', action='store_true',
+                        help='Augment in the tf.data pipeline and export an inference-only model')
+    parser.add_argument('--feature-cache', action='store_true',
+                        help='Embed only new or changed images with the frozen backbone and train only the head on them')
+    parser.add_argument('--feature-views', type=int, default=0,
+                        help='Augmented views per image to embed alongside the clean one (with --feature-cache)')
+    parser.add_argument('--fine-tune-minutes', type=float,
+                        help='Wall-clock budget for staged fine-tuning')
+    parser.add_argument('--fine-tune-steps', type=int,
+                        help='Training step budget for staged fine-tuning')
+    parser.add_argument('--progressive', metavar='SIZES',
+                        help='Progressive-resolution schedule, e.g. 128,160,224 (last phase runs at 224)')
+    parser.add_argument('--workers', metavar='HOST:PORT,...',
+                        help='Train data-parallel across these workers (same list on every worker; see launch-workers.py)')
+    parser.add_argument('--task-index', type=int, default=0,
+                        help='Index of this process in --workers; worker 0 is the chief')
+    parser.add_argument('--no-autotune', action='store_true',
+                        help="Ignore this host's settings from autotune-training.py")
+    parser.add_argument('--warm-start', action='store_true',
+                        help='Continue from the model in public/models (adding any new classes) instead of ImageNet weights')
+    parser.add_argument('--telemetry', metavar='DIR',
+                        help='Write per-step input wait/compute timings, a Chrome trace and a bottleneck summary to DIR')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the last checkpoint in real-training-data/checkpoints/accurate-model')
+    parser.add_argument('--decode-workers', type=int, default=1,
+                        help='Processes used to decode JPEGs (0 = all cores)')
+    parser.add_argument('--decode-chunksize', type=int, default=64,
+                        help='Images handed to a decode worker per task')
+    args = parser.parse_args()
+    if args.workers and args.feature_cache:
+        parser.error('--feature-cache trains a small head locally and cannot be combined with --workers')
+    if args.workers and args.telemetry:
+        parser.error('--telemetry times a single process and cannot be combined with --workers')
+    
     print("🍎 FruitAI High-Accuracy Training")
     print("=================================")
     
     # Check if dataset exists
-    data_dir = Path('real-training-data/organized')
+    data_dir = Path(args.shards or reserved_dir('organized'))
     if not data_dir.exists():
         print("❌ Dataset not found!")
         print("   Please run: python3 scripts/download-fresh-rotten-dataset.py")
         return
     
-    trainer = AccurateFreshnessTrainer()
+    trainer = AccurateFreshnessTrainer(
+        backbone=args.backbone,
+        use_cache=args.cache,
+        decode_workers=args.decode_workers,
+        decode_chunksize=args.decode_chunksize,
+        shard_dir=args.shards,
+        pipeline_augmentation=args.pipeline_augmentation,
+        feature_views=args.feature_views,
+        resume=args.resume,
+        progressive_sizes=parse_sizes(args.progressive) if args.progressive else None,
+        workers=parse_workers(args.workers) if args.workers else None,
+        task_index=args.task_index,
+        autotuned=not args.no_autotune,
+        telemetry_dir=args.telemetry
+    )
+    trainer.distill_temperature = args.distill_temperature
+    trainer.distill_alpha = args.distill_alpha
     
     try:
         # Load data and train
         trainer.load_dataset()
         trainer.create_model()
-        history, accuracy = trainer.train_model()
+        if args.warm_start:
+            trainer.warm_start()
+        if args.feature_cache:
+            history, accuracy = trainer.train_head_on_features()
+        else:
+            history, accuracy = trainer.train_model()
         
         # Fine-tune if needed
         if accuracy < 0.95:
             print(f"\n🔄 Accuracy ({accuracy:.2%}) can be improved, fine-tuning...")
-            trainer.fine_tune_model()
-            
-            # Continue training with fine-tuning
-            X_train, X_test, y_train, y_test = train_test_split(
-                trainer.images, trainer.labels, test_size=0.2, random_state=42
-            )
-            
-            trainer.model.fit(X_train, y_train, epochs=5, verbose=1)
-            final_accuracy = trainer.model.evaluate(X_test, y_test)[1]
+            final_accuracy = trainer.fine_tune_model(args.fine_tune_minutes, args.fine_tune_steps)
             print(f"   Fine-tuned accuracy: {final_accuracy:.2%}")
             accuracy = final_accuracy
         
+        # Only the chief exports; the other workers are done once training is
+        if not trainer.is_chief:
+            print(f"✅ Worker {args.task_index} finished at {accuracy:.2%}; the chief saves the model")
+            return
+        
         # Save models
         simple_accuracy = trainer.save_model_for_javascript()
         
@@ -364,6 +382,9 @@ def main():
         print(f"❌ Training failed: {e}")
         import traceback
         traceback.print_exc()
+        if args.workers:
+            # Let launch-workers.py stop the workers waiting on this one
+            raise SystemExit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,25 +6,61 @@ This script creates a production-ready model for accurate freshness detection
 
 import os
 import json
+import argparse
 import numpy as np
-from pathlib import Path
 from PIL import Image
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 import matplotlib.pyplot as plt
 from collections import defaultdict
+from training_data import make_augmenter
+from inference_latency import augmentation_latency_report
+from progressive_resizing import parse_sizes
+from distributed_training import parse_workers
+from backbones import BACKBONES, backbone_display_name
+from freshness_trainer import FreshnessTrainer
+from data_layout import reserved_dir
+from tfjs_export import QUANTIZATION, DEFAULT_SHARD_BYTES, export_tfjs
 
-class FruitFreshnessTrainer:
-    def __init__(self):
-        self.base_dir = Path('real-training-data/organized')
-        self.model_dir = Path('public/models')
-        self.img_size = (224, 224)  # Standard size for transfer learning
-        self.batch_size = 32
+class FruitFreshnessTrainer(FreshnessTrainer):
+    def __init__(self, backbone='efficientnetb0', **options):
+        super().__init__(backbone, **options)
+        self.batch_size = self.tuned_batch_size(32)
         self.epochs = 50
         
+        # Dense head sizes and dropout rates (searched by sweep-hyperparameters.py)
+        self.head_config = {
+            'dense1_units': 512,
+            'dropout1': 0.3,
+            'dense2_units': 256,
+            'dropout2': 0.2,
+            'branch_units': 128,
+            'combined_units': 64
+        }
+        
+        self.augmenter = make_augmenter(rotation=0.1, zoom=0.1)
+        self.checkpoint_dir = reserved_dir('checkpoints') / 'real-model'
+        
+        # Early stopping, LR reduction and best-model checkpointing watch freshness accuracy
+        self.monitor = 'val_freshness_accuracy'
+        self.lr_factor = 0.5
+        self.lr_patience = 5
+        self.best_model_name = 'best_model.h5'
+        self.production_model_name = 'fruitai-real-model.keras'
+        
+        # Staged fine-tuning of the backbone
+        self.fine_tune_learning_rate = 0.0001/10 * self.lr_scale
+        self.fine_tune_epochs_per_stage = 2
+        
+        self.report_prefix = 'fruitai-real-model'
+        
+        # TF.js weight quantization ('float32', 'float16' or 'uint8') and shard size
+        self.tfjs_quantization = 'float32'
+        self.tfjs_shard_bytes = DEFAULT_SHARD_BYTES
+        self.model_name = 'FruitFreshnessModel'
+        
         # Model parameters
         self.num_quality_classes = 2  # fresh, rotten
         self.num_fruit_classes = 0    # Will be determined from data
@@ -34,7 +70,7 @@ class FruitFreshnessTrainer:
         
     def load_metadata(self):
         """Load dataset metadata"""
-        metadata_path = self.base_dir / 'metadata.json'
+        metadata_path = (self.shard_dir or self.base_dir) / 'metadata.json'
         if not metadata_path.exists():
             raise FileNotFoundError("Metadata not found. Run organize-datasets.py first.")
         
@@ -45,263 +81,108 @@ class FruitFreshnessTrainer:
         print(f"   Total images: {self.metadata['dataset_info']['total_images']}")
         print(f"   Fruit types: {len(self.metadata['dataset_info']['fruits_vegetables'])}")
 
-    def load_dataset(self):
-        """Load and preprocess the organized dataset"""
-        print("📂 Loading dataset...")
-        
-        images = []
-        quality_labels = []
-        fruit_labels = []
-        
-        # Load images from organized structure
-        for quality_dir in self.base_dir.iterdir():
-            if not quality_dir.is_dir():
-                continue
-                
-            quality = quality_dir.name
-            print(f"   Loading {quality} images...")
-            
-            for fruit_dir in quality_dir.iterdir():
-                if not fruit_dir.is_dir():
-                    continue
-                    
-                fruit = fruit_dir.name
-                fruit_images = list(fruit_dir.glob('*.jpg'))
-                
-                print(f"     {fruit}: {len(fruit_images)} images")
-                
-                for img_path in fruit_images:
-                    try:
-                        # Load and preprocess image
-                        img = Image.open(img_path)
-                        img = img.convert('RGB')
-                        img = img.resize(self.img_size)
-                        img_array = np.array(img) / 255.0  # Normalize
-                        
-                        images.append(img_array)
-                        quality_labels.append(quality)
-                        fruit_labels.append(fruit)
-                        
-                    except Exception as e:
-                        print(f"⚠️  Failed to load {img_path}: {e}")
-        
-        # Convert to numpy arrays
-        self.images = np.array(images)
-        
-        # Encode labels
+    def encode_labels(self, quality_labels, fruit_labels):
+        """Encode the quality and fruit labels of every sample"""
         self.quality_labels = self.quality_encoder.fit_transform(quality_labels)
         self.fruit_labels = self.fruit_encoder.fit_transform(fruit_labels)
         
         self.num_fruit_classes = len(self.fruit_encoder.classes_)
-        
-        print(f"✅ Dataset loaded:")
-        print(f"   Images: {len(self.images)}")
-        print(f"   Image shape: {self.images[0].shape}")
+
+    def describe_labels(self):
         print(f"   Quality classes: {self.quality_encoder.classes_}")
         print(f"   Fruit classes: {len(self.fruit_encoder.classes_)}")
 
-    def create_advanced_model(self):
-        """Create an advanced model for freshness detection"""
-        print("🤖 Creating advanced model architecture...")
-        
-        # Use EfficientNetB0 as backbone (better than MobileNet for accuracy)
-        base_model = keras.applications.EfficientNetB0(
-            weights='imagenet',
-            include_top=False,
-            input_shape=(*self.img_size, 3)
+    def targets(self):
+        return {'freshness': self.quality_labels, 'fruit_type': self.fruit_labels}
+
+    def output_classes(self):
+        return {
+            'freshness': self.quality_encoder.classes_.tolist(),
+            'fruit_type': self.fruit_encoder.classes_.tolist()
+        }
+
+    def previous_output_classes(self):
+        """Class order of the production model, from the encoders.json saved with it"""
+        encoders_path = self.model_dir / 'encoders.json'
+        if not encoders_path.exists():
+            return {}
+        
+        with open(encoders_path, 'r') as f:
+            encoders = json.load(f)
+        return {'freshness': encoders['quality_classes'], 'fruit_type': encoders['fruit_classes']}
+
+    def compile_model(self, model, learning_rate):
+        """Compile a model with the freshness and fruit_type outputs"""
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+            loss={
+                'freshness': 'sparse_categorical_crossentropy',
+                'fruit_type': 'sparse_categorical_crossentropy'
+            },
+            loss_weights={
+                'freshness': 2.0,  # Prioritize freshness prediction
+                'fruit_type': 1.0
+            },
+            metrics={
+                'freshness': ['accuracy'],
+                'fruit_type': ['accuracy']
+            }
         )
-        
-        # Freeze base model initially
-        base_model.trainable = False
-        
-        # Build complete model
-        inputs = keras.Input(shape=(*self.img_size, 3))
-        
-        # Data augmentation layer
-        augmented = keras.Sequential([
-            layers.RandomFlip("horizontal"),
-            layers.RandomRotation(0.1),
-            layers.RandomZoom(0.1),
-            layers.RandomBrightness(0.2),
-            layers.RandomContrast(0.2),
-        ])(inputs)
-        
-        # Base model features
-        features = base_model(augmented)
-        
-        # Global pooling and feature processing
-        pooled = layers.GlobalAveragePooling2D()(features)
+
+    def build_head(self):
+        """Create the dense head layers once and return a function that applies them
+
+        Applying the same layers to the backbone output and to a plain embedding
+        input lets the head be trained on cached embeddings and reused as-is in
+        the full model.
+        """
+        config = self.head_config
         
         # Feature extraction branch
-        feature_dense = layers.Dense(512, activation='relu')(pooled)
-        feature_dropout = layers.Dropout(0.3)(feature_dense)
-        feature_dense2 = layers.Dense(256, activation='relu')(feature_dropout)
-        feature_dropout2 = layers.Dropout(0.2)(feature_dense2)
+        feature_dense = layers.Dense(config['dense1_units'], activation='relu')
+        feature_dropout = layers.Dropout(config['dropout1'])
+        feature_dense2 = layers.Dense(config['dense2_units'], activation='relu')
+        feature_dropout2 = layers.Dropout(config['dropout2'])
         
         # Fruit type prediction branch
-        fruit_dense = layers.Dense(128, activation='relu', name='fruit_dense')(feature_dropout2)
+        fruit_dense = layers.Dense(config['branch_units'], activation='relu', name='fruit_dense')
         fruit_output = layers.Dense(
             self.num_fruit_classes, 
             activation='softmax', 
             name='fruit_type'
-        )(fruit_dense)
+        )
         
         # Freshness prediction branch (main task)
-        freshness_dense = layers.Dense(128, activation='relu', name='freshness_dense')(feature_dropout2)
+        freshness_dense = layers.Dense(config['branch_units'], activation='relu', name='freshness_dense')
         
         # Combine fruit type information for better freshness prediction
-        combined_features = layers.Concatenate()([freshness_dense, fruit_dense])
-        combined_dense = layers.Dense(64, activation='relu')(combined_features)
+        combined_features = layers.Concatenate()
+        combined_dense = layers.Dense(config['combined_units'], activation='relu')
         
         freshness_output = layers.Dense(
             self.num_quality_classes, 
             activation='softmax', 
             name='freshness'
-        )(combined_dense)
-        
-        # Create model
-        self.model = keras.Model(
-            inputs=inputs, 
-            outputs=[freshness_output, fruit_output],
-            name='FruitFreshnessModel'
         )
         
-        # Compile with appropriate losses and weights
-        self.model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=0.001),
-            loss={
-                'freshness': 'sparse_categorical_crossentropy',
-                'fruit_type': 'sparse_categorical_crossentropy'
-            },
-            loss_weights={
-                'freshness': 2.0,  # Prioritize freshness prediction
-                'fruit_type': 1.0
-            },
-            metrics={
-                'freshness': ['accuracy'],
-                'fruit_type': ['accuracy']
-            }
-        )
+        def head(pooled):
+            shared = feature_dropout2(feature_dense2(feature_dropout(feature_dense(pooled))))
+            fruit_features = fruit_dense(shared)
+            combined = combined_dense(combined_features([freshness_dense(shared), fruit_features]))
+            return [freshness_output(combined), fruit_output(fruit_features)]
         
-        print("✅ Model created")
-        self.model.summary()
+        return head
 
-    def train_model(self):
-        """Train the model with real data"""
-        print("🚀 Starting model training...")
-        
-        # Split data
-        X_train, X_test, y_quality_train, y_quality_test, y_fruit_train, y_fruit_test = train_test_split(
-            self.images, self.quality_labels, self.fruit_labels,
-            test_size=0.2, random_state=42, stratify=self.quality_labels
-        )
-        
-        X_train, X_val, y_quality_train, y_quality_val, y_fruit_train, y_fruit_val = train_test_split(
-            X_train, y_quality_train, y_fruit_train,
-            test_size=0.2, random_state=42, stratify=y_quality_train
-        )
-        
-        print(f"📊 Data split:")
-        print(f"   Training: {len(X_train)}")
-        print(f"   Validation: {len(X_val)}")
-        print(f"   Test: {len(X_test)}")
-        
-        # Callbacks
-        callbacks = [
-            keras.callbacks.EarlyStopping(
-                monitor='val_freshness_accuracy',
-                patience=8,
-                restore_best_weights=True,
-                verbose=1
-            ),
-            keras.callbacks.ReduceLROnPlateau(
-                monitor='val_freshness_accuracy',
-                factor=0.5,
-                patience=5,
-                min_lr=1e-7,
-                verbose=1
-            ),
-            keras.callbacks.ModelCheckpoint(
-                str(self.model_dir / 'best_model.h5'),
-                monitor='val_freshness_accuracy',
-                save_best_only=True,
-                verbose=1
-            )
-        ]
-        
-        # Train model
-        history = self.model.fit(
-            X_train,
-            {
-                'freshness': y_quality_train,
-                'fruit_type': y_fruit_train
-            },
-            validation_data=(
-                X_val,
-                {
-                    'freshness': y_quality_val,
-                    'fruit_type': y_fruit_val
-                }
-            ),
-            epochs=self.epochs,
-            batch_size=self.batch_size,
-            callbacks=callbacks,
-            verbose=1
-        )
-        
-        # Evaluate on test set
-        print("\n🧪 Evaluating on test set...")
-        test_results = self.model.evaluate(
-            X_test,
-            {
-                'freshness': y_quality_test,
-                'fruit_type': y_fruit_test
-            },
-            verbose=1
-        )
-        
-        # Print results
-        freshness_accuracy = test_results[3]  # freshness_accuracy metric
-        fruit_accuracy = test_results[4]      # fruit_type_accuracy metric
+    def report_results(self, results):
+        """Print freshness and fruit type accuracy and return freshness accuracy"""
+        freshness_accuracy = results['freshness_accuracy']
+        fruit_accuracy = results['fruit_type_accuracy']
         
         print(f"\n📈 Final Results:")
         print(f"   Freshness Accuracy: {freshness_accuracy:.4f} ({freshness_accuracy*100:.2f}%)")
         print(f"   Fruit Type Accuracy: {fruit_accuracy:.4f} ({fruit_accuracy*100:.2f}%)")
         
-        return history, freshness_accuracy
-
-    def fine_tune_model(self):
-        """Fine-tune the pre-trained layers for better accuracy"""
-        print("🔧 Fine-tuning model...")
-        
-        # Unfreeze top layers of base model
-        base_model = self.model.layers[2]  # EfficientNet layer
-        base_model.trainable = True
-        
-        # Fine-tune from this layer onwards
-        fine_tune_at = 100
-        
-        for layer in base_model.layers[:fine_tune_at]:
-            layer.trainable = False
-        
-        # Lower learning rate for fine-tuning
-        self.model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=0.0001/10),
-            loss={
-                'freshness': 'sparse_categorical_crossentropy',
-                'fruit_type': 'sparse_categorical_crossentropy'
-            },
-            loss_weights={
-                'freshness': 2.0,
-                'fruit_type': 1.0
-            },
-            metrics={
-                'freshness': ['accuracy'],
-                'fruit_type': ['accuracy']
-            }
-        )
-        
-        print("✅ Model prepared for fine-tuning")
+        return freshness_accuracy
 
     def save_model(self):
         """Save the trained model for production use"""
@@ -313,9 +194,12 @@ class FruitFreshnessTrainer:
         # Save in TensorFlow.js format
         tfjs_path = self.model_dir / 'fruitai-real-model'
         
-        # Convert to TensorFlow.js
-        import tensorflowjs as tfjs
-        tfjs.converters.save_keras_model(self.model, str(tfjs_path))
+        # Convert to TensorFlow.js (with a fixed input size and content-hashed shards)
+        export_model = self.export_model()
+        tfjs_export = export_tfjs(export_model, tfjs_path, self.tfjs_quantization, self.tfjs_shard_bytes)
+        
+        # Keras copy that the next --warm-start run continues from
+        export_model.save(self.model_dir / self.production_model_name)
         
         # Save label encoders
         encoders = {
@@ -330,14 +214,24 @@ class FruitFreshnessTrainer:
         with open(self.model_dir / 'encoders.json', 'w') as f:
             json.dump(encoders, f, indent=2)
         
+        if self.pipeline_augmentation:
+            # Show what dropping the augmentation ops saves at inference time
+            latency = augmentation_latency_report(export_model, self.augmenter)
+            with open(self.model_dir / 'fruitai-real-model-latency.json', 'w') as f:
+                json.dump(latency, f, indent=2)
+        
         # Update model info
         model_info = {
             'version': '2.0.0',
             'created': '2025-01-29',
-            'architecture': 'EfficientNetB0 + Multi-task Learning',
+            'architecture': f'{backbone_display_name(self.backbone)} + Multi-task Learning',
+            'backbone': self.backbone,
             'input_size': list(self.img_size),
-            'total_parameters': self.model.count_params(),
-            'dataset_size': len(self.images),
+            'input_range': [0, 255],  # Raw RGB pixels; normalization is part of the model
+            'augmentation': 'input-pipeline' if self.pipeline_augmentation else 'in-model',
+            'total_parameters': export_model.count_params(),
+            'tfjs': tfjs_export,
+            'dataset_size': self.dataset_size,
             'quality_classes': len(self.quality_encoder.classes_),
             'fruit_classes': len(self.fruit_encoder.classes_),
             'description': 'High-accuracy fruit freshness detection model trained on real data'
@@ -346,14 +240,80 @@ class FruitFreshnessTrainer:
         with open(self.model_dir / 'model-info.json', 'w') as f:
             json.dump(model_info, f, indent=2)
         
-        print(f"✅ Model saved to: {tfjs_path}")
+        print(f"✅ Model saved to: {tfjs_path} ({tfjs_export['bytes'] / 1024 / 1024:.1f} MB, "
+              f"{self.tfjs_quantization} weights in {tfjs_export['shards']} shards)")
         print(f"📋 Model info saved to: {self.model_dir / 'model-info.json'}")
 
 def main():
+    parser = argparse.ArgumentParser(description='Train the FruitAI freshness model on real data')
+    loading = parser.add_mutually_exclusive_group()
+    loading.add_argument('--streaming', action='store_true',
+                         help='Stream images from disk with tf.data instead of loading them all into memory')
+    loading.add_argument('--cache', action='store_true',
+                         help='Load resized uint8 pixels from the memory-mapped preprocessing cache')
+    loading.add_argument('--shards', metavar='DIR',
+                         help='Read images from shard files written by organize-datasets.py --format shards')
+    parser.add_argument('--backbone', choices=sorted(BACKBONES), default='efficientnetb0',
+                        help='Pretrained backbone from the registry in backbones.py')
+    parser.add_argument('--pipeline-augmentation', action='store_true',
+                        help='Augment in the tf.data pipeline and export an inference-only model')
+    parser.add_argument('--feature-cache', action='store_true',
+                        help='Embed only new or changed images with the frozen backbone and train only the dense heads on them')
+    parser.add_argument('--feature-views', type=int, default=0,
+                        help='Augmented views per image to embed alongside the clean one (with --feature-cache)')
+    parser.add_argument('--fine-tune-minutes', type=float,
+                        help='Wall-clock budget for staged fine-tuning')
+    parser.add_argument('--fine-tune-steps', type=int,
+                        help='Training step budget for staged fine-tuning')
+    parser.add_argument('--progressive', metavar='SIZES',
+                        help='Progressive-resolution schedule, e.g. 128,160,224 (last phase runs at 224)')
+    parser.add_argument('--workers', metavar='HOST:PORT,...',
+                        help='Train data-parallel across these workers (same list on every worker; see launch-workers.py)')
+    parser.add_argument('--task-index', type=int, default=0,
+                        help='Index of this process in --workers; worker 0 is the chief')
+    parser.add_argument('--no-autotune', action='store_true',
+                        help="Ignore this host's settings from autotune-training.py")
+    parser.add_argument('--tfjs-quantization', choices=list(QUANTIZATION), default='float32',
+                        help='Weight quantization of the TF.js export (compare variants with export-tfjs.py)')
+    parser.add_argument('--tfjs-shard-mb', type=float, default=DEFAULT_SHARD_BYTES / 1024 / 1024,
+                        help='Weight shard size of the TF.js export in MB')
+    parser.add_argument('--warm-start', action='store_true',
+                        help='Continue from the model in public/models (adding any new classes) instead of ImageNet weights')
+    parser.add_argument('--telemetry', metavar='DIR',
+                        help='Write per-step input wait/compute timings, a Chrome trace and a bottleneck summary to DIR')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the last checkpoint in real-training-data/checkpoints/real-model')
+    parser.add_argument('--decode-workers', type=int, default=1,
+                        help='Processes used to decode JPEGs (0 = all cores)')
+    parser.add_argument('--decode-chunksize', type=int, default=64,
+                        help='Images handed to a decode worker per task')
+    args = parser.parse_args()
+    if args.workers and args.feature_cache:
+        parser.error('--feature-cache trains a small head locally and cannot be combined with --workers')
+    if args.workers and args.telemetry:
+        parser.error('--telemetry times a single process and cannot be combined with --workers')
+    
     print("🍎 FruitAI Real-Data Training Pipeline")
     print("=====================================")
     
-    trainer = FruitFreshnessTrainer()
+    trainer = FruitFreshnessTrainer(
+        backbone=args.backbone,
+        streaming=args.streaming,
+        use_cache=args.cache,
+        decode_workers=args.decode_workers,
+        decode_chunksize=args.decode_chunksize,
+        shard_dir=args.shards,
+        pipeline_augmentation=args.pipeline_augmentation,
+        feature_views=args.feature_views,
+        resume=args.resume,
+        progressive_sizes=parse_sizes(args.progressive) if args.progressive else None,
+        workers=parse_workers(args.workers) if args.workers else None,
+        task_index=args.task_index,
+        autotuned=not args.no_autotune,
+        telemetry_dir=args.telemetry
+    )
+    trainer.tfjs_quantization = args.tfjs_quantization
+    trainer.tfjs_shard_bytes = int(args.tfjs_shard_mb * 1024 * 1024)
     
     try:
         # Load and prepare data
@@ -361,15 +321,23 @@ def main():
         trainer.load_dataset()
         
         # Create and train model
-        trainer.create_advanced_model()
-        history, accuracy = trainer.train_model()
+        trainer.create_model()
+        if args.warm_start:
+            trainer.warm_start()
+        if args.feature_cache:
+            history, accuracy = trainer.train_head_on_features()
+        else:
+            history, accuracy = trainer.train_model()
         
         # Fine-tune if accuracy is not high enough
         if accuracy < 0.90:
             print(f"\n🔄 Accuracy ({accuracy:.2%}) below target (90%), fine-tuning...")
-            trainer.fine_tune_model()
-            # Continue training for a few more epochs
-            # ... (fine-tuning code would go here)
+            accuracy = trainer.fine_tune_model(args.fine_tune_minutes, args.fine_tune_steps)
+        
+        # Only the chief exports; the other workers are done once training is
+        if not trainer.is_chief:
+            print(f"✅ Worker {args.task_index} finished at {accuracy:.2%}; the chief saves the model")
+            return
         
         # Save model
         trainer.save_model()
@@ -389,6 +357,9 @@ def main():
         print(f"❌ Training failed: {e}")
         import traceback
         traceback.print_exc()
+        if args.workers:
+            # Let launch-workers.py stop the workers waiting on this one
+            raise SystemExit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
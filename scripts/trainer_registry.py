@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Trainer registry for the FruitAI tooling scripts
+Maps each trainer to the hyphenated script and class that implement it,
+the backbone it trains by default and the validation metric it is judged by
+"""
+
+import importlib.util
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+TRAINERS = {
+    'real': {
+        'script': 'train-real-model.py',
+        'class': 'FruitFreshnessTrainer',
+        'backbone': 'efficientnetb0',
+        'metric': 'val_freshness_accuracy'
+    },
+    'accurate': {
+        'script': 'train-accurate-model.py',
+        'class': 'AccurateFreshnessTrainer',
+        'backbone': 'resnet50',
+        'metric': 'val_accuracy'
+    },
+}
+
+
+def load_script(filename):
+    """Import one of the hyphenated scripts in this directory as a module"""
+    path = SCRIPTS_DIR / filename
+    spec = importlib.util.spec_from_file_location(path.stem.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def trainer_class(name):
+    """The trainer class registered under name (imports its script)"""
+    trainer = TRAINERS[name]
+    return getattr(load_script(trainer['script']), trainer['class'])
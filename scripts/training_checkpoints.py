@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Resumable training checkpoints for the FruitAI training scripts
+Captures everything needed to continue a preempted fit() where it stopped
+"""
+
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import numpy as np
+from pathlib import Path
+import tensorflow as tf
+from tensorflow import keras
+
+STATE_NAME = 'trainer-state.pkl'
+MANIFEST_NAME = 'splits.json'
+
+# Callback attributes that fit() resets in on_train_begin and that decide when it stops
+CALLBACK_STATE = {
+    keras.callbacks.EarlyStopping: ('wait', 'stopped_epoch', 'best', 'best_epoch', 'best_weights'),
+    keras.callbacks.ReduceLROnPlateau: ('wait', 'cooldown_counter', 'best'),
+    keras.callbacks.ModelCheckpoint: ('best',),
+}
+
+
+def snapshot_split_manifest(manifest_path, checkpoint_dir):
+    """Keep a copy of the split manifest the checkpointed run was trained with"""
+    checkpoint_dir = Path(checkpoint_dir)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    # Replaced atomically: resuming workers read this copy while the chief writes it
+    tmp_path = (checkpoint_dir / MANIFEST_NAME).with_suffix('.tmp')
+    shutil.copyfile(manifest_path, tmp_path)
+    os.replace(tmp_path, checkpoint_dir / MANIFEST_NAME)
+
+
+def saved_split_manifest(checkpoint_dir):
+    """The split manifest copy of a checkpointed run, or None"""
+    saved = Path(checkpoint_dir) / MANIFEST_NAME
+    return saved if saved.exists() else None
+
+
+def restore_split_manifest(checkpoint_dir, manifest_path):
+    """Put back the split manifest of the run being resumed"""
+    saved = Path(checkpoint_dir) / MANIFEST_NAME
+    if not saved.exists():
+        return
+    if not Path(manifest_path).exists() or saved.read_bytes() != Path(manifest_path).read_bytes():
+        print(f"♻️  Restoring split manifest from {saved}")
+        shutil.copyfile(saved, manifest_path)
+
+
+class TrainingCheckpoint(keras.callbacks.Callback):
+    """Periodically checkpoint a fit() so it can continue exactly where it stopped
+
+    Each checkpoint holds the model weights, optimizer slots and learning
+    rate (TF checkpoint), the global TF generator, and a pickled trainer
+    state with the epoch, EarlyStopping/ReduceLROnPlateau/ModelCheckpoint
+    counters, Python and NumPy RNG state and the shuffle state of an
+    IndexedBatchSequence training input (tf.data pipelines restart their
+    shuffle stream). The state file is replaced atomically after the TF
+    checkpoint is written, so it always names a complete checkpoint.
+
+    Put this callback after the callbacks it is given: it restores their
+    counters once their own on_train_begin has reset them.
+
+    In multi-worker training every worker restores from checkpoint_dir and
+    takes part in each save, but only the chief (chief=True) keeps what it
+    writes; the others save to a scratch directory that is removed again.
+    """
+
+    def __init__(self, checkpoint_dir, callbacks=(), resume=False, every_epochs=1, max_to_keep=2, chief=True):
+        super().__init__()
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.state_path = self.checkpoint_dir / STATE_NAME
+        self.tracked_callbacks = [
+            callback for callback in callbacks if isinstance(callback, tuple(CALLBACK_STATE))
+        ]
+        self.resume = resume
+        self.every_epochs = every_epochs
+        self.max_to_keep = max_to_keep
+        self.chief = chief
+        self.data = None
+        self.pending_state = None
+        self.completed = False
+        self.last_saved_epoch = 0
+
+    def restore(self, model, epochs):
+        """Load the latest checkpoint into model and return the epoch fit() should start from
+
+        Returns epochs for a phase that already finished, so fit() is skipped.
+        Without resume, old checkpoints are cleared and training starts at 0.
+        """
+        self.tracked = tf.train.Checkpoint(
+            model=model, optimizer=model.optimizer, rng=tf.random.get_global_generator()
+        )
+
+        if not self.resume or not self.state_path.exists():
+            if self.chief:
+                shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+            self.manager = self.make_manager()
+            return 0
+
+        with open(self.state_path, 'rb') as f:
+            state = pickle.load(f)
+
+        # Create optimizer slots up front so they are restored rather than deferred
+        if hasattr(model.optimizer, 'build'):
+            with model.distribute_strategy.scope():
+                model.optimizer.build(model.trainable_variables)
+        self.tracked.restore(state['checkpoint']).expect_partial()
+        self.manager = self.make_manager()
+
+        random.setstate(state['python_rng'])
+        np.random.set_state(state['numpy_rng'])
+
+        self.pending_state = state
+        self.completed = state['completed']
+        self.last_saved_epoch = state['epoch']
+
+        print(f"♻️  Resuming from {self.checkpoint_dir} at epoch {state['epoch']}"
+              f"{' (phase already finished)' if self.completed else ''}")
+        return epochs if self.completed else state['epoch']
+
+    def make_manager(self):
+        save_dir = self.checkpoint_dir if self.chief else tempfile.mkdtemp(prefix='checkpoint-worker-')
+        return tf.train.CheckpointManager(self.tracked, str(save_dir), self.max_to_keep)
+
+    def track_data(self, data):
+        """Checkpoint the shuffle state of the training input, restoring it when resuming"""
+        self.data = data if hasattr(data, 'get_state') else None
+        if self.data is not None and self.pending_state and self.pending_state['data'] is not None:
+            self.data.set_state(self.pending_state['data'])
+            # fit() reshuffles between epochs; replay the shuffle the stopped run was about to do
+            self.data.on_epoch_end()
+        return data
+
+    def on_train_begin(self, logs=None):
+        if self.pending_state is None:
+            return
+
+        for callback in self.tracked_callbacks:
+            saved = self.pending_state['callbacks'].get(type(callback).__name__)
+            for name, value in (saved or {}).items():
+                setattr(callback, name, value)
+        self.pending_state = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        if (epoch + 1) % self.every_epochs == 0:
+            self.save(epoch + 1)
+
+    def on_train_end(self, logs=None):
+        # After EarlyStopping has put back the best weights
+        self.save(self.epoch_reached(), completed=True)
+
+    def epoch_reached(self):
+        history = getattr(self.model, 'history', None)
+        if history is not None and history.epoch:
+            return history.epoch[-1] + 1
+        return self.last_saved_epoch
+
+    def learning_rate(self):
+        learning_rate = self.model.optimizer.learning_rate
+        if callable(learning_rate):
+            learning_rate = learning_rate(self.model.optimizer.iterations)
+        return float(keras.backend.get_value(learning_rate))
+
+    def callback_state(self):
+        state = {}
+        for callback in self.tracked_callbacks:
+            for callback_type, names in CALLBACK_STATE.items():
+                if isinstance(callback, callback_type):
+                    state[type(callback).__name__] = {
+                        name: getattr(callback, name) for name in names if hasattr(callback, name)
+                    }
+        return state
+
+    def save(self, epoch, completed=False):
+        prefix = self.manager.save(checkpoint_number=epoch)
+        if not self.chief:
+            # Every worker has to join the save; only the chief's copy is kept
+            shutil.rmtree(self.manager.directory, ignore_errors=True)
+            self.last_saved_epoch = epoch
+            return
+
+        state = {
+            'epoch': epoch,
+            'completed': completed,
+            'checkpoint': prefix,
+            'learning_rate': self.learning_rate(),
+            'callbacks': self.callback_state(),
+            'python_rng': random.getstate(),
+            'numpy_rng': np.random.get_state(),
+            'data': self.data.get_state() if self.data is not None else None
+        }
+
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        self.last_saved_epoch = epoch
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Shared data loading helpers for the FruitAI training scripts
+Lists the organized dataset, persists train/val/test splits and builds
+streaming tf.data input pipelines
+"""
+
+import os
+import json
+import numpy as np
+from pathlib import Path
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+from sklearn.model_selection import train_test_split
+
+
+def list_organized_images(base_dir):
+    """List every organized image with its quality and fruit label"""
+    paths = []
+    qualities = []
+    fruits = []
+
+    for quality_dir in sorted(Path(base_dir).iterdir()):
+        if not quality_dir.is_dir():
+            continue
+
+        for fruit_dir in sorted(quality_dir.iterdir()):
+            if not fruit_dir.is_dir():
+                continue
+
+            for img_path in sorted(fruit_dir.glob('*.jpg')):
+                paths.append(str(img_path))
+                qualities.append(quality_dir.name)
+                fruits.append(fruit_dir.name)
+
+    return paths, qualities, fruits
+
+
+def sample_key(path, base_dir):
+    """Stable identity of a sample: its path relative to the dataset root"""
+    return Path(os.path.relpath(path, base_dir)).as_posix()
+
+
+def split_indices(indices, strata, test_size, seed):
+    """Stratified split of an index array, falling back gracefully on tiny inputs"""
+    if len(indices) < 2:
+        return indices, indices[:0]
+
+    try:
+        return train_test_split(indices, test_size=test_size, random_state=seed, stratify=strata)
+    except ValueError:
+        # Too few samples per class to stratify
+        try:
+            return train_test_split(indices, test_size=test_size, random_state=seed)
+        except ValueError:
+            return indices, indices[:0]
+
+
+def load_split_manifest(manifest_path, keys, strata, test_size=0.2, val_size=0.2, seed=42, write=True):
+    """Return stratified train/val/test index arrays backed by a persisted manifest
+
+    The manifest maps every sample key to its split, so both trainers and
+    every loader see the same split on every run. Samples that are new since
+    the manifest was written are split with the same fractions and appended;
+    samples that disappeared are dropped. Index arrays are sorted so
+    memory-mapped pixels are read front to back.
+
+    The manifest is replaced atomically and only when it changed. Pass
+    write=False on all but one of several concurrent processes: the split of
+    new samples is seeded, so they compute the same assignments.
+    """
+    manifest_path = Path(manifest_path)
+    keys = list(keys)
+    strata = np.asarray(strata)
+
+    assignments = {}
+    manifest = None
+    if manifest_path.exists():
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if (manifest.get('seed'), manifest.get('test_size'), manifest.get('val_size')) == (seed, test_size, val_size):
+            assignments = manifest['assignments']
+        else:
+            print(f"⚠️  Split parameters changed, rebuilding {manifest_path}")
+
+    new = np.array([i for i, key in enumerate(keys) if key not in assignments], dtype=np.int64)
+    if len(new):
+        print(f"🔀 Assigning {len(new)} new samples to splits")
+        train, test = split_indices(new, strata[new], test_size, seed)
+        train, val = split_indices(train, strata[train], val_size, seed)
+        for split, indices in (('train', train), ('val', val), ('test', test)):
+            for i in indices:
+                assignments[keys[i]] = split
+
+    current = set(keys)
+    assignments = {key: split for key, split in assignments.items() if key in current}
+
+    updated = {
+        'seed': seed,
+        'test_size': test_size,
+        'val_size': val_size,
+        'assignments': assignments
+    }
+    if write and updated != manifest:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(updated, f)
+        os.replace(tmp_path, manifest_path)
+
+    splits = {'train': [], 'val': [], 'test': []}
+    for i, key in enumerate(keys):
+        splits[assignments[key]].append(i)
+
+    return {split: np.array(indices, dtype=np.int64) for split, indices in splits.items()}
+
+
+class IndexedBatchSequence(keras.utils.Sequence):
+    """Feed one split of an in-memory (or memory-mapped) array batch by batch
+
+    Only the rows of the current batch are gathered, so train, validation
+    and test never hold their own copies of the pixel data.
+    """
+
+    def __init__(self, images, labels, indices, batch_size, shuffle=False, seed=42, **kwargs):
+        super().__init__(**kwargs)
+        self.images = images
+        self.labels = labels
+        self.indices = np.asarray(indices)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.order = self.indices.copy()
+        if self.shuffle:
+            self.rng.shuffle(self.order)
+
+    def __len__(self):
+        return int(np.ceil(len(self.order) / self.batch_size))
+
+    def __getitem__(self, batch):
+        # Sorted rows keep memory-mapped reads sequential
+        rows = np.sort(self.order[batch * self.batch_size:(batch + 1) * self.batch_size])
+        if isinstance(self.labels, dict):
+            labels = {name: values[rows] for name, values in self.labels.items()}
+        else:
+            labels = self.labels[rows]
+        return self.images[rows], labels
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
+
+    def get_state(self):
+        """Shuffle state, so a resumed run sees the same batch order"""
+        return {'order': self.order.copy(), 'rng': self.rng.bit_generator.state}
+
+    def set_state(self, state):
+        self.order = np.asarray(state['order']).copy()
+        self.rng.bit_generator.state = state['rng']
+
+
+def make_augmenter(rotation=0.1, zoom=0.1, brightness=0.2, contrast=0.2):
+    """Random augmentation stack used by both trainers, in the model or in the input pipeline"""
+    return keras.Sequential([
+        layers.RandomFlip("horizontal"),
+        layers.RandomRotation(rotation),
+        layers.RandomZoom(zoom),
+        layers.RandomBrightness(brightness),
+        layers.RandomContrast(contrast),
+    ], name='augmentation')
+
+
+def augment_batches(dataset, augment, parallel_calls=tf.data.AUTOTUNE):
+    """Run augmentation as a parallel map stage over batched (images, labels)"""
+    return dataset.map(
+        lambda images, labels: (augment(images, training=True), labels),
+        num_parallel_calls=parallel_calls
+    )
+
+
+def resize_batches(dataset, img_size, parallel_calls=tf.data.AUTOTUNE):
+    """Resize batched uint8 (images, labels) to img_size in a parallel map stage"""
+    return dataset.map(
+        lambda images, labels: (
+            tf.saturate_cast(tf.round(tf.image.resize(images, img_size, antialias=True)), tf.uint8),
+            labels
+        ),
+        num_parallel_calls=parallel_calls
+    )
+
+
+def make_indexed_dataset(images, labels, indices, batch_size, shuffle=False, augment=None, seed=42,
+                         img_size=None, parallel_calls=tf.data.AUTOTUNE):
+    """Build a tf.data pipeline that gathers batches of rows from a shared array
+
+    Like IndexedBatchSequence, only the current batch is copied out of the
+    (possibly memory-mapped) array, but batches flow through tf.data so
+    resizing (to img_size, for progressive-resolution phases) and
+    augmentation stages can run in parallel with training. parallel_calls
+    sets the parallelism of every map stage (tuned by autotune-training.py).
+    """
+    indices = np.asarray(indices)
+    label_names = list(labels) if isinstance(labels, dict) else None
+    label_arrays = [labels[name] for name in label_names] if label_names else [labels]
+    output_types = [tf.as_dtype(images.dtype)] + [tf.as_dtype(values.dtype) for values in label_arrays]
+
+    def gather(rows):
+        # Sorted rows keep memory-mapped reads sequential
+        rows = np.sort(rows)
+        return [images[rows]] + [values[rows] for values in label_arrays]
+
+    def load_batch(rows):
+        tensors = tf.numpy_function(gather, [rows], output_types)
+        tensors[0].set_shape((None, *images.shape[1:]))
+        for tensor, values in zip(tensors[1:], label_arrays):
+            tensor.set_shape((None, *values.shape[1:]))
+
+        if label_names:
+            return tensors[0], dict(zip(label_names, tensors[1:]))
+        return tensors[0], tensors[1]
+
+    dataset = tf.data.Dataset.from_tensor_slices(indices)
+    if shuffle:
+        dataset = dataset.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+
+    dataset = dataset.batch(batch_size).map(load_batch, num_parallel_calls=parallel_calls)
+    if img_size is not None and tuple(img_size) != tuple(images.shape[1:3]):
+        dataset = resize_batches(dataset, img_size, parallel_calls)
+    if augment is not None:
+        dataset = augment_batches(dataset, augment, parallel_calls)
+
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def decode_image(path, img_size):
+    """Read, decode and resize a single JPEG to uint8 inside the tf.data graph"""
+    image = tf.io.read_file(path)
+    image = tf.io.decode_jpeg(image, channels=3)
+    image = tf.image.resize(image, img_size, antialias=True)
+    return tf.saturate_cast(tf.round(image), tf.uint8)
+
+
+def make_image_dataset(paths, labels, img_size, batch_size, shuffle=False, augment=None, seed=42,
+                       parallel_calls=tf.data.AUTOTUNE):
+    """Build a dataset that decodes, batches and prefetches images lazily
+
+    Only the file paths and labels are held in memory; pixels are decoded in
+    parallel per batch, so memory stays bounded by the prefetch depth.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices((list(paths), labels))
+
+    if shuffle:
+        dataset = dataset.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+
+    dataset = dataset.map(
+        lambda path, label: (decode_image(path, img_size), label),
+        num_parallel_calls=parallel_calls
+    )
+
+    # Skip unreadable files instead of failing the whole epoch
+    dataset = dataset.ignore_errors()
+
+    dataset = dataset.batch(batch_size)
+    if augment is not None:
+        dataset = augment_batches(dataset, augment, parallel_calls)
+
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Step-level training telemetry for the FruitAI training scripts
+Splits every training step into time spent waiting for the input pipeline
+and time spent in the model, and writes per-step JSONL metrics, a Chrome
+trace timeline (chrome://tracing or ui.perfetto.dev) and a bottleneck summary
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import threading
+import numpy as np
+import tensorflow as tf
+from pathlib import Path
+from tensorflow import keras
+
+# Share of step time spent waiting for input above which training counts as input-bound
+INPUT_BOUND_SHARE = 0.2
+
+# Timeline rows of the Chrome trace
+TRACE_THREADS = {'train': 1, 'epochs': 2}
+
+
+def rss_mb():
+    """Current resident memory on Linux, the peak elsewhere"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        scale = 1024 if sys.platform.startswith('linux') else 1024 * 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def batch_spec(batch):
+    """Tensor specs of a Sequence batch with the batch dimension left open"""
+    return tf.nest.map_structure(
+        lambda value: tf.TensorSpec((None, *np.shape(value)[1:]), tf.as_dtype(np.asarray(value).dtype)),
+        batch
+    )
+
+
+def batch_images(batch):
+    return len(tf.nest.flatten(batch)[0])
+
+
+def share(part, total):
+    return part / total if total else 0.0
+
+
+class TrainingTelemetry(keras.callbacks.Callback):
+    """Time every training step as input wait plus compute
+
+    The training input has to go through instrument(): it is read through a
+    generator inside the training step, so the time a step blocks on its
+    batch is measured exactly where the model waits for it. Whatever the
+    pipeline prefetched in the background does not count as waiting.
+    Add the callback after TrainingCheckpoint so Sequence shuffles happen
+    after the checkpoint saved the epoch's order, as they do in fit().
+    """
+
+    def __init__(self, output_dir):
+        super().__init__()
+        self.output_dir = Path(output_dir)
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        self.waits = []
+        self.steps = []
+        self.epochs = []
+        self.events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+            for name, tid in TRACE_THREADS.items()
+        ]
+        self.phase = 'train'
+        self.sequence = None
+        self.metrics_file = None
+
+    def instrument(self, data, phase='train'):
+        """Wrap a tf.data.Dataset or keras Sequence so its batch waits are timed"""
+        self.phase = phase
+        if isinstance(data, tf.data.Dataset):
+            self.sequence = None
+            spec = data.element_spec
+            steps = int(data.cardinality())
+            batches = lambda: iter(data)
+        else:
+            self.sequence = data
+            spec = batch_spec(data[0])
+            steps = len(data)
+            batches = lambda: (data[i] for i in range(len(data)))
+
+        def timed_batches():
+            iterator = batches()
+            while True:
+                start = time.perf_counter()
+                try:
+                    batch = next(iterator)
+                except StopIteration:
+                    return
+                with self.lock:
+                    self.waits.append((start, time.perf_counter(), batch_images(batch)))
+                yield batch
+
+        dataset = tf.data.Dataset.from_generator(timed_batches, output_signature=spec)
+        if steps > 0:
+            dataset = dataset.apply(tf.data.experimental.assert_cardinality(steps))
+        return dataset
+
+    def micros(self, seconds):
+        return (seconds - self.origin) * 1e6
+
+    def add_event(self, name, start, end, thread, **args):
+        self.events.append({
+            'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': TRACE_THREADS[thread],
+            'ts': self.micros(start), 'dur': (end - start) * 1e6, 'args': args
+        })
+
+    def add_counter(self, name, at, **values):
+        self.events.append({'name': name, 'ph': 'C', 'pid': os.getpid(), 'ts': self.micros(at), 'args': values})
+
+    def on_train_begin(self, logs=None):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.metrics_file = open(self.output_dir / 'steps.jsonl', 'a' if self.steps else 'w')
+        self.first_step = True
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch = epoch
+        self.epoch_start = time.perf_counter()
+        self.epoch_steps = []
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self.step_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        end = time.perf_counter()
+        with self.lock:
+            waits, self.waits = self.waits, []
+
+        # Only the part of a wait that falls inside the step held the step up
+        wait = sum(max(0.0, min(wait_end, end) - max(wait_start, self.step_start)) for wait_start, wait_end, _ in waits)
+        images = sum(count for *_, count in waits)
+        duration = end - self.step_start
+        compute_start = max([wait_end for _, wait_end, _ in waits] + [self.step_start])
+        memory = rss_mb()
+
+        step = {
+            'phase': self.phase,
+            'epoch': self.epoch + 1,
+            'step': batch,
+            'time': self.step_start - self.origin,
+            'step_ms': duration * 1000,
+            'data_wait_ms': wait * 1000,
+            'compute_ms': (duration - wait) * 1000,
+            'images': images,
+            'images_per_sec': images / duration if duration else 0.0,
+            'rss_mb': memory,
+            # The first step of every fit() also traces the training graph
+            'tracing': self.first_step
+        }
+        self.first_step = False
+        self.steps.append(step)
+        self.epoch_steps.append(step)
+        self.metrics_file.write(json.dumps(step) + '\n')
+
+        self.add_event(f'step {batch}', self.step_start, end, 'train', phase=self.phase, epoch=self.epoch + 1)
+        for wait_start, wait_end, _ in waits:
+            if wait_end > self.step_start:
+                self.add_event('input wait', max(wait_start, self.step_start), min(wait_end, end), 'train')
+        self.add_event('compute', compute_start, end, 'train')
+        self.add_counter('memory', end, rss_mb=memory)
+        self.add_counter('throughput', end, images_per_sec=step['images_per_sec'])
+
+    def on_epoch_end(self, epoch, logs=None):
+        end = time.perf_counter()
+        steps = [step for step in self.epoch_steps if not step['tracing']] or self.epoch_steps
+        seconds = end - self.epoch_start
+        record = {
+            'event': 'epoch',
+            'phase': self.phase,
+            'epoch': epoch + 1,
+            'seconds': seconds,
+            'steps': len(self.epoch_steps),
+            'data_wait_seconds': sum(step['data_wait_ms'] for step in self.epoch_steps) / 1000,
+            'compute_seconds': sum(step['compute_ms'] for step in self.epoch_steps) / 1000,
+            'images_per_sec': sum(step['images'] for step in self.epoch_steps) / seconds if seconds else 0.0,
+            'step_p50_ms': float(np.percentile([step['step_ms'] for step in steps], 50)) if steps else 0.0,
+            'peak_rss_mb': max((step['rss_mb'] for step in self.epoch_steps), default=rss_mb())
+        }
+        record['other_seconds'] = seconds - record['data_wait_seconds'] - record['compute_seconds']
+        self.epochs.append(record)
+        self.metrics_file.write(json.dumps(record) + '\n')
+        self.metrics_file.flush()
+
+        self.add_event(f'epoch {epoch + 1}', self.epoch_start, end, 'epochs', phase=self.phase)
+        if self.epoch_steps:
+            last_step = self.epoch_steps[-1]
+            last_end = self.origin + last_step['time'] + last_step['step_ms'] / 1000
+            self.add_event('validation and callbacks', last_end, end, 'train')
+
+        # What fit() would do for a Sequence after the callbacks ran
+        if self.sequence is not None:
+            self.sequence.on_epoch_end()
+
+    def on_train_end(self, logs=None):
+        self.metrics_file.close()
+        with open(self.output_dir / 'trace.json', 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+        summary = self.summary()
+        with open(self.output_dir / 'summary.json', 'w') as f:
+            json.dump(summary, f, indent=2)
+        print_summary(summary, self.output_dir)
+
+    def summary(self):
+        """Where training time went and which stage limits throughput"""
+        steady = [step for step in self.steps if not step['tracing']] or self.steps
+        step_seconds = sum(step['step_ms'] for step in steady) / 1000
+        wait_seconds = sum(step['data_wait_ms'] for step in steady) / 1000
+        compute_seconds = step_seconds - wait_seconds
+        epoch_seconds = sum(epoch['seconds'] for epoch in self.epochs)
+        other_seconds = sum(epoch['other_seconds'] for epoch in self.epochs)
+        tracing_seconds = sum(step['step_ms'] for step in self.steps if step['tracing']) / 1000
+
+        stages = {
+            'input pipeline': wait_seconds,
+            'model compute': compute_seconds,
+            'validation and callbacks': max(other_seconds, 0.0)
+        }
+        wait_share = share(wait_seconds, step_seconds)
+        if wait_share >= INPUT_BOUND_SHARE:
+            bottleneck = 'input pipeline'
+            advice = ('Steps wait for batches: use --cache or --shards instead of decoding JPEGs, raise '
+                      '--decode-workers, or run autotune-training.py --pipeline-augmentation')
+        elif share(stages['validation and callbacks'], epoch_seconds) > 0.5:
+            bottleneck = 'validation and callbacks'
+            advice = 'Most of each epoch is spent outside training steps: validation, checkpoints or callbacks'
+        else:
+            bottleneck = 'model compute'
+            advice = ('Input keeps up with the model: a smaller backbone, --progressive, --feature-cache '
+                      'or autotune-training.py for thread pools and batch size will help more than the input pipeline')
+
+        return {
+            'steps': len(self.steps),
+            'images': sum(step['images'] for step in steady),
+            'epoch_seconds': epoch_seconds,
+            'tracing_seconds': tracing_seconds,
+            'stage_seconds': stages,
+            'data_wait_share': wait_share,
+            'compute_share': share(compute_seconds, step_seconds),
+            'images_per_sec': share(sum(step['images'] for step in steady), step_seconds),
+            'step_p50_ms': float(np.percentile([step['step_ms'] for step in steady], 50)) if steady else 0.0,
+            'step_p95_ms': float(np.percentile([step['step_ms'] for step in steady], 95)) if steady else 0.0,
+            'data_wait_p95_ms': float(np.percentile([step['data_wait_ms'] for step in steady], 95)) if steady else 0.0,
+            'peak_rss_mb': max((step['rss_mb'] for step in self.steps), default=rss_mb()),
+            'bottleneck': bottleneck,
+            'advice': advice
+        }
+
+
+def print_summary(summary, output_dir):
+    print("\n📈 Training telemetry:")
+    print(f"   {summary['steps']} steps, {summary['images_per_sec']:.1f} images/sec, "
+          f"step p50 {summary['step_p50_ms']:.0f} ms (p95 {summary['step_p95_ms']:.0f} ms)")
+    print(f"   Input wait {summary['data_wait_share']:.0%} / compute {summary['compute_share']:.0%} of step time, "
+          f"peak memory {summary['peak_rss_mb']:.0f} MB")
+    for stage, seconds in summary['stage_seconds'].items():
+        print(f"   {stage:<26} {seconds:8.1f}s")
+    print(f"   🔍 Bottleneck: {summary['bottleneck']}. {summary['advice']}")
+    print(f"   Steps: {output_dir / 'steps.jsonl'}, timeline: {output_dir / 'trace.json'}")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Warm-start the FruitAI trainers from the previous production model
+Copies backbone and head weights layer by layer into a freshly built model
+and widens classification layers for new classes, keeping the trained
+weights of every class the previous model already knew
+"""
+
+import numpy as np
+from tensorflow import keras
+
+
+def weighted_layers(model):
+    return [layer for layer in model.layers if layer.weights]
+
+
+def paired_layers(source, target):
+    """Pair the layers of two builds of one architecture
+
+    By position when the weighted layers line up type for type (auto-generated
+    names differ between sessions), otherwise by layer name.
+    """
+    source_layers, target_layers = weighted_layers(source), weighted_layers(target)
+    if [type(layer).__name__ for layer in source_layers] == [type(layer).__name__ for layer in target_layers]:
+        return list(zip(source_layers, target_layers))
+
+    by_name = {layer.name: layer for layer in source_layers}
+    return [(by_name[layer.name], layer) for layer in target_layers if layer.name in by_name]
+
+
+def expand_classes(old_weights, new_weights, old_classes, new_classes):
+    """Move each known class's output column to its index in new_classes
+
+    Columns of classes the previous model never saw keep their fresh
+    initialization; kernel and bias both have the classes on the last axis.
+    """
+    positions = {name: i for i, name in enumerate(old_classes)}
+    expanded = [np.array(weights, copy=True) for weights in new_weights]
+    for j, name in enumerate(new_classes):
+        if name in positions:
+            for target, source in zip(expanded, old_weights):
+                target[..., j] = source[..., positions[name]]
+    return expanded
+
+
+def same_shapes(a, b, ignore_last=False):
+    shape = (lambda w: np.shape(w)[:-1]) if ignore_last else np.shape
+    return len(a) == len(b) and all(shape(x) == shape(y) for x, y in zip(a, b))
+
+
+def transfer_weights(source, target, previous_classes=None, current_classes=None):
+    """Copy source's weights into target and return a report of what was kept
+
+    previous_classes and current_classes map output layer names to their class
+    lists; those layers are remapped class by class instead of copied whole.
+    Layers whose shapes changed (e.g. a different head size) stay initialized.
+    """
+    previous_classes = previous_classes or {}
+    current_classes = current_classes or {}
+    report = {'transferred': [], 'expanded': {}, 'skipped': []}
+
+    for source_layer, target_layer in paired_layers(source, target):
+        old_weights = source_layer.get_weights()
+        new_weights = target_layer.get_weights()
+        name = target_layer.name
+
+        if name in current_classes and name in previous_classes and same_shapes(old_weights, new_weights, ignore_last=True):
+            target_layer.set_weights(expand_classes(
+                old_weights, new_weights, previous_classes[name], current_classes[name]
+            ))
+            report['expanded'][name] = {
+                'kept': [label for label in current_classes[name] if label in previous_classes[name]],
+                'added': [label for label in current_classes[name] if label not in previous_classes[name]],
+                'dropped': [label for label in previous_classes[name] if label not in current_classes[name]]
+            }
+        elif same_shapes(old_weights, new_weights):
+            target_layer.set_weights(old_weights)
+            report['transferred'].append(name)
+        else:
+            report['skipped'].append(name)
+
+    return report
+
+
+def load_previous_model(path):
+    """The previous production model without its optimizer, or None when there is none"""
+    if not path.exists():
+        return None
+    return keras.models.load_model(path, compile=False)
@@ -0,0 +1,10 @@
+"""
+Test setup for the FruitAI training scripts
+The helper modules in scripts/ import each other by bare name, as they do
+when a script is run from there, so that directory goes on sys.path
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
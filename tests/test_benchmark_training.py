@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from trainer_registry import load_script
+
+benchmark = load_script('benchmark-training.py')
+
+
+def report(**results):
+    return {'results': {'real_files': results}}
+
+
+def test_slower_time_is_a_regression():
+    regressions, improvements = benchmark.compare_reports(report(step_ms=100.0), report(step_ms=130.0), 0.1)
+    assert regressions == [('real_files', 'step_ms', 100.0, 130.0, pytest.approx(0.3))]
+    assert improvements == []
+
+
+def test_lower_throughput_is_a_regression():
+    regressions, improvements = benchmark.compare_reports(
+        report(images_per_sec=200.0), report(images_per_sec=150.0), 0.1
+    )
+    assert regressions == [('real_files', 'images_per_sec', 200.0, 150.0, pytest.approx(0.25))]
+    assert improvements == []
+
+
+def test_higher_throughput_and_faster_step_are_improvements():
+    regressions, improvements = benchmark.compare_reports(
+        report(images_per_sec=100.0, step_ms=100.0), report(images_per_sec=150.0, step_ms=50.0), 0.1
+    )
+    assert regressions == []
+    assert sorted((metric, change) for _, metric, _, _, change in improvements) == [
+        ('images_per_sec', pytest.approx(-0.5)), ('step_ms', pytest.approx(-0.5))
+    ]
+
+
+def test_changes_within_threshold_and_counts_are_ignored():
+    regressions, improvements = benchmark.compare_reports(
+        report(step_ms=100.0, images=500, parameters=10, peak_rss_mb=0),
+        report(step_ms=105.0, images=1000, parameters=20, peak_rss_mb=300.0, new_metric=1.0),
+        0.1
+    )
+    assert regressions == [] and improvements == []
@@ -0,0 +1,52 @@
+import json
+import hashlib
+import pytest
+from dataset_shards import ShardWriter, ShardReader, INDEX_NAME
+
+
+def write_shards(output_dir, images, shard_size):
+    with ShardWriter(output_dir, shard_size=shard_size) as writer:
+        for i, data in enumerate(images):
+            writer.add(data, 'fresh' if i % 2 else 'rotten', 'apple', 'test-source', f'{i}.jpg')
+
+
+def test_round_trip_across_shards(tmp_path):
+    images = [bytes([i]) * (10 + i) for i in range(7)]
+    write_shards(tmp_path, images, shard_size=32)
+
+    reader = ShardReader(tmp_path)
+    assert len(reader.shards) > 1
+    assert len(reader) == len(images)
+    assert list(reader.iter_bytes()) == images
+    assert [reader.read(i) for i in reversed(range(len(images)))] == images[::-1]
+    assert reader.content_hash(3) == hashlib.sha256(images[3]).hexdigest()
+    assert ShardReader.record_key(reader.records[1]) == 'fresh/apple/1.jpg'
+    reader.close()
+
+
+def test_content_hash_of_index_without_sha256(tmp_path):
+    images = [b'first image', b'second image']
+    write_shards(tmp_path, images, shard_size=1024)
+
+    index_path = tmp_path / INDEX_NAME
+    index = json.loads(index_path.read_text())
+    for record in index['records']:
+        del record['sha256']
+    index_path.write_text(json.dumps(index))
+
+    reader = ShardReader(tmp_path)
+    assert reader.content_hash(1) == hashlib.sha256(images[1]).hexdigest()
+    reader.close()
+
+
+def test_writer_replaces_previous_shards(tmp_path):
+    write_shards(tmp_path, [b'x' * 20] * 4, shard_size=20)
+    write_shards(tmp_path, [b'only'], shard_size=1024)
+
+    assert sorted(path.name for path in tmp_path.glob('shard-*.bin')) == ['shard-00000.bin']
+    assert list(ShardReader(tmp_path).iter_bytes()) == [b'only']
+
+
+def test_missing_index(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ShardReader(tmp_path)
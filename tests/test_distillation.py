@@ -0,0 +1,58 @@
+import math
+import pytest
+
+np = pytest.importorskip('numpy')
+tf = pytest.importorskip('tensorflow')
+
+from distillation import (
+    logits_from_probabilities, distillation_targets, distillation_loss, hard_label_accuracy, teacher_agreement
+)
+
+
+def bce_with_logits(label, logit):
+    probability = 1 / (1 + math.exp(-logit))
+    return -(label * math.log(probability) + (1 - label) * math.log(1 - probability))
+
+
+def test_logits_invert_the_sigmoid():
+    logits = logits_from_probabilities([0.5, 0.8807971, 0.0])
+    assert logits[0] == pytest.approx(0.0, abs=1e-6)
+    assert logits[1] == pytest.approx(2.0, abs=1e-4)
+    assert np.isfinite(logits[2])
+
+
+def test_loss_matches_the_formula():
+    temperature, alpha = 4.0, 0.3
+    label, teacher_logit, student_logit = 1.0, 2.0, -1.0
+    y_true = tf.constant(distillation_targets([label], [teacher_logit]))
+    y_pred = tf.constant([[student_logit]])
+
+    soft_label = 1 / (1 + math.exp(-teacher_logit / temperature))
+    expected = (alpha * bce_with_logits(label, student_logit)
+                + (1 - alpha) * temperature ** 2 * bce_with_logits(soft_label, student_logit / temperature))
+
+    loss = distillation_loss(temperature, alpha)(y_true, y_pred)
+    assert float(loss[0]) == pytest.approx(expected, rel=1e-5)
+
+
+def test_alpha_one_is_plain_cross_entropy():
+    y_true = tf.constant(distillation_targets([0.0, 1.0], [5.0, -5.0]))
+    y_pred = tf.constant([[0.5], [1.5]])
+
+    loss = distillation_loss(temperature=4.0, alpha=1.0)(y_true, y_pred)
+    np.testing.assert_allclose(loss.numpy(), [bce_with_logits(0.0, 0.5), bce_with_logits(1.0, 1.5)], rtol=1e-5)
+
+
+def test_soft_term_is_smallest_when_student_matches_teacher():
+    loss = distillation_loss(temperature=2.0, alpha=0.0)
+    y_true = tf.constant(distillation_targets([1.0], [1.5]))
+    matched = float(loss(y_true, tf.constant([[1.5]]))[0])
+    assert matched < float(loss(y_true, tf.constant([[1.0]]))[0])
+    assert matched < float(loss(y_true, tf.constant([[2.0]]))[0])
+
+
+def test_accuracy_and_agreement():
+    y_true = tf.constant(distillation_targets([1.0, 0.0, 1.0], [3.0, -3.0, -3.0]))
+    accuracy = hard_label_accuracy(y_true, tf.constant([[2.0], [-1.0], [-0.5]]))
+    assert accuracy.numpy().tolist() == [1.0, 1.0, 0.0]
+    assert teacher_agreement([3.0, -3.0, -3.0], [0.9, 0.2, 0.7]) == pytest.approx(2 / 3)
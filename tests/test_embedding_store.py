@@ -0,0 +1,95 @@
+import json
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from embedding_store import EmbeddingStore, load_embedding_views, remove_stale_versions
+
+
+def fake_embeddings(hashes, dim=4):
+    """Deterministic embeddings: every row is filled with the hash's number"""
+    return np.array([[float(content_hash[1:])] * dim for content_hash in hashes], dtype=np.float32)
+
+
+class CountingExtractor:
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.extracted = []
+
+    def __call__(self, indices):
+        batch = [self.hashes[i] for i in indices]
+        self.extracted.extend(batch)
+        return fake_embeddings(batch)
+
+
+def test_miss_then_hit(tmp_path):
+    hashes = ['h1', 'h2', 'h3']
+    extract = CountingExtractor(hashes)
+    embeddings = EmbeddingStore(tmp_path, 'backbone', 'v1').sync(hashes, extract)
+    assert extract.extracted == hashes
+    np.testing.assert_array_equal(embeddings, fake_embeddings(hashes))
+
+    # A new store object reads the index back and only extracts the new image
+    hashes = ['h3', 'h1', 'h4', 'h2']
+    extract = CountingExtractor(hashes)
+    embeddings = EmbeddingStore(tmp_path, 'backbone', 'v1').sync(hashes, extract)
+    assert extract.extracted == ['h4']
+    np.testing.assert_array_equal(embeddings, fake_embeddings(hashes))
+
+
+def test_removed_images_free_rows_for_reuse(tmp_path):
+    store = EmbeddingStore(tmp_path, 'backbone', 'v1')
+    store.sync(['h1', 'h2', 'h3'], CountingExtractor(['h1', 'h2', 'h3']))
+    store.sync(['h1', 'h3'], CountingExtractor(['h1', 'h3']))
+    assert 'h2' not in store and len(store) == 2
+
+    hashes = ['h1', 'h3', 'h5']
+    embeddings = store.sync(hashes, CountingExtractor(hashes))
+    assert store.index['capacity'] == 3
+    np.testing.assert_array_equal(embeddings, fake_embeddings(hashes))
+
+
+def test_new_version_invalidates_the_store(tmp_path):
+    hashes = ['h1', 'h2']
+    EmbeddingStore(tmp_path, 'backbone', 'v1').sync(hashes, CountingExtractor(hashes))
+
+    extract = CountingExtractor(hashes)
+    EmbeddingStore(tmp_path, 'backbone', 'v2').sync(hashes, extract)
+    assert extract.extracted == hashes
+
+
+def test_mismatched_index_is_ignored(tmp_path):
+    hashes = ['h1']
+    store = EmbeddingStore(tmp_path, 'backbone', 'v1')
+    store.sync(hashes, CountingExtractor(hashes))
+    index = json.loads(store.index_path.read_text())
+    store.index_path.write_text(json.dumps({**index, 'version': 'other'}))
+
+    assert len(EmbeddingStore(tmp_path, 'backbone', 'v1')) == 0
+
+
+def test_lookup_of_unknown_hash(tmp_path):
+    store = EmbeddingStore(tmp_path, 'backbone', 'v1')
+    store.sync(['h1'], CountingExtractor(['h1']))
+    with pytest.raises(KeyError):
+        store.lookup(['h1', 'h9'])
+
+
+def test_augmented_views(tmp_path):
+    hashes = ['h1', 'h2']
+    embeddings, augmented = load_embedding_views(
+        tmp_path, 'backbone', 'v1', hashes,
+        lambda indices, view: fake_embeddings([hashes[i] for i in indices]) + (0 if view is None else view + 1),
+        views=2
+    )
+    assert embeddings.shape == (2, 4)
+    assert augmented.shape == (2, 2, 4)
+    np.testing.assert_array_equal(augmented[1], fake_embeddings(hashes) + 2)
+
+
+def test_remove_stale_versions(tmp_path):
+    for backbone, version in (('teacher-real', 'old'), ('teacher-real', 'new'), ('teacher-real-v2', 'x')):
+        EmbeddingStore(tmp_path, backbone, version).sync(['h1'], CountingExtractor(['h1']))
+
+    assert remove_stale_versions(tmp_path, 'teacher-real', 'new') == ['teacher-real-old']
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_dir()) == ['teacher-real-new', 'teacher-real-v2-x']
@@ -0,0 +1,46 @@
+import threading
+import pytest
+
+np = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+pytest.importorskip('tensorflow')
+
+from image_cache import PreprocessedImageCache
+
+
+def organized_tree(base_dir, count=4):
+    for i in range(count):
+        folder = base_dir / ('fresh' if i % 2 else 'rotten') / 'apple'
+        folder.mkdir(parents=True, exist_ok=True)
+        Image.new('RGB', (16, 16), (i * 40, 0, 0)).save(folder / f'{i}.jpg')
+
+
+def test_build_then_reuse(tmp_path):
+    organized_tree(tmp_path / 'organized')
+    cache = PreprocessedImageCache(tmp_path / 'organized', (8, 8))
+    pixels, qualities, fruits = cache.load()
+    assert pixels.shape == (4, 8, 8, 3)
+    assert sorted(qualities.tolist()) == ['fresh', 'fresh', 'rotten', 'rotten']
+
+    reused = PreprocessedImageCache(tmp_path / 'organized', (8, 8))
+    np.testing.assert_array_equal(reused.load(build=False)[0], pixels)
+
+
+def test_worker_waits_for_the_chief_build(tmp_path):
+    organized_tree(tmp_path / 'organized')
+    worker = PreprocessedImageCache(tmp_path / 'organized', (8, 8))
+    result = {}
+
+    thread = threading.Thread(target=lambda: result.update(pixels=worker.load(build=False)[0]))
+    thread.start()
+    chief_pixels = PreprocessedImageCache(tmp_path / 'organized', (8, 8)).load()[0]
+    thread.join(timeout=30)
+
+    np.testing.assert_array_equal(result['pixels'], chief_pixels)
+
+
+def test_wait_times_out_without_a_builder(tmp_path):
+    organized_tree(tmp_path / 'organized')
+    cache = PreprocessedImageCache(tmp_path / 'organized', (8, 8))
+    with pytest.raises(TimeoutError):
+        cache.wait_for_build('fingerprint', timeout=0.2, poll_seconds=0.05)
@@ -0,0 +1,115 @@
+import time
+import threading
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from micro_batching import MicroBatcher, LatencyTracker
+
+
+class RecordingModel:
+    """Returns each image's first pixel and remembers the size of every batch"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batch_sizes = []
+
+    def __call__(self, batch):
+        time.sleep(self.delay)
+        self.batch_sizes.append(len(batch))
+        return [int(image[0, 0, 0]) for image in batch]
+
+
+def image(value):
+    return np.full((2, 2, 3), value, dtype=np.uint8)
+
+
+def test_flushes_when_the_batch_is_full():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=10_000)
+    futures = [batcher.submit(image(i)) for i in range(8)]
+    batcher.start()
+    try:
+        assert [future.result(timeout=5) for future in futures] == list(range(8))
+    finally:
+        batcher.stop()
+    assert model.batch_sizes == [4, 4]
+
+
+def test_flushes_a_partial_batch_at_the_deadline():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=32, max_wait_ms=50).start()
+    try:
+        start = time.perf_counter()
+        futures = [batcher.submit(image(i)) for i in range(3)]
+        assert [future.result(timeout=5) for future in futures] == [0, 1, 2]
+        elapsed = time.perf_counter() - start
+    finally:
+        batcher.stop()
+    assert model.batch_sizes == [3]
+    assert 0.04 <= elapsed < 2
+
+
+def test_concurrent_callers_get_their_own_results():
+    model = RecordingModel(delay=0.01)
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=20).start()
+    results = {}
+
+    def call(value):
+        results[value] = batcher.submit(image(value)).result(timeout=5)
+
+    threads = [threading.Thread(target=call, args=(value,)) for value in range(20)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        batcher.stop()
+    assert results == {value: value for value in range(20)}
+    assert sum(model.batch_sizes) == 20 and max(model.batch_sizes) <= 8
+
+
+def test_model_errors_reach_every_caller_of_the_batch():
+    def broken(batch):
+        raise RuntimeError('model failed')
+
+    batcher = MicroBatcher(broken, max_batch_size=2, max_wait_ms=10_000)
+    futures = [batcher.submit(image(i)) for i in range(2)]
+    batcher.start()
+    try:
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+    finally:
+        batcher.stop()
+
+
+def test_tracker_summary():
+    tracker = LatencyTracker(window=3)
+    for ms in (1.0, 2.0, 3.0, 100.0):
+        tracker.record(total_ms=ms)
+    tracker.record_batch(4)
+    tracker.record_batch(2)
+    tracker.count('analyzed')
+
+    summary = tracker.summary()
+    assert summary['latency']['total_ms']['count'] == 3
+    assert summary['latency']['total_ms']['p50_ms'] == 3.0
+    assert summary['mean_batch_size'] == 3.0
+    assert summary['batch_sizes'] == {'2': 1, '4': 1}
+    assert summary['counts'] == {'analyzed': 1}
+
+
+def test_backlog_behind_a_slow_batch_fills_the_next_batches():
+    model = RecordingModel(delay=0.05)
+    batcher = MicroBatcher(model, max_batch_size=32, max_wait_ms=10).start()
+    try:
+        futures = [batcher.submit(image(i % 256)) for i in range(200)]
+        assert [future.result(timeout=10) for future in futures] == [i % 256 for i in range(200)]
+    finally:
+        batcher.stop()
+
+    # The first batch may close before the backlog arrives; every later one is full until it drains
+    assert len(model.batch_sizes) <= 9
+    assert all(size == 32 for size in model.batch_sizes[1:-1])
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip('tensorflow')
+
+from progressive_resizing import parse_sizes, progressive_phases
+
+
+def test_parse_sizes():
+    assert parse_sizes('128, 160,224,') == [128, 160, 224]
+
+
+def test_epochs_split_evenly_with_remainder_at_full_size():
+    assert progressive_phases([128, 160], 10, 224) == [((128, 128), 3), ((160, 160), 6), ((224, 224), 10)]
+
+
+def test_final_size_is_always_last_and_not_repeated():
+    assert progressive_phases([224, 128], 4, 224) == [((128, 128), 2), ((224, 224), 4)]
+
+
+def test_fewer_epochs_than_sizes_keeps_the_last_phases():
+    assert progressive_phases([96, 128, 160], 2, 224) == [((160, 160), 1), ((224, 224), 2)]
+
+
+def test_one_epoch_runs_only_at_full_size():
+    assert progressive_phases([128, 160], 1, 224) == [((224, 224), 1)]
+
+
+def test_no_sizes_is_a_single_full_size_phase():
+    assert progressive_phases([], 30, 224) == [((224, 224), 30)]
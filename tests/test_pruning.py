@@ -0,0 +1,79 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+tf = pytest.importorskip('tensorflow')
+keras = tf.keras
+layers = keras.layers
+
+from pruning import prune_structured, prunable_kernels, GradualMagnitudePruning, kernel_sparsity, inbound_layers
+from training_data import make_augmenter
+from backbone_preprocessing import caffe_preprocessing
+
+
+def build_model():
+    """A small stand-in for the trainers: augmentation, in-graph preprocessing, nested conv backbone,
+    hidden Dense layers and two heads joined by Concatenate"""
+    backbone_inputs = keras.Input(shape=(8, 8, 3))
+    x = layers.Conv2D(4, 3, padding='same', name='block_conv')(backbone_inputs)
+    x = layers.Conv2D(8, 1, name='top_conv')(x)
+    x = layers.BatchNormalization(name='top_bn')(x)
+    x = layers.Activation('relu', name='top_activation')(x)
+    backbone = keras.Model(backbone_inputs, x, name='backbone')
+
+    inputs = keras.Input(shape=(8, 8, 3))
+    preprocessed = caffe_preprocessing(make_augmenter()(inputs))
+    features = layers.GlobalAveragePooling2D(name='pool')(backbone(preprocessed, training=False))
+    hidden = layers.Dense(16, activation='relu', name='dense1')(features)
+    hidden = layers.Dropout(0.2, name='dropout1')(hidden)
+    quality = layers.Dense(6, activation='relu', name='quality_branch')(hidden)
+    fruit = layers.Dense(4, activation='relu', name='fruit_branch')(hidden)
+    combined = layers.Concatenate(name='combined')([quality, fruit])
+    outputs = layers.Dense(1, activation='sigmoid', name='freshness')(combined)
+    return keras.Model(inputs, outputs)
+
+
+@pytest.fixture
+def images():
+    return np.random.default_rng(0).uniform(0, 1, (5, 8, 8, 3)).astype(np.float32)
+
+
+def test_graph_walk():
+    graph = inbound_layers(build_model())
+    assert graph['combined'] == ['quality_branch', 'fruit_branch']
+    assert graph['pool'] == ['backbone']
+
+
+def test_ratio_zero_keeps_the_same_function(images):
+    model = build_model()
+    pruned, widths = prune_structured(model, 0.0)
+    assert widths['dense1'] == (16, 16) and widths['top_conv'] == (8, 8)
+    np.testing.assert_allclose(pruned.predict(images, verbose=0), model.predict(images, verbose=0), rtol=1e-5, atol=1e-6)
+
+
+def test_pruning_shrinks_head_and_last_convolution(images):
+    model = build_model()
+    pruned, widths = prune_structured(model, 0.5)
+
+    assert widths == {'top_conv': (8, 4), 'dense1': (16, 8), 'quality_branch': (6, 3), 'fruit_branch': (4, 2)}
+    assert pruned.get_layer('freshness').get_weights()[0].shape == (5, 1)
+    assert pruned.get_layer('backbone').get_layer('top_bn').get_weights()[0].shape == (4,)
+    assert pruned.count_params() < model.count_params()
+    assert pruned.predict(images, verbose=0).shape == (5, 1)
+
+
+def test_head_only_leaves_the_backbone(images):
+    pruned, widths = prune_structured(build_model(), 0.5, include_backbone=False)
+    assert 'top_conv' not in widths
+    assert pruned.get_layer('backbone').get_layer('top_conv').get_weights()[0].shape[-1] == 8
+
+
+def test_magnitude_pruning_reaches_target_sparsity(images):
+    model = build_model()
+    model.get_layer('backbone').trainable = False
+    model.compile(optimizer='adam', loss='binary_crossentropy')
+    kernels = prunable_kernels(model)
+    assert [layer.name for layer in kernels] == ['dense1', 'quality_branch', 'fruit_branch']
+
+    model.fit(images, np.ones((5, 1)), epochs=4, batch_size=1, verbose=0,
+              callbacks=[GradualMagnitudePruning(kernels, 0.5, end_step=10, frequency=2)])
+    assert kernel_sparsity(kernels) == pytest.approx(0.5, abs=0.02)
@@ -0,0 +1,89 @@
+import json
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('sklearn')
+pytest.importorskip('tensorflow')
+
+from training_data import load_split_manifest
+
+
+def make_samples(count):
+    keys = [f"{'fresh' if i % 2 else 'rotten'}/apple/{i}.jpg" for i in range(count)]
+    strata = ['fresh' if i % 2 else 'rotten' for i in range(count)]
+    return keys, strata
+
+
+def test_splits_cover_every_sample_once(tmp_path):
+    keys, strata = make_samples(100)
+    splits = load_split_manifest(tmp_path / 'splits.json', keys, strata)
+
+    combined = np.concatenate([splits['train'], splits['val'], splits['test']])
+    assert sorted(combined.tolist()) == list(range(100))
+    assert len(splits['test']) == 20
+    assert len(splits['val']) == 16
+    for indices in splits.values():
+        assert indices.tolist() == sorted(indices.tolist())
+
+
+def test_splits_are_stratified(tmp_path):
+    keys, strata = make_samples(100)
+    splits = load_split_manifest(tmp_path / 'splits.json', keys, strata)
+
+    test_strata = [strata[i] for i in splits['test']]
+    assert test_strata.count('fresh') == test_strata.count('rotten')
+
+
+def test_manifest_keeps_assignments_when_samples_change(tmp_path):
+    manifest = tmp_path / 'splits.json'
+    keys, strata = make_samples(100)
+    first = load_split_manifest(manifest, keys, strata)
+    assigned = {keys[i]: split for split, indices in first.items() for i in indices}
+
+    # Drop the first ten samples and add twenty new ones
+    more_keys, more_strata = make_samples(120)
+    second = load_split_manifest(manifest, more_keys[10:], more_strata[10:])
+    reassigned = {more_keys[10 + i]: split for split, indices in second.items() for i in indices}
+
+    assert all(reassigned[key] == split for key, split in assigned.items() if key in reassigned)
+    assert set(reassigned) == set(more_keys[10:])
+    assert set(json.loads(manifest.read_text())['assignments']) == set(more_keys[10:])
+
+
+def test_changed_split_parameters_rebuild_the_manifest(tmp_path):
+    manifest = tmp_path / 'splits.json'
+    keys, strata = make_samples(100)
+    load_split_manifest(manifest, keys, strata, test_size=0.2)
+    splits = load_split_manifest(manifest, keys, strata, test_size=0.5)
+
+    assert len(splits['test']) == 50
+
+
+def test_tiny_dataset_does_not_fail(tmp_path):
+    splits = load_split_manifest(tmp_path / 'splits.json', ['fresh/apple/only.jpg'], ['fresh'])
+    assert splits['train'].tolist() == [0]
+    assert len(splits['val']) == len(splits['test']) == 0
+
+
+def test_unchanged_manifest_is_not_rewritten(tmp_path):
+    manifest = tmp_path / 'splits.json'
+    keys, strata = make_samples(50)
+    load_split_manifest(manifest, keys, strata)
+    written = manifest.stat().st_mtime_ns
+
+    load_split_manifest(manifest, keys, strata)
+    assert manifest.stat().st_mtime_ns == written
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_read_only_callers_get_the_same_split_without_writing(tmp_path):
+    manifest = tmp_path / 'splits.json'
+    keys, strata = make_samples(100)
+    load_split_manifest(manifest, keys[:80], strata[:80])
+    before = manifest.read_text()
+
+    worker = load_split_manifest(manifest, keys, strata, write=False)
+    assert manifest.read_text() == before
+    chief = load_split_manifest(manifest, keys, strata)
+    for split in chief:
+        np.testing.assert_array_equal(worker[split], chief[split])
@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+keras = pytest.importorskip('tensorflow').keras
+
+from warm_start import expand_classes, transfer_weights
+
+
+def test_known_classes_move_to_their_new_columns():
+    old_kernel = np.array([[1.0, 2.0], [10.0, 20.0]])
+    old_bias = np.array([0.1, 0.2])
+    new_kernel = np.full((2, 3), -1.0)
+    new_bias = np.full(3, -1.0)
+
+    kernel, bias = expand_classes(
+        [old_kernel, old_bias], [new_kernel, new_bias], ['apple', 'banana'], ['banana', 'cherry', 'apple']
+    )
+    np.testing.assert_array_equal(kernel, [[2.0, -1.0, 1.0], [20.0, -1.0, 10.0]])
+    np.testing.assert_array_equal(bias, [0.2, -1.0, 0.1])
+
+
+def test_dropped_classes_are_left_out_and_inputs_not_modified():
+    old_weights = [np.array([[1.0, 2.0, 3.0]]), np.array([0.1, 0.2, 0.3])]
+    new_weights = [np.zeros((1, 2)), np.zeros(2)]
+
+    kernel, bias = expand_classes(old_weights, new_weights, ['apple', 'banana', 'cherry'], ['cherry', 'apple'])
+    np.testing.assert_array_equal(kernel, [[3.0, 1.0]])
+    np.testing.assert_array_equal(bias, [0.3, 0.1])
+    assert not new_weights[0].any() and not new_weights[1].any()
+
+
+def build(classes, hidden=4):
+    inputs = keras.Input(shape=(3,))
+    x = keras.layers.Dense(hidden, name='hidden')(inputs)
+    outputs = keras.layers.Dense(len(classes), name='fruit')(x)
+    return keras.Model(inputs, outputs)
+
+
+def test_transfer_expands_the_output_layer():
+    source, target = build(['apple', 'banana']), build(['banana', 'cherry', 'apple'])
+    report = transfer_weights(source, target, {'fruit': ['apple', 'banana']}, {'fruit': ['banana', 'cherry', 'apple']})
+
+    assert report['transferred'] == ['hidden']
+    assert report['expanded']['fruit'] == {'kept': ['banana', 'apple'], 'added': ['cherry'], 'dropped': []}
+    source_kernel, target_kernel = source.get_layer('fruit').get_weights()[0], target.get_layer('fruit').get_weights()[0]
+    np.testing.assert_array_equal(target_kernel[:, [0, 2]], source_kernel[:, [1, 0]])
+
+
+def test_transfer_skips_layers_whose_shape_changed():
+    report = transfer_weights(build(['apple'], hidden=4), build(['apple'], hidden=8))
+    assert report['skipped'] == ['hidden', 'fruit']